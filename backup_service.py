@@ -1,20 +1,106 @@
 import os
-import json
-import zipfile
-import shutil
+import zlib
+import hashlib
 import platform
+import threading
 from datetime import datetime
 from pathlib import Path
+from PyQt6.QtCore import QThread, pyqtSignal
+from core import codec
+from core.storage import write_atomic, sync_dir, RESTORE_SUFFIX, ROLLBACK_SUFFIX
+from log_service import log
 
 DATA_DIR = "data"
+BACKUP_EXT = ".hgb-bkp"
+CHUNK_DIR = "chunks"
+INDEX_FILE = "index.json"
+KEEP_BACKUPS = 10
+MANIFEST_VERSION = 2
+INDEX_VERSION = 1
+MIN_CHUNK_SIZE = 16 * 1024
+MAX_CHUNK_SIZE = 256 * 1024
+BOUNDARY_MASK = 0x3F  # A line ends a chunk when the low bits of its CRC are zero (~1 in 64 lines)
+ZSTD_LEVEL = 3
+CODEC_EXTENSIONS = {"zstd": ".zst", "zlib": ".zz"}
+
+# One backup or restore at a time, whichever BackupService started it
+BACKUP_LOCK = threading.Lock()
+
+class BackupCancelled(Exception):
+    pass
+
+class BackupCorrupted(Exception):
+    pass
+
+def get_chunk_codec():
+    """Return the chunk codec name, zstd when zstandard is installed"""
+    try:
+        import zstandard  # noqa: F401
+        return "zstd"
+    except ImportError:
+        return "zlib"
+
+def compress(data, chunk_codec):
+    if chunk_codec == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return zlib.compress(data, 6)
+
+def decompress(data, chunk_codec):
+    if chunk_codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+def split_chunks(data):
+    """Split file bytes at content-defined line boundaries so an edit only changes the chunks around it"""
+    chunks = []
+    start = 0
+    pos = 0
+    size = len(data)
+    
+    while pos < size:
+        end = data.find(b"\n", pos, start + MAX_CHUNK_SIZE)
+        if end == -1:
+            # No newline before the size limit (or the end of the file): cut here
+            end = min(size, start + MAX_CHUNK_SIZE)
+            cut = True
+        else:
+            end += 1
+            cut = end - start >= MIN_CHUNK_SIZE and not zlib.crc32(data[pos:end]) & BOUNDARY_MASK
+        
+        if cut:
+            chunks.append(data[start:end])
+            start = end
+        pos = end
+    
+    if start < size:
+        chunks.append(data[start:])
+    return chunks
+
+def is_manifest(path):
+    """Incremental backups are JSON manifests, older backups are ZIP files"""
+    with open(path, "rb") as f:
+        return f.read(1) == b"{"
+
+def is_safe_name(filename):
+    """Only plain file names may be restored into the data folder"""
+    return filename == os.path.basename(filename) and filename not in ("", ".", "..") and "\\" not in filename
+
+def no_progress(done, total, message):
+    pass
+
+def not_cancelled():
+    return False
 
 class BackupService:
     def __init__(self):
         self.backup_dir = self.get_backup_dir()
+        self.chunk_dir = os.path.join(self.backup_dir, CHUNK_DIR)
+        self.index_path = os.path.join(self.backup_dir, INDEX_FILE)
         
         # Create backup directory if it doesn't exist
-        if not os.path.exists(self.backup_dir):
-            os.makedirs(self.backup_dir)
+        os.makedirs(self.chunk_dir, exist_ok=True)
     
     def get_backup_dir(self):
         """Get backup directory path"""
@@ -26,77 +112,362 @@ class BackupService:
         backup_path = docs / "HwGDBot"
         return str(backup_path)
     
-    def create_backup(self):
-        """Create a backup of all JSON files"""
-        from main import log
-        
+    def load_manifest(self, path):
+        """Load an incremental backup manifest, None for legacy ZIP backups"""
+        if not is_manifest(path):
+            return None
+        with open(path, "rb") as f:
+            return codec.load(f)
+    
+    def load_index(self):
+        """Load the retention index (oldest first), rebuilding it if it's missing or unreadable"""
         try:
-            # Generate timestamp
-            timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-            backup_filename = f"backup-{timestamp}.hgb-bkp"
-            backup_path = os.path.join(self.backup_dir, backup_filename)
-            
-            # Create ZIP file
-            with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # Add all JSON files from data folder
-                if os.path.exists(DATA_DIR):
-                    for filename in os.listdir(DATA_DIR):
-                        if filename.endswith('.json'):
-                            file_path = os.path.join(DATA_DIR, filename)
-                            zipf.write(file_path, filename)
-            
-            log("INFO", f"Backup created: {backup_filename}")
-            
-            # Clean old backups (keep only last 10)
-            self.clean_old_backups()
-            
-            return True
-        
+            with open(self.index_path, "rb") as f:
+                index = codec.load(f)
+            if index.get("version") == INDEX_VERSION:
+                return index["backups"]
+        except FileNotFoundError:
+            pass
         except Exception as e:
-            log("ERROR", f"Failed to create backup: {e}")
-            return False
+            log("WARNING", f"Backup index unreadable, rebuilding: {e}")
+        return self.rebuild_index()
+    
+    def save_index(self, backups):
+        write_atomic(self.index_path, codec.dumps({"version": INDEX_VERSION, "backups": backups}))
+    
+    def rebuild_index(self):
+        """Scan the backup folder once to recreate the index"""
+        backups = []
+        for filename in os.listdir(self.backup_dir):
+            if not filename.endswith(BACKUP_EXT):
+                continue
+            file_path = os.path.join(self.backup_dir, filename)
+            chunks = set()
+            try:
+                manifest = self.load_manifest(file_path)
+                if manifest:
+                    for entry in manifest["files"].values():
+                        chunks.update(entry["chunks"])
+            except Exception as e:
+                log("WARNING", f"Skipping unreadable backup {filename}: {e}")
+                continue
+            backups.append({"name": filename, "mtime": os.path.getmtime(file_path),
+                            "manifest": manifest is not None, "chunks": sorted(chunks)})
+        
+        backups.sort(key=lambda x: x["mtime"])
+        self.save_index(backups)
+        log("INFO", f"Rebuilt backup index ({len(backups)} backups)")
+        return backups
+    
+    def load_latest_manifest(self, backups):
+        """Newest manifest to diff against, or None to back up everything"""
+        for entry in reversed(backups):
+            if entry["manifest"]:
+                try:
+                    return self.load_manifest(os.path.join(self.backup_dir, entry["name"]))
+                except FileNotFoundError:
+                    continue
+        return None
+    
+    def get_chunk_path(self, digest, chunk_codec, chunk_dir=None):
+        return os.path.join(chunk_dir or self.chunk_dir, digest[:2], digest + CODEC_EXTENSIONS[chunk_codec])
     
-    def clean_old_backups(self):
-        """Keep only the last 10 backups"""
-        from main import log
+    def store_chunk(self, data, chunk_codec):
+        """Write a chunk unless the store already has it, returning (digest, bytes written)"""
+        digest = hashlib.sha256(data).hexdigest()
+        for existing in CODEC_EXTENSIONS:
+            if os.path.exists(self.get_chunk_path(digest, existing)):
+                return digest, 0
         
+        path = self.get_chunk_path(digest, chunk_codec)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = compress(data, chunk_codec)
+        write_atomic(path, compressed)
+        return digest, len(compressed)
+    
+    def read_chunk(self, digest, chunk_dir):
+        """Read and decompress a chunk, checking it still hashes to its name"""
+        for chunk_codec in CODEC_EXTENSIONS:
+            path = self.get_chunk_path(digest, chunk_codec, chunk_dir)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    raw = f.read()
+                try:
+                    data = decompress(raw, chunk_codec)
+                except Exception:
+                    raise BackupCorrupted(f"Chunk {digest} can't be decompressed")
+                if hashlib.sha256(data).hexdigest() != digest:
+                    raise BackupCorrupted(f"Chunk {digest} is corrupted")
+                return data
+        raise BackupCorrupted(f"Missing backup chunk {digest}")
+    
+    def create_backup(self, progress=no_progress, cancelled=not_cancelled):
+        """Back up JSON files and journals that changed since the last backup, storing only new chunks"""
+        with BACKUP_LOCK:
+            try:
+                backups = self.load_index()
+                previous = self.load_latest_manifest(backups)
+                previous_files = previous["files"] if previous else {}
+                chunk_codec = get_chunk_codec()
+                
+                filenames = []
+                if os.path.exists(DATA_DIR):
+                    # Journals (played.jsonl) hold changes not yet in their snapshot; reading them first means a
+                    # compaction in between leaves a snapshot that already has them, never one missing them
+                    filenames = sorted((name for name in os.listdir(DATA_DIR) if name.endswith(('.json', '.jsonl'))),
+                                       key=lambda name: (not name.endswith('.jsonl'), name))
+                
+                files = {}
+                changed = []
+                written = 0
+                
+                for done, filename in enumerate(filenames):
+                    if cancelled():
+                        raise BackupCancelled()
+                    progress(done, len(filenames), filename)
+                    
+                    file_path = os.path.join(DATA_DIR, filename)
+                    stat = os.stat(file_path)
+                    old = previous_files.get(filename)
+                    
+                    # Same size and mtime: trust the previous entry without reading the file
+                    if old and old["size"] == stat.st_size and old["mtime_ns"] == stat.st_mtime_ns:
+                        files[filename] = old
+                        continue
+                    
+                    with open(file_path, "rb") as f:
+                        data = f.read()
+                    digest = hashlib.sha256(data).hexdigest()
+                    
+                    if old and old["sha256"] == digest:
+                        files[filename] = dict(old, mtime_ns=stat.st_mtime_ns)
+                        continue
+                    
+                    chunks = []
+                    for chunk in split_chunks(data):
+                        if cancelled():
+                            raise BackupCancelled()
+                        chunk_digest, size = self.store_chunk(chunk, chunk_codec)
+                        chunks.append(chunk_digest)
+                        written += size
+                    
+                    files[filename] = {
+                        "size": len(data),
+                        "mtime_ns": stat.st_mtime_ns,
+                        "sha256": digest,
+                        "chunks": chunks
+                    }
+                    changed.append(filename)
+                
+                progress(len(filenames), len(filenames), "Done")
+                
+                removed = set(previous_files) - set(files)
+                if previous and not changed and not removed:
+                    log("DEBUG", "Backup skipped, nothing changed")
+                    return True
+                
+                # Generate timestamp
+                timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+                backup_filename = f"backup-{timestamp}{BACKUP_EXT}"
+                suffix = 1
+                while os.path.exists(os.path.join(self.backup_dir, backup_filename)):
+                    backup_filename = f"backup-{timestamp}-{suffix}{BACKUP_EXT}"
+                    suffix += 1
+                backup_path = os.path.join(self.backup_dir, backup_filename)
+                
+                manifest = {
+                    "version": MANIFEST_VERSION,
+                    "created": datetime.now().isoformat(),
+                    "codec": chunk_codec,
+                    "files": files
+                }
+                write_atomic(backup_path, codec.dumps(manifest))
+                
+                chunks = set()
+                for entry in files.values():
+                    chunks.update(entry["chunks"])
+                backups.append({"name": backup_filename, "mtime": os.path.getmtime(backup_path),
+                                "manifest": True, "chunks": sorted(chunks)})
+                
+                log("INFO", f"Backup created: {backup_filename} ({len(changed)} changed, {written} bytes of new chunks)")
+                
+                # Clean old backups (keep only last 10)
+                self.clean_old_backups(backups)
+                
+                return True
+            
+            except BackupCancelled:
+                log("INFO", "Backup cancelled")
+                return False
+            except Exception as e:
+                log("ERROR", f"Failed to create backup: {e}")
+                return False
+    
+    def clean_old_backups(self, backups=None):
+        """Keep only the last 10 backups in the index and drop chunks none of them use"""
         try:
-            backups = []
-            for filename in os.listdir(self.backup_dir):
-                if filename.endswith('.hgb-bkp'):
-                    file_path = os.path.join(self.backup_dir, filename)
-                    backups.append((file_path, os.path.getmtime(file_path)))
+            if backups is None:
+                backups = self.load_index()
             
-            # Sort by modification time (newest first)
-            backups.sort(key=lambda x: x[1], reverse=True)
+            expired = backups[:-KEEP_BACKUPS]
+            kept = backups[-KEEP_BACKUPS:]
             
             # Delete old backups (keep only 10)
-            for file_path, _ in backups[10:]:
-                os.remove(file_path)
-                log("INFO", f"Deleted old backup: {os.path.basename(file_path)}")
+            for entry in expired:
+                try:
+                    os.remove(os.path.join(self.backup_dir, entry["name"]))
+                    log("INFO", f"Deleted old backup: {entry['name']}")
+                except FileNotFoundError:
+                    pass
+            
+            referenced = set()
+            for entry in kept:
+                referenced.update(entry["chunks"])
+            
+            unused = set()
+            for entry in expired:
+                unused.update(entry["chunks"])
+            unused -= referenced
+            
+            removed = 0
+            for digest in unused:
+                for chunk_codec in CODEC_EXTENSIONS:
+                    try:
+                        os.remove(self.get_chunk_path(digest, chunk_codec))
+                        removed += 1
+                    except FileNotFoundError:
+                        pass
+            if removed:
+                log("INFO", f"Deleted {removed} unused backup chunks")
+            
+            self.save_index(kept)
         
         except Exception as e:
             log("ERROR", f"Failed to clean old backups: {e}")
     
-    def restore_backup(self, backup_path):
-        """Restore from a backup file"""
-        from main import log
+    def verify_backup(self, backup_path, progress=no_progress, cancelled=not_cancelled):
+        """Read a whole backup and check every file against its checksum, returning {filename: bytes}"""
+        manifest = self.load_manifest(backup_path)
+        files = {}
         
-        try:
-            if not os.path.exists(backup_path):
-                log("ERROR", f"Backup file not found: {backup_path}")
-                return False
+        if manifest:
+            if manifest.get("version") != MANIFEST_VERSION:
+                raise BackupCorrupted(f"Unsupported backup version {manifest.get('version')}")
             
-            # Extract ZIP to data folder
+            # Chunks live next to the manifest, so backups can be restored from a copied folder
+            chunk_dir = os.path.join(os.path.dirname(os.path.abspath(backup_path)), CHUNK_DIR)
+            entries = manifest["files"]
+            for done, (filename, entry) in enumerate(entries.items()):
+                if cancelled():
+                    raise BackupCancelled()
+                progress(done, len(entries), f"Verifying {filename}")
+                if not is_safe_name(filename):
+                    raise BackupCorrupted(f"Invalid file name {filename!r}")
+                
+                data = b"".join(self.read_chunk(digest, chunk_dir) for digest in entry["chunks"])
+                if len(data) != entry["size"] or hashlib.sha256(data).hexdigest() != entry["sha256"]:
+                    raise BackupCorrupted(f"{filename} does not match its checksum")
+                files[filename] = data
+        else:
+            import zipfile
             with zipfile.ZipFile(backup_path, 'r') as zipf:
-                zipf.extractall(DATA_DIR)
+                # testzip checks every member's CRC
+                bad = zipf.testzip()
+                if bad:
+                    raise BackupCorrupted(f"{bad} is corrupted")
+                names = zipf.namelist()
+                for done, filename in enumerate(names):
+                    if cancelled():
+                        raise BackupCancelled()
+                    progress(done, len(names), f"Verifying {filename}")
+                    if not is_safe_name(filename):
+                        raise BackupCorrupted(f"Invalid file name {filename!r}")
+                    files[filename] = zipf.read(filename)
+        
+        return files
+    
+    def stage_restore(self, backup_path, progress=no_progress, cancelled=not_cancelled):
+        """Verify a backup and write its files next to the live ones, returning [(staged, target)] or None"""
+        with BACKUP_LOCK:
+            staged = []
+            try:
+                if not os.path.exists(backup_path):
+                    log("ERROR", f"Backup file not found: {backup_path}")
+                    return None
+                
+                # Nothing is touched until the whole backup has checked out
+                files = self.verify_backup(backup_path, progress, cancelled)
+                
+                os.makedirs(DATA_DIR, exist_ok=True)
+                for done, (filename, data) in enumerate(files.items()):
+                    if cancelled():
+                        raise BackupCancelled()
+                    progress(done, len(files), f"Restoring {filename}")
+                    target = os.path.join(DATA_DIR, filename)
+                    with open(target + RESTORE_SUFFIX, "wb") as f:
+                        f.write(data)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    staged.append((target + RESTORE_SUFFIX, target))
+                progress(len(files), len(files), "Done")
+                
+                log("INFO", f"Backup verified and staged: {os.path.basename(backup_path)}")
+                return staged
             
-            log("INFO", f"Backup restored from: {os.path.basename(backup_path)}")
-            return True
+            except BackupCancelled:
+                log("INFO", "Restore cancelled")
+            except Exception as e:
+                log("ERROR", f"Failed to restore backup: {e}")
+            self.discard_restore(staged)
+            return None
+    
+    def commit_restore(self, staged):
+        """Swap staged files over the live ones as a group, returning the restored file names or None if rolled back"""
+        replaced = []  # (target, its previous version or None)
+        try:
+            for staged_path, target in staged:
+                previous = None
+                if os.path.exists(target):
+                    previous = target + ROLLBACK_SUFFIX
+                    os.replace(target, previous)
+                replaced.append((target, previous))
+                os.replace(staged_path, target)
+        except OSError as e:
+            # Put every file back so the data folder is never half old, half restored
+            log("ERROR", f"Failed to swap in restored files, rolling back: {e}")
+            for target, previous in reversed(replaced):
+                try:
+                    if previous:
+                        os.replace(previous, target)
+                    elif os.path.exists(target):
+                        os.remove(target)
+                except OSError as rollback_error:
+                    log("ERROR", f"Failed to roll back {target}: {rollback_error}")
+            self.discard_restore(staged)
+            return None
         
-        except Exception as e:
-            log("ERROR", f"Failed to restore backup: {e}")
-            return False
+        for _, previous in replaced:
+            if previous:
+                os.remove(previous)
+        if staged:
+            sync_dir(staged[0][1])
+        filenames = [os.path.basename(target) for _, target in staged]
+        log("INFO", f"Restored {len(filenames)} data files")
+        return filenames
+    
+    def discard_restore(self, staged):
+        for staged_path, _ in staged:
+            try:
+                os.remove(staged_path)
+            except FileNotFoundError:
+                pass
+    
+    def restore_backup(self, backup_path, progress=no_progress, cancelled=not_cancelled):
+        """Verify a backup, then restore it over the data folder, returning the restored file names or None"""
+        staged = self.stage_restore(backup_path, progress, cancelled)
+        if staged is None:
+            return None
+        return self.commit_restore(staged)
     
     def open_backup_folder(self):
         """Open backup folder in file explorer"""
@@ -110,5 +481,34 @@ class BackupService:
             else:  # Linux
                 subprocess.run(["xdg-open", self.backup_dir])
         except Exception as e:
-            from main import log
-            log("ERROR", f"Failed to open backup folder: {e}")
\ No newline at end of file
+            log("ERROR", f"Failed to open backup folder: {e}")
+
+class BackupJob(QThread):
+    """Runs a backup, or verifies and stages a restore, off the GUI thread"""
+    progress = pyqtSignal(int, int, str)  # done, total, message
+    completed = pyqtSignal(bool, bool)  # success, cancelled
+    
+    def __init__(self, action="backup", backup_path=None, parent=None):
+        super().__init__(parent)
+        self.action = action
+        self.backup_path = backup_path
+        self.service = BackupService()
+        self.staged = None
+    
+    def run(self):
+        if self.action == "restore":
+            self.staged = self.service.stage_restore(self.backup_path, self.progress.emit, self.isInterruptionRequested)
+            success = self.staged is not None
+        else:
+            success = self.service.create_backup(self.progress.emit, self.isInterruptionRequested)
+        self.completed.emit(success, self.isInterruptionRequested())
+    
+    def commit_restore(self):
+        """Swap the staged files in; call on the thread that owns the loaded data"""
+        filenames = self.service.commit_restore(self.staged)
+        self.staged = None
+        return filenames
+    
+    def cancel(self):
+        """Stop at the next file or chunk"""
+        self.requestInterruption()
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""Measure the cost of importing main and fail if it goes over budget.
+
+Usage: python benchmarks/import_time.py [--budget-ms 400] [--runs 5] [--top 15]
+"""
+import os
+import sys
+import argparse
+import subprocess
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time of main, in milliseconds
+DEFAULT_BUDGET_MS = 400
+
+# Modules that should only be imported once the feature that needs them is used
+DEFERRED_MODULES = [
+    "main_window",
+    "settings_window",
+    "report_dialog",
+    "youtube_dialog",
+    "backup_service",
+    "obs_overlay",
+    "requests",
+    "pytchat",
+    "zipfile",
+    "PyQt6.QtMultimedia"
+]
+
+def run_import(module):
+    """Import module in a fresh interpreter and return {module: (self_us, cumulative_us)}"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+    
+    timings = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the startup import-time budget")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    
+    # First run warms the bytecode cache so later runs measure imports, not compilation
+    run_import(args.module)
+    
+    runs = [run_import(args.module) for _ in range(args.runs)]
+    totals = [timings[args.module][1] / 1000 for timings in runs]
+    median_ms = statistics.median(totals)
+    
+    # Heaviest modules by self time in the median run
+    median_run = runs[totals.index(sorted(totals)[len(totals) // 2])]
+    print(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for name, (self_us, cumulative_us) in sorted(median_run.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {name}")
+    
+    print()
+    print(f"import {args.module}: median {median_ms:.1f} ms, min {min(totals):.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    
+    failed = False
+    
+    eager = [name for name in DEFERRED_MODULES if name in median_run]
+    if eager:
+        print(f"FAIL: imported at startup but should be deferred: {', '.join(eager)}")
+        failed = True
+    
+    if median_ms > args.budget_ms:
+        print(f"FAIL: over budget by {median_ms - args.budget_ms:.1f} ms")
+        failed = True
+    
+    if not failed:
+        print("OK")
+    
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""Compare load/save times of a GDBrowser cache.json with each JSON codec.
+
+"indent" is the old format: stdlib json with indent=2. The others are the compact output
+save_json() now writes for machine-owned files, with each available codec.
+
+Usage: python benchmarks/json_codec.py [--entries 50000] [--runs 5]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core import codec
+from core.storage import load_json, save_json, write_atomic
+
+def make_cache(entries, seed=1):
+    """cache.json contents as GDIntegration keeps them: level ID -> {data, cached_at}"""
+    rng = random.Random(seed)
+    now = datetime(2024, 1, 1)
+    cache = {}
+    for i in range(entries):
+        level_id = str(10000000 + i)
+        cache[level_id] = {
+            "data": {
+                "level_id": level_id,
+                "level_name": f"Level {i}",
+                "author": f"creator{rng.randrange(5000)}",
+                "song": f"Song {rng.randrange(5000)}",
+                "difficulty": rng.choice(["easy", "normal", "hard", "harder", "insane", "demon-hard"]),
+                "difficultyFace": "hard",
+                "length": rng.choice(["tiny", "short", "medium", "long", "xl"]),
+                "is_rated": rng.random() < 0.3,
+                "is_disliked": rng.random() < 0.05,
+                "is_large": rng.random() < 0.1,
+                "downloads": rng.randrange(1000000),
+                "likes": rng.randrange(-500, 50000),
+                "objects": rng.randrange(100000),
+                "song_id": str(rng.randrange(1, 1000000))
+            },
+            "cached_at": (now - timedelta(seconds=rng.randrange(86400))).isoformat()
+        }
+    return cache
+
+def median_ms(func, runs):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON codec load/save benchmark")
+    parser.add_argument("--entries", type=int, default=50000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    
+    cache = make_cache(args.entries)
+    folder = tempfile.mkdtemp(prefix="hwgdbot-codec-")
+    path = os.path.join(folder, "cache.json")
+    
+    print(f"{args.entries} cache entries, median of {args.runs} runs")
+    print(f"{'':>8} {'size':>9} {'save':>9} {'load':>9}")
+    
+    # The old way: stdlib json.dumps(indent=2) to a string, read back with json.load
+    def save_indent():
+        write_atomic(path, json.dumps(cache, indent=2), sync=False, keep_backup=True)
+    
+    def load_indent():
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    
+    save_ms = median_ms(save_indent, args.runs)
+    load_ms = median_ms(load_indent, args.runs)
+    print(f"{'indent':>8} {os.path.getsize(path) / 1048576:>7.1f}MB {save_ms:>7.0f}ms {load_ms:>7.0f}ms")
+    
+    previous = codec.get_codec().name
+    try:
+        for name in codec.CODECS:
+            codec.set_codec(name)
+            save_ms = median_ms(lambda: save_json(path, cache, sync=False), args.runs)
+            load_ms = median_ms(lambda: load_json(path, None), args.runs)
+            if load_json(path, None) != cache:
+                print(f"FAIL: {name} did not load back what it saved")
+                return 1
+            print(f"{name:>8} {os.path.getsize(path) / 1048576:>7.1f}MB {save_ms:>7.0f}ms {load_ms:>7.0f}ms")
+    finally:
+        codec.set_codec(previous)
+        for filename in os.listdir(folder):
+            os.remove(os.path.join(folder, filename))
+        os.rmdir(folder)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
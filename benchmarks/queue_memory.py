@@ -0,0 +1,119 @@
+"""Compare memory and load/save time of queue entries as plain dicts against QueuedLevel records.
+
+Both sides start from the same queue.json text, as the bot does on startup.
+
+Usage: python benchmarks/queue_memory.py [--entries 100000] [--requesters 2000] [--creators 500] [--runs 5]
+"""
+import os
+import gc
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+import tracemalloc
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.queued_level import QueuedLevel
+
+DIFFICULTIES = ["auto", "easy", "normal", "hard", "harder", "insane", "demon-easy", "demon-medium", "demon-hard"]
+LENGTHS = ["tiny", "short", "medium", "long", "xl"]
+PLATFORMS = ["twitch", "youtube"]
+
+def make_queue_json(entries, requesters, creators, seed=1):
+    """queue.json text with entries levels from a pool of requesters and creators"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    queue = []
+    for i in range(entries):
+        difficulty = rng.choice(DIFFICULTIES)
+        queue.append({
+            "level_id": str(10000000 + i),
+            "level_name": f"Level {i}",
+            "author": f"creator{rng.randrange(creators)}",
+            "song": f"Song {rng.randrange(1000)}",
+            "difficulty": difficulty,
+            "difficultyFace": difficulty,
+            "length": rng.choice(LENGTHS),
+            "requester": f"viewer{rng.randrange(requesters)}",
+            "platform": rng.choice(PLATFORMS),
+            "timestamp": (start + timedelta(seconds=i)).isoformat(),
+            "attempts": 0,
+            "is_rated": rng.random() < 0.3,
+            "is_disliked": rng.random() < 0.05,
+            "is_large": rng.random() < 0.1,
+            "downloads": rng.randrange(1000000),
+            "likes": rng.randrange(50000),
+            "objects": rng.randrange(100000),
+            "song_id": str(rng.randrange(1, 1000000)),
+            "is_fucked": False,
+            "fucked_note": None
+        })
+    return json.dumps(queue, indent=2)
+
+def measure(build):
+    """Return (result, retained bytes) for build()"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, retained
+
+def load_dicts(text):
+    return json.loads(text)
+
+def load_records(text):
+    return [QueuedLevel.from_dict(data) for data in json.loads(text)]
+
+def timed(func, runs):
+    """Median seconds of runs calls to func"""
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Queue entry memory benchmark")
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--requesters", type=int, default=2000)
+    parser.add_argument("--creators", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    
+    text = make_queue_json(args.entries, args.requesters, args.creators)
+    
+    dicts, dict_bytes = measure(lambda: load_dicts(text))
+    records, record_bytes = measure(lambda: load_records(text))
+    
+    # Timed separately, tracemalloc slows allocation down
+    dict_load = timed(lambda: load_dicts(text), args.runs)
+    record_load = timed(lambda: load_records(text), args.runs)
+    
+    # Saving: dicts serialize as they are, records go through to_dict()
+    dict_save = timed(lambda: json.dumps(dicts, indent=2), args.runs)
+    record_save = timed(lambda: json.dumps([level.to_dict() for level in records], indent=2), args.runs)
+    
+    # The round trip must give back the file the records were loaded from
+    if [level.to_dict() for level in records] != dicts:
+        print("FAIL: QueuedLevel round trip does not match the original queue.json")
+        return 1
+    
+    print(f"{args.entries} queue entries, {args.requesters} requesters, {args.creators} creators, median of {args.runs} runs")
+    print(f"{'':>14} {'memory':>10} {'per entry':>10} {'load':>9} {'save':>9}")
+    for name, retained, load, save in (("dict", dict_bytes, dict_load, dict_save),
+                                       ("QueuedLevel", record_bytes, record_load, record_save)):
+        print(f"{name:>14} {retained / 1048576:>8.1f}MB {retained / args.entries:>9.0f}B "
+              f"{load * 1000:>7.0f}ms {save * 1000:>7.0f}ms")
+    print(f"QueuedLevel uses {record_bytes / dict_bytes:.0%} of the dict memory")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,342 @@
+"""Replay synthetic chat traffic through the request pipeline and compare against baselines.
+
+Each request goes through the same path as TwitchService.handle_message -> QueueManager.add_level:
+IRC line parsing, command parsing, then QueueCore.add_level against a local fake GDBrowser.
+
+Usage:
+    python benchmarks/request_pipeline.py                      # run every scenario, compare to baselines
+    python benchmarks/request_pipeline.py --scenario burst     # one scenario
+    python benchmarks/request_pipeline.py --save-baseline      # record current numbers
+    python benchmarks/request_pipeline.py --codec json         # force the stdlib codec (default: orjson if installed)
+    python benchmarks/request_pipeline.py --scenario custom --users 50 --requests 2000 --duplicate-ratio 0.5
+
+baselines.json holds numbers from a reference run per JSON codec, and a run is only compared against baselines of
+the codec it used; re-record it with --save-baseline when comparing on other hardware.
+A scenario with no baseline for the codec in use fails the run.
+Queue saves skip the per-request fsync, so throughput measures the pipeline and not the disk, and every number is the
+median of --runs runs. Shared and throttled machines change speed from one minute to the next, so a fixed CPU-bound
+workload is timed next to every run and timings are compared after scaling by how much faster or slower it ran.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import importlib.util
+import tracemalloc
+import statistics
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core import codec
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+TOLERANCE = 0.20  # Allowed peak memory regression before failing
+# Allowed throughput and latency regression after scaling by machine speed, wall-clock numbers stay noisier
+TIMING_TOLERANCE = 0.50
+LATENCY_SLACK_MS = 0.05  # Latencies also have to grow by this much, a few microseconds either way is timer noise
+RUNS = 3
+
+SCENARIOS = {
+    # Typical stream: mostly new levels, some repeats, a few banned chatters
+    "steady": {"users": 200, "requests": 3000, "rate": 0, "duplicate_ratio": 0.2, "ban_ratio": 0.05,
+               "levels": 2000, "gd_latency_ms": 0, "cooldown": False},
+    # Raid: lots of new chatters spamming the same handful of levels
+    "burst": {"users": 1000, "requests": 5000, "rate": 0, "duplicate_ratio": 0.7, "ban_ratio": 0.01,
+              "levels": 100, "gd_latency_ms": 0, "cooldown": True},
+    # Every level is new, so every request misses the cache and waits on the network
+    "cold_cache": {"users": 100, "requests": 500, "rate": 0, "duplicate_ratio": 0.0, "ban_ratio": 0.0,
+                   "levels": 500, "gd_latency_ms": 5, "cooldown": False}
+}
+
+BENCH_SETTINGS = {
+    "max_ids_per_user": 0,
+    "per_user_cooldown": False,
+    "block_same_level_same_user": True,
+    "reject_fucked_list": True,
+    "ignore_played": True,
+    "length_filters": {"tiny": True, "short": True, "medium": True, "long": True, "xl": False},
+    "difficulty_filters": {},
+    "block_disliked": False,
+    "rated_filter": "Any",
+    "block_large": False,
+    "save_queue_on_change": True,
+    "load_queue_on_start": False
+}
+
+def fake_level(level_id):
+    """Deterministic GDBrowser-style level JSON for an ID"""
+    rng = random.Random(int(level_id))
+    return {
+        "id": str(level_id),
+        "name": f"Level {level_id}",
+        "author": f"creator{rng.randrange(300)}",
+        "songName": "Stereo Madness",
+        "difficulty": rng.choice([0, 10, 20, 30, 40, 50]),
+        "stars": rng.choice([0, 0, 2, 4, 6, 8]),
+        "length": rng.randrange(5),
+        "likes": rng.randrange(0, 10000),
+        "dislikes": rng.randrange(0, 2000),
+        "objects": rng.randrange(100, 60000),
+        "downloads": rng.randrange(100000)
+    }
+
+class FakeGDBrowserHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_GET(self):
+        level_id = self.path.rstrip("/").rsplit("/", 1)[-1]
+        if self.latency:
+            time.sleep(self.latency)
+        body = json.dumps(fake_level(level_id) if level_id.isdigit() else -1).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_fake_gdbrowser(latency_ms):
+    """Start a fake GDBrowser API on a free local port, returning (server, api_url)"""
+    handler = type("Handler", (FakeGDBrowserHandler,), {"latency": latency_ms / 1000})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api/level"
+
+def generate_traffic(config, seed):
+    """Build (irc_line, banned_users) for a scenario"""
+    rng = random.Random(seed)
+    users = [f"user{index}" for index in range(config["users"])]
+    banned = set(rng.sample(users, int(len(users) * config["ban_ratio"])))
+    
+    lines = []
+    requested = []
+    for _ in range(config["requests"]):
+        user = rng.choice(users)
+        if requested and rng.random() < config["duplicate_ratio"]:
+            level_id = rng.choice(requested)
+        else:
+            level_id = str(rng.randrange(1, config["levels"] + 1) + 1000)
+            requested.append(level_id)
+        lines.append(f":{user}!{user}@{user}.tmi.twitch.tv PRIVMSG #bench :!post {level_id}")
+    return lines, banned
+
+def calibrate(runs=5):
+    """Median milliseconds of a fixed CPU-bound workload, a measure of how fast the machine is right now"""
+    levels = [fake_level(level_id) for level_id in range(2000)]
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        for level in json.loads(json.dumps(levels)):
+            f"{level['name']}@{level['author']}".lower()
+        sorted(levels, key=lambda level: (level["likes"], level["id"]))
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1000
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    index = max(0, math.ceil(fraction * len(values)) - 1)
+    return values[index]
+
+def run_scenario(name, config, seed, trace_memory=False):
+    """Run one scenario in a scratch data folder and return its result dict"""
+    from core.request_queue import QueueCore
+    from core.automod import AutomodService
+    from core.gd_client import GDIntegration
+    from core.chat import parse_twitch_line, parse_command
+    from core.storage import save_json
+    from event_log import get_event_log
+    
+    settings = dict(BENCH_SETTINGS, per_user_cooldown=config["cooldown"])
+    lines, banned = generate_traffic(config, seed)
+    
+    server, api_url = start_fake_gdbrowser(config["gd_latency_ms"])
+    try:
+        automod = AutomodService(settings, download=False)
+        automod.set_fucked_list({"crash-trigger": [{"level_id": 1001, "note": "bench"}], "nsfw": []})
+        gd = GDIntegration(cache={})
+        gd.api_url = api_url
+        
+        queue = QueueCore(settings, automod, gd)
+        # An fsync per accepted request swings throughput with the disk; fsyncs are batched like the GD cache's
+        queue.save_json = lambda path, data: save_json(path, data, sync=False)
+        queue.blacklist_requesters = [f"{user}@twitch" for user in banned]
+        
+        outcomes = Counter()
+        latencies = []
+        
+        if trace_memory:
+            tracemalloc.start()
+        interval = 1 / config["rate"] if config["rate"] else 0
+        started = time.perf_counter()
+        
+        for index, line in enumerate(lines):
+            if interval:
+                # Open-loop pacing: wait for this request's scheduled send time
+                delay = started + index * interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            
+            request_start = time.perf_counter()
+            parsed = parse_twitch_line(line)
+            command = parse_command(parsed[1], "!post", "!del")
+            result = queue.add_level(command[1], parsed[0], "twitch")
+            latencies.append((time.perf_counter() - request_start) * 1000)
+            outcomes[result.get("code", "unknown")] += 1
+        
+        elapsed = time.perf_counter() - started
+        peak_memory = 0
+        if trace_memory:
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        get_event_log().flush()
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    latencies.sort()
+    return {
+        "codec": codec.get_codec().name,
+        "requests": len(lines),
+        "throughput_rps": round(len(lines) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 4),
+        "p95_ms": round(percentile(latencies, 0.95), 4),
+        "p99_ms": round(percentile(latencies, 0.99), 4),
+        "max_ms": round(latencies[-1], 4),
+        "mean_ms": round(statistics.mean(latencies), 4),
+        "peak_memory_kb": round(peak_memory / 1024, 1),
+        "queue_length": len(queue.get_queue()),
+        "outcomes": dict(outcomes.most_common())
+    }
+
+def median_result(results):
+    """Combine runs of the same scenario, taking the median of every measured number"""
+    combined = dict(results[0])
+    for key, value in results[0].items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            combined[key] = statistics.median(result[key] for result in results)
+    return combined
+
+def compare(name, result, baseline, tolerance, timing_tolerance):
+    """Return a list of regression messages against a stored baseline"""
+    problems = []
+    # Above 1 the machine is slower than when the baseline was recorded
+    slowdown = result["calibration_ms"] / baseline["calibration_ms"]
+    expected_rps = round(baseline["throughput_rps"] / slowdown, 1)
+    if result["throughput_rps"] < expected_rps * (1 - timing_tolerance):
+        problems.append(f"throughput {result['throughput_rps']} < baseline {expected_rps} req/s "
+                        f"({baseline['throughput_rps']} x machine speed {1 / slowdown:.2f})")
+    for key in ("p95_ms", "p99_ms"):
+        expected = round(baseline[key] * slowdown, 4)
+        if result[key] > expected * (1 + timing_tolerance) + LATENCY_SLACK_MS:
+            problems.append(f"{key} {result[key]} > baseline {expected} ({baseline[key]} x machine speed {1 / slowdown:.2f})")
+    if result["peak_memory_kb"] > baseline["peak_memory_kb"] * (1 + tolerance):
+        problems.append(f"peak memory {result['peak_memory_kb']} KB > baseline {baseline['peak_memory_kb']} KB")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the chat request pipeline")
+    parser.add_argument("--scenario", choices=list(SCENARIOS) + ["custom"], action="append")
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--requests", type=int)
+    parser.add_argument("--rate", type=float, help="Requests per second, 0 for as fast as possible")
+    parser.add_argument("--duplicate-ratio", type=float)
+    parser.add_argument("--ban-ratio", type=float)
+    parser.add_argument("--levels", type=int, help="Distinct level IDs to draw from")
+    parser.add_argument("--gd-latency-ms", type=float)
+    parser.add_argument("--cooldown", action="store_true", default=None)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--codec", choices=list(codec.CODECS), help="JSON codec, default the one the bot would use")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--timing-tolerance", type=float, default=TIMING_TOLERANCE)
+    parser.add_argument("--runs", type=int, default=RUNS)
+    args = parser.parse_args()
+    
+    # GDIntegration needs requests to reach the fake server
+    if importlib.util.find_spec("requests") is None:
+        print("requests is not installed (pip install -r requirements.txt)")
+        return 2
+    
+    overrides = {key: value for key, value in {
+        "users": args.users, "requests": args.requests, "rate": args.rate,
+        "duplicate_ratio": args.duplicate_ratio, "ban_ratio": args.ban_ratio, "levels": args.levels,
+        "gd_latency_ms": args.gd_latency_ms, "cooldown": args.cooldown
+    }.items() if value is not None}
+    
+    if args.codec:
+        codec.set_codec(args.codec)
+    codec_name = codec.get_codec().name
+    
+    names = args.scenario or list(SCENARIOS)
+    all_baselines = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+            all_baselines = json.load(f)
+    # Codecs differ in speed and memory, so each has its own baselines
+    baselines = all_baselines.setdefault(codec_name, {})
+    
+    # Data files, cache, event and text logs all go to a scratch folder
+    workdir = tempfile.mkdtemp(prefix="hwgdbot-bench-")
+    os.makedirs(os.path.join(workdir, "data"))
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    
+    failed = False
+    try:
+        for name in names:
+            config = dict(SCENARIOS.get(name, SCENARIOS["steady"]), **overrides)
+            results = []
+            calibrations = []
+            for _ in range(args.runs):
+                calibrations.append(calibrate())
+                results.append(run_scenario(name, config, args.seed))
+            result = median_result(results)
+            result["calibration_ms"] = round(statistics.median(calibrations), 3)
+            # tracemalloc slows everything down, so memory gets its own passes
+            result["peak_memory_kb"] = statistics.median(
+                run_scenario(name, config, args.seed, trace_memory=True)["peak_memory_kb"] for _ in range(args.runs))
+            
+            print(f"== {name} ({codec_name}): {config}")
+            print(f"   {result['throughput_rps']} req/s, p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, "
+                  f"p99 {result['p99_ms']} ms, max {result['max_ms']} ms, peak {result['peak_memory_kb']} KB, "
+                  f"calibration {result['calibration_ms']} ms")
+            print(f"   outcomes: {result['outcomes']}")
+            
+            key = name if not overrides else None
+            if args.save_baseline and key:
+                baselines[key] = result
+            elif key in baselines and "calibration_ms" in baselines[key]:
+                problems = compare(name, result, baselines[key], args.tolerance, args.timing_tolerance)
+                for problem in problems:
+                    print(f"   REGRESSION: {problem}")
+                failed = failed or bool(problems)
+            elif key:
+                # Without a baseline nothing is checked, which must not pass silently
+                print(f"   MISSING BASELINE: no {codec_name} {name} entry with a calibration in {BASELINE_FILE}, "
+                      f"record one with --save-baseline")
+                failed = True
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    if args.save_baseline:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(all_baselines, f, indent=2)
+        print(f"Saved {codec_name} baselines to {BASELINE_FILE}")
+    
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
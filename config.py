@@ -0,0 +1,116 @@
+import os
+from log_service import log
+from core import codec
+from core.storage import load_json, save_json, write_atomic, recover_data_files
+
+VERSION = "1.0.0"
+DATA_DIR = "data"
+
+def ensure_data_folder():
+    """Create data folder if it doesn't exist"""
+    if not os.path.exists(DATA_DIR):
+        os.makedirs(DATA_DIR)
+        log("INFO", "Created data folder")
+    else:
+        # Put back the last good version of anything a crash left damaged
+        recover_data_files(DATA_DIR)
+
+def load_settings():
+    """Load settings or create default"""
+    settings_path = os.path.join(DATA_DIR, "settings.json")
+    default_settings = {
+        "first_run": True,
+        "show_donation_popup": True,
+        "twitch_token": "",
+        "twitch_username": "",
+        "youtube_enabled": False,
+        "post_command": "!post",
+        "delete_command": "!del",
+        "max_ids_per_user": 0,
+        "per_user_cooldown": True,
+        "block_same_level_same_user": True,
+        "reject_fucked_list": True,
+        "ignore_played": True,
+        "played_window_streams": 1,
+        "played_window_days": 0,
+        "length_filters": {
+            "tiny": True,
+            "short": True,
+            "medium": True,
+            "long": True,
+            "xl": True
+        },
+        "difficulty_filters": {
+            "auto": True,
+            "easy": True,
+            "normal": True,
+            "hard": True,
+            "harder": True,
+            "insane": True,
+            "demon-easy": True,
+            "demon-medium": True,
+            "demon-hard": True,
+            "demon-insane": True,
+            "demon-extreme": True
+        },
+        "block_disliked": False,
+        "rated_filter": "Any",
+        "block_large": False,
+        "min_downloads": 0,
+        "max_downloads": 0,
+        "min_likes": 0,
+        "max_likes": 0,
+        "min_objects": 0,
+        "max_objects": 0,
+        "song_allowlist": [],
+        "song_denylist": [],
+        "save_queue_on_change": True,
+        "load_queue_on_start": True,
+        "obs_overlay_enabled": False,
+        "obs_overlay_window_enabled": False,
+        "obs_overlay_template": "{level} by {author} (ID: {id})",
+        "obs_overlay_font": "",
+        "obs_overlay_width": 800,
+        "obs_overlay_height": 100,
+        "obs_overlay_transparency": 100,
+        "obs_overlay_port": 6767,
+        "obs_overlay_endpoints": {},
+        "obs_overlay_minutes_per_level": 5,
+        "sounds_enabled": False,
+        "sound_new_level": "",
+        "sound_error": "",
+        "backup_enabled": False,
+        "backup_interval": 10,
+        "streamer_name": "",
+        "log_level": "INFO",
+        "diagnostics_endpoint_enabled": False,
+        "control_api_token": "",
+        "youtube_livestream_url": ""
+    }
+    
+    try:
+        # Falls back to settings.json.bak if the file is damaged
+        loaded = load_json(settings_path, None)
+        if isinstance(loaded, dict):
+            # Old web overlay kept its template under a separate key
+            if "obs_template" in loaded:
+                legacy_template = loaded.pop("obs_template")
+                loaded.setdefault("obs_overlay_template", legacy_template)
+            # Merge with defaults to ensure all keys exist
+            for key in default_settings:
+                if key not in loaded:
+                    loaded[key] = default_settings[key]
+            return loaded
+        elif not os.path.exists(settings_path):
+            write_atomic(settings_path, codec.dumps(default_settings, pretty=True))
+            log("INFO", "Created default settings.json")
+            return default_settings
+    except Exception as e:
+        log("ERROR", f"Failed to load settings: {e}")
+    return default_settings
+
+def save_settings(settings):
+    """Save settings to file"""
+    settings_path = os.path.join(DATA_DIR, "settings.json")
+    if save_json(settings_path, settings, pretty=True):
+        log("INFO", "Settings saved")
\ No newline at end of file
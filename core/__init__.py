@@ -0,0 +1,9 @@
+"""Qt-free request processing: queue, filters, chat parsing, automod, GDBrowser client and storage"""
+from core.request_queue import QueueCore, QueueObserver
+from core.filters import LevelFilter, check_filters
+from core.chat import parse_twitch_line, parse_command
+from core.automod import AutomodService
+from core.gd_client import GDIntegration
+from core.played import PlayedHistory
+from core.queued_level import QueuedLevel
+from core.storage import load_json, save_json, write_atomic, recover_data_files
\ No newline at end of file
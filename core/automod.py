@@ -1,17 +1,22 @@
 import os
-import json
-import requests
 from datetime import datetime, timedelta
+from log_service import log
+from core.storage import load_json, save_json
 
 DATA_DIR = "data"
 FUCKED_LIST_URL = "https://raw.githubusercontent.com/MalikHw/HwGDBot-db/main/fucked-out-list.json"
 FUCKED_LIST_FILE = os.path.join(DATA_DIR, "fucked-out-list.json")
 
 class AutomodService:
-    def __init__(self, settings):
+    def __init__(self, settings, download=True):
         self.settings = settings
         self.user_cooldowns = {}
-        self.fucked_list = self.load_fucked_list()
+        
+        # Without download the local copy is used until set_fucked_list() is called
+        if download:
+            self.fucked_list = self.load_fucked_list()
+        else:
+            self.fucked_list = self.load_cached_fucked_list()
     
     def update_settings(self, settings):
         """Update settings"""
@@ -19,7 +24,16 @@ class AutomodService:
     
     def load_fucked_list(self):
         """Load fucked-out-list from GitHub or local cache"""
-        from main import log
+        data = self.download_fucked_list()
+        if data is not None:
+            return data
+        
+        # Fall back to local cache
+        return self.load_cached_fucked_list()
+    
+    def download_fucked_list(self):
+        """Download fucked-out-list from GitHub and cache it, or return None"""
+        import requests
         
         try:
             # Try to fetch from GitHub
@@ -27,24 +41,28 @@ class AutomodService:
             if response.status_code == 200:
                 data = response.json()
                 # Save to local cache
-                with open(FUCKED_LIST_FILE, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=2)
+                save_json(FUCKED_LIST_FILE, data)
                 log("INFO", "Downloaded fucked-out-list from GitHub")
                 return data
         except Exception as e:
             log("WARNING", f"Failed to download fucked-out-list: {e}")
         
-        # Fall back to local cache
-        try:
-            if os.path.exists(FUCKED_LIST_FILE):
-                with open(FUCKED_LIST_FILE, "r", encoding="utf-8") as f:
-                    log("INFO", "Using cached fucked-out-list")
-                    return json.load(f)
-        except Exception as e:
-            log("ERROR", f"Failed to load cached fucked-out-list: {e}")
+        return None
+    
+    def load_cached_fucked_list(self):
+        """Load fucked-out-list from local cache"""
+        data = load_json(FUCKED_LIST_FILE, None)
+        if data is not None:
+            log("INFO", "Using cached fucked-out-list")
+            return data
         
         return {}
     
+    def set_fucked_list(self, fucked_list):
+        """Replace fucked-out-list, ignoring a failed download"""
+        if fucked_list is not None:
+            self.fucked_list = fucked_list
+    
     def check_user_cooldown(self, requester, platform):
         """Check if user is on cooldown"""
         if not self.settings.get("per_user_cooldown", True):
@@ -0,0 +1,31 @@
+import re
+
+TWITCH_PRIVMSG_RE = re.compile(r":(\w+)!\w+@\w+\.tmi\.twitch\.tv PRIVMSG #\w+ :(.+)")
+NON_DIGIT_RE = re.compile(r"\D")
+
+def parse_twitch_line(line):
+    """Parse an IRC PRIVMSG into (username, message), or None for anything else"""
+    match = TWITCH_PRIVMSG_RE.match(line)
+    if not match:
+        return None
+    return match.group(1), match.group(2).strip()
+
+def parse_command(message, post_command, delete_command):
+    """Parse a chat message into ("post", level_id), ("delete", None) or None"""
+    message = message.strip()
+    
+    # Check for post command
+    if message.startswith(post_command):
+        parts = message.split()
+        if len(parts) >= 2:
+            # Extract numeric ID
+            level_id = NON_DIGIT_RE.sub("", parts[1])
+            if level_id:
+                return "post", level_id
+        return None
+    
+    # Check for delete command
+    if message.startswith(delete_command):
+        return "delete", None
+    
+    return None
\ No newline at end of file
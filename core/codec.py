@@ -0,0 +1,130 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+STREAM_CHUNK_SIZE = 64 * 1024  # Bytes buffered per write when streaming
+
+def dump_records(dumps, data, f):
+    """Write a top-level object or array compactly with one entry per line, streaming as it goes"""
+    # Backups chunk files at line boundaries, so a single-line document would be one new chunk on every change
+    if isinstance(data, dict):
+        opening, closing = b"{\n", b"\n}"
+        records = (dumps(str(key)) + b":" + dumps(value) for key, value in data.items())
+    elif isinstance(data, (list, tuple)):
+        opening, closing = b"[\n", b"\n]"
+        records = (dumps(value) for value in data)
+    else:
+        f.write(dumps(data))
+        return
+    
+    if not data:
+        f.write(opening[:1] + closing[1:])
+        return
+    
+    buffer = [opening]
+    size = 0
+    for i, record in enumerate(records):
+        if i:
+            buffer.append(b",\n")
+        buffer.append(record)
+        size += len(record)
+        if size >= STREAM_CHUNK_SIZE:
+            f.write(b"".join(buffer))
+            buffer = []
+            size = 0
+    buffer.append(closing)
+    f.write(b"".join(buffer))
+
+class StdlibCodec:
+    """The json module; file output is streamed so large documents are never one big string"""
+    name = "json"
+    
+    def dumps(self, data, pretty=False):
+        if pretty:
+            return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    
+    def loads(self, data):
+        return json.loads(data)
+    
+    def dump(self, data, f, pretty=False):
+        if not pretty:
+            dump_records(self.dumps, data, f)
+            return
+        
+        encoder = json.JSONEncoder(ensure_ascii=False, indent=2)
+        buffer = []
+        size = 0
+        for piece in encoder.iterencode(data):
+            buffer.append(piece)
+            size += len(piece)
+            if size >= STREAM_CHUNK_SIZE:
+                f.write("".join(buffer).encode("utf-8"))
+                buffer = []
+                size = 0
+        f.write("".join(buffer).encode("utf-8"))
+
+class OrjsonCodec:
+    """orjson, several times faster; anything it refuses (ints over 64 bits...) goes through the stdlib codec"""
+    name = "orjson"
+    
+    def __init__(self):
+        self.fallback = StdlibCodec()
+    
+    def dumps(self, data, pretty=False):
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0))
+        except TypeError:
+            return self.fallback.dumps(data, pretty)
+    
+    def loads(self, data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # NaN/Infinity written by the stdlib encoder are valid for json but not orjson
+            return self.fallback.loads(data)
+    
+    def dump(self, data, f, pretty=False):
+        if not pretty:
+            dump_records(self.dumps, data, f)
+            return
+        # orjson has no incremental encoder, but its output is produced in one native pass
+        f.write(self.dumps(data, pretty))
+
+CODECS = {"json": StdlibCodec}
+if orjson is not None:
+    CODECS["orjson"] = OrjsonCodec
+
+codec = CODECS["orjson" if orjson is not None else "json"]()
+
+def get_codec():
+    """Return the codec in use"""
+    return codec
+
+def set_codec(name):
+    """Switch codec by name ("orjson" or "json"), returning the previous one"""
+    global codec
+    if name not in CODECS:
+        raise ValueError(f"JSON codec {name} is not available")
+    previous = codec
+    codec = CODECS[name]()
+    return previous
+
+def dumps(data, pretty=False):
+    """Encode to UTF-8 bytes, compact unless pretty (two-space indent for files people edit)"""
+    return codec.dumps(data, pretty)
+
+def loads(data):
+    """Decode bytes or str"""
+    return codec.loads(data)
+
+def dump(data, f, pretty=False):
+    """Encode into a binary file, compact with one top-level entry per line unless pretty"""
+    codec.dump(data, f, pretty)
+
+def load(f):
+    """Decode a binary or text file"""
+    return codec.loads(f.read())
\ No newline at end of file
@@ -0,0 +1,105 @@
+FILTER_SETTINGS = (
+    "length_filters", "difficulty_filters", "block_disliked", "rated_filter", "block_large",
+    "min_downloads", "max_downloads", "min_likes", "max_likes", "min_objects", "max_objects",
+    "song_allowlist", "song_denylist"
+)
+
+# Numeric ranges: (level field, setting prefix, label); 0 means no limit
+RANGE_FILTERS = (
+    ("downloads", "downloads", "Downloads"),
+    ("likes", "likes", "Likes"),
+    ("objects", "objects", "Object count")
+)
+
+ALLOWED = {"allowed": True}
+
+def parse_song_ids(value):
+    """Song ID list from settings, accepting a list or a comma separated string"""
+    if isinstance(value, str):
+        value = value.split(",")
+    return frozenset(str(song_id).strip() for song_id in value or () if str(song_id).strip())
+
+class LevelFilter:
+    """Filter settings compiled once into the checks that are switched on"""
+    def __init__(self, settings):
+        # (code, rejects(level), reason(level)) in the order the checks used to run
+        self.checks = []
+        add = self.checks.append
+        
+        # Length filter
+        blocked_lengths = frozenset(length for length, allowed in settings.get("length_filters", {}).items() if not allowed)
+        if blocked_lengths:
+            add(("filter_length", lambda level: level["length"] in blocked_lengths,
+                 lambda level: f"Length {level['length']} is filtered"))
+        
+        # Difficulty filter
+        blocked_difficulties = frozenset(difficulty for difficulty, allowed in settings.get("difficulty_filters", {}).items()
+                                         if not allowed)
+        if blocked_difficulties:
+            add(("filter_difficulty", lambda level: level["difficulty"] in blocked_difficulties,
+                 lambda level: f"Difficulty {level['difficulty']} is filtered"))
+        
+        # Disliked filter
+        if settings.get("block_disliked", False):
+            add(("filter_disliked", lambda level: level["is_disliked"], lambda level: "Level is disliked"))
+        
+        # Rated filter
+        rated_filter = settings.get("rated_filter", "Any")
+        if rated_filter == "Rated Only":
+            add(("filter_unrated", lambda level: not level["is_rated"], lambda level: "Level is not rated"))
+        elif rated_filter == "Unrated Only":
+            add(("filter_rated", lambda level: level["is_rated"], lambda level: "Level is rated"))
+        
+        # Large filter
+        if settings.get("block_large", False):
+            add(("filter_large", lambda level: level["is_large"], lambda level: "Level is too large (40k+ objects)"))
+        
+        # Ranges (levels cached or queued before a field existed have it missing or None and aren't judged on it)
+        for field, name, label in RANGE_FILTERS:
+            minimum = settings.get(f"min_{name}", 0)
+            maximum = settings.get(f"max_{name}", 0)
+            if minimum:
+                add((f"filter_min_{name}",
+                     lambda level, field=field, minimum=minimum: level.get(field) is not None and level[field] < minimum,
+                     lambda level, field=field, label=label, minimum=minimum: f"{label} {level[field]} is below {minimum}"))
+            if maximum:
+                add((f"filter_max_{name}",
+                     lambda level, field=field, maximum=maximum: level.get(field) is not None and level[field] > maximum,
+                     lambda level, field=field, label=label, maximum=maximum: f"{label} {level[field]} is above {maximum}"))
+        
+        # Song allow/deny lists
+        allowed_songs = parse_song_ids(settings.get("song_allowlist"))
+        if allowed_songs:
+            add(("filter_song", lambda level: bool(level.get("song_id")) and level["song_id"] not in allowed_songs,
+                 lambda level: f"Song {level['song_id']} is not allowed"))
+        denied_songs = parse_song_ids(settings.get("song_denylist"))
+        if denied_songs:
+            add(("filter_song", lambda level: level.get("song_id") in denied_songs,
+                 lambda level: f"Song {level['song_id']} is blocked"))
+    
+    def check(self, level_data):
+        """Return the first failed check as a rejection, or allowed"""
+        for code, rejects, reason in self.checks:
+            if rejects(level_data):
+                return {"allowed": False, "code": code, "reason": reason(level_data)}
+        return ALLOWED
+    
+    def __call__(self, level_data):
+        """True if the level passes every filter"""
+        return not any(rejects(level_data) for _, rejects, _ in self.checks)
+    
+    def partition(self, levels):
+        """Split levels into (kept, [(level, rejection)]) in one pass"""
+        kept = []
+        rejected = []
+        for level in levels:
+            result = self.check(level)
+            if result["allowed"]:
+                kept.append(level)
+            else:
+                rejected.append((level, result))
+        return kept, rejected
+
+def check_filters(settings, level_data):
+    """Check if level passes the filters in settings (compiles them each call, keep a LevelFilter instead)"""
+    return LevelFilter(settings).check(level_data)
\ No newline at end of file
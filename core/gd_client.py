@@ -1,36 +1,36 @@
 import os
-import json
-import requests
+import time
 from datetime import datetime, timedelta
+from log_service import log
+from core.storage import load_json, save_json
 
 DATA_DIR = "data"
 CACHE_FILE = os.path.join(DATA_DIR, "cache.json")
 CACHE_DURATION = timedelta(hours=24)
+FETCH_TIMEOUT = 10  # Seconds for GDBrowser to connect, and again between bytes of the response
 
 class GDIntegration:
-    def __init__(self):
+    def __init__(self, cache=None):
         self.api_url = "https://gdbrowser.com/api/level"
-        self.cache = self.load_cache()
+        # Pass a cache (e.g. {}) to skip the disk read and merge_cache() later
+        self.cache = self.load_cache() if cache is None else cache
     
     def load_cache(self):
         """Load cache from file"""
-        try:
-            if os.path.exists(CACHE_FILE):
-                with open(CACHE_FILE, "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception as e:
-            from main import log
-            log("ERROR", f"Failed to load cache: {e}")
-        return {}
+        return load_json(CACHE_FILE, {})
+    
+    def merge_cache(self, loaded):
+        """Merge a cache loaded in the background, keeping newer entries"""
+        for level_id, entry in loaded.items():
+            self.cache.setdefault(level_id, entry)
+    
+    def reload_cache(self):
+        """Replace the in-memory cache with the file on disk"""
+        self.cache = self.load_cache()
     
     def save_cache(self):
-        """Save cache to file"""
-        try:
-            with open(CACHE_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.cache, f, indent=2)
-        except Exception as e:
-            from main import log
-            log("ERROR", f"Failed to save cache: {e}")
+        """Save cache to file (fsyncs are batched, entries can always be fetched again)"""
+        save_json(CACHE_FILE, self.cache, sync=False)
     
     def is_cache_valid(self, level_id):
         """Check if cached data is still valid"""
@@ -42,24 +42,39 @@ class GDIntegration:
         
         return datetime.now() - cached_time < CACHE_DURATION
     
-    def fetch_level(self, level_id):
-        """Fetch level data from GDBrowser API or cache"""
-        from main import log
+    def fetch_level(self, level_id, trace=None):
+        """Fetch level data from GDBrowser API or cache, noting cache use and HTTP time on trace"""
+        from metrics import get_metrics
+        import requests
+        
+        metrics = get_metrics()
         
         # Check cache first
         if self.is_cache_valid(level_id):
             log("INFO", f"Using cached data for level {level_id}")
+            if trace:
+                trace.cache = "hit"
             return self.cache[str(level_id)]["data"]
         
         # Fetch from API
+        if trace:
+            trace.cache = "miss"
         try:
-            response = requests.get(f"{self.api_url}/{level_id}", timeout=10)
+            started = time.perf_counter()
+            try:
+                response = requests.get(f"{self.api_url}/{level_id}", timeout=FETCH_TIMEOUT)
+            finally:
+                elapsed = time.perf_counter() - started
+                metrics.gd_request.observe(elapsed * 1000)
+                if trace:
+                    trace.add_stage("http", elapsed)
             
             if response.status_code == 200:
                 data = response.json()
                 
                 # Check if level exists (API returns -1 for non-existent levels)
                 if data == -1 or (isinstance(data, dict) and data.get("error")):
+                    metrics.inc("hwgdbot_gd_fetch_errors_total", {"kind": "not_found"})
                     log("WARNING", f"Level {level_id} not found")
                     return None
                 
@@ -71,18 +86,25 @@ class GDIntegration:
                     "data": level_data,
                     "cached_at": datetime.now().isoformat()
                 }
-                self.save_cache()
+                if trace:
+                    with trace.stage("cache_save"):
+                        self.save_cache()
+                else:
+                    self.save_cache()
                 
                 log("INFO", f"Fetched level {level_id} from API")
                 return level_data
             else:
+                metrics.inc("hwgdbot_gd_fetch_errors_total", {"kind": "status"})
                 log("ERROR", f"API returned status {response.status_code} for level {level_id}")
                 return None
         
         except requests.exceptions.Timeout:
+            metrics.inc("hwgdbot_gd_fetch_errors_total", {"kind": "timeout"})
             log("ERROR", f"Timeout fetching level {level_id}")
             return None
         except Exception as e:
+            metrics.inc("hwgdbot_gd_fetch_errors_total", {"kind": "error"})
             log("ERROR", f"Error fetching level {level_id}: {e}")
             return None
     
@@ -166,12 +188,13 @@ class GDIntegration:
             "likes": likes,
             "is_rated": is_rated,
             "is_disliked": is_disliked,
-            "is_large": is_large
+            "is_large": is_large,
+            "objects": objects,
+            "song_id": str(data.get("songID") or "")
         }
     
     def clear_cache(self):
         """Clear all cached data"""
         self.cache = {}
         self.save_cache()
-        from main import log
         log("INFO", "Cache cleared")
\ No newline at end of file
@@ -0,0 +1,154 @@
+import os
+import time
+import secrets
+from log_service import log
+from core import codec
+from core.storage import load_json, save_json, write_atomic
+
+PLAYED_VERSION = 2
+RETENTION_DAYS = 365  # History older than this is pruned on load
+DAY = 24 * 60 * 60
+COMPACT_AFTER = 200  # Journal lines before the snapshot is rewritten
+
+class PlayedHistory:
+    """Played levels indexed by ID with when and in which stream they were last played"""
+    def __init__(self, path):
+        self.path = path
+        # level_id -> [played_at, session, times_played], kept in order of last play (oldest first)
+        self.levels = {}
+        self.last_session = 0  # Newest session on disk
+        self.session = 1  # Every run of the bot is a new stream session
+        # Plays since the last snapshot are appended to a journal instead of rewriting the whole history
+        self.journal_path = os.path.splitext(path)[0] + ".jsonl"
+        self.journal_id = None  # Ties the journal to the snapshot it extends
+        self.journal_lines = 0
+        self.load()
+        self.session = self.last_session + 1
+    
+    def load(self):
+        """Load history from disk, migrating the old list format; the current session is kept"""
+        data = load_json(self.path, None)
+        self.levels = {}
+        self.last_session = 0
+        self.journal_id = None
+        
+        if isinstance(data, list):
+            # Old played.json: a bare list of IDs from the previous session
+            played_at = int(os.path.getmtime(self.path)) if os.path.exists(self.path) else int(time.time())
+            self.levels = {str(level_id): [played_at, 0, 1] for level_id in data}
+        elif isinstance(data, dict):
+            self.last_session = data.get("session", 0)
+            self.levels = {level_id: list(entry) for level_id, entry in
+                           sorted(data.get("levels", {}).items(), key=lambda item: item[1][0])}
+            self.journal_id = data.get("journal")
+        
+        self.replay_journal()
+        # The session only advances when the bot starts; a reload (e.g. after a restore) stays in this stream
+        self.session = max(self.session, self.last_session)
+        self.prune(RETENTION_DAYS)
+        # Fold the journal into a fresh snapshot
+        self.save()
+    
+    def replay_journal(self):
+        """Apply plays appended after the snapshot was written"""
+        try:
+            with open(self.journal_path, "rb") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return
+        
+        # A journal from another snapshot (e.g. before a restore) is already in it or doesn't belong to it
+        try:
+            header = codec.loads(lines[0]) if lines else {}
+        except ValueError:
+            header = {}
+        if not self.journal_id or not isinstance(header, dict) or header.get("journal") != self.journal_id:
+            return
+        
+        for line in lines[1:]:
+            try:
+                level_id, played_at, session, times_played = codec.loads(line)
+            except ValueError:
+                break  # Partial line from a crash
+            self.levels.pop(level_id, None)
+            self.levels[level_id] = [played_at, session, times_played]
+            self.last_session = max(self.last_session, session)
+    
+    def save(self):
+        """Write the whole history as a new snapshot and start an empty journal for it"""
+        self.journal_id = secrets.token_hex(8)
+        data = {"version": PLAYED_VERSION, "session": self.last_session, "levels": self.levels, "journal": self.journal_id}
+        if save_json(self.path, data):
+            try:
+                write_atomic(self.journal_path, codec.dumps({"journal": self.journal_id}) + b"\n")
+            except OSError as e:
+                log("ERROR", f"Failed to reset {self.journal_path}: {e}")
+            self.journal_lines = 0
+    
+    def append(self, level_id, entry):
+        """Append one play to the journal, compacting once it has grown"""
+        if self.journal_lines >= COMPACT_AFTER:
+            self.save()
+            return
+        try:
+            with open(self.journal_path, "ab") as f:
+                f.write(codec.dumps([level_id] + entry) + b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.journal_lines += 1
+        except OSError as e:
+            log("ERROR", f"Failed to append to {self.journal_path}: {e}")
+            self.save()
+    
+    def mark(self, level_id):
+        """Record a play now, in the current session"""
+        entry = self.levels.pop(level_id, None)
+        times_played = entry[2] + 1 if entry else 1
+        self.levels[level_id] = [int(time.time()), self.session, times_played]
+        self.last_session = self.session
+        self.append(level_id, self.levels[level_id])
+    
+    def was_played(self, level_id, streams=0, days=0):
+        """Check if a level was played within the last streams sessions or days; with neither, ever"""
+        entry = self.levels.get(level_id)
+        if entry is None:
+            return False
+        if not streams and not days:
+            return True
+        if streams and entry[1] > self.session - streams:
+            return True
+        return bool(days) and entry[0] >= time.time() - days * DAY
+    
+    def get_entry(self, level_id):
+        """Return {played_at, session, times_played} or None"""
+        entry = self.levels.get(level_id)
+        if entry is None:
+            return None
+        return {"played_at": entry[0], "session": entry[1], "times_played": entry[2]}
+    
+    def prune(self, max_age_days):
+        """Forget plays older than max_age_days, returning how many were dropped"""
+        cutoff = time.time() - max_age_days * DAY
+        expired = []
+        # Entries are ordered by last play, so stop at the first one that's recent enough
+        for level_id, entry in self.levels.items():
+            if entry[0] >= cutoff:
+                break
+            expired.append(level_id)
+        
+        for level_id in expired:
+            del self.levels[level_id]
+        if expired:
+            log("INFO", f"Pruned {len(expired)} levels from played history")
+        return len(expired)
+    
+    def clear(self):
+        """Forget every played level"""
+        self.levels = {}
+        self.save()
+    
+    def __contains__(self, level_id):
+        return level_id in self.levels
+    
+    def __len__(self):
+        return len(self.levels)
\ No newline at end of file
@@ -0,0 +1,179 @@
+import sys
+import time
+from datetime import datetime
+
+# Bits of QueuedLevel.flags
+RATED = 1
+DISLIKED = 2
+LARGE = 4
+FUCKED = 8
+
+class CodeTable:
+    """Maps a small set of repeated strings (difficulties, platforms...) to small ints"""
+    def __init__(self, values=()):
+        self.values = []
+        self.codes = {}
+        for value in values:
+            self.code(value)
+    
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+    
+    def value(self, code):
+        return self.values[code]
+
+DIFFICULTIES = CodeTable(["auto", "easy", "normal", "hard", "harder", "insane", "demon-easy", "demon-medium",
+                          "demon-hard", "demon-insane", "demon-extreme", "unrated", "demon"])
+LENGTHS = CodeTable(["tiny", "short", "medium", "long", "xl"])
+PLATFORMS = CodeTable(["twitch", "youtube", "api"])
+
+# Keys of the saved/served JSON format, in their original order
+FIELDS = ("level_id", "level_name", "author", "song", "difficulty", "difficultyFace", "length", "requester",
+          "platform", "timestamp", "attempts", "is_rated", "is_disliked", "is_large", "downloads", "likes",
+          "objects", "song_id", "is_fucked", "fucked_note")
+FIELD_SET = frozenset(FIELDS)
+
+def intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+class QueuedLevel:
+    """A queue entry: slotted, with interned names and int-coded enums, read like the old level dict"""
+    __slots__ = ("level_id", "level_name", "author", "song", "difficulty_code", "face_code", "length_code",
+                 "requester", "platform_code", "requester_key", "created", "attempts", "flags", "downloads",
+                 "likes", "objects", "song_id", "fucked_note", "extra")
+    
+    def __init__(self, level_id, level_name, author, song, difficulty, difficulty_face, length, requester,
+                 platform, created=None, attempts=0, is_rated=False, is_disliked=False, is_large=False,
+                 downloads=0, likes=0, objects=None, song_id=None, is_fucked=False, fucked_note=None, extra=None):
+        self.level_id = level_id
+        self.level_name = level_name
+        self.author = intern(author)
+        self.song = intern(song)
+        self.difficulty_code = DIFFICULTIES.code(difficulty)
+        self.face_code = DIFFICULTIES.code(difficulty_face)
+        self.length_code = LENGTHS.code(length)
+        self.requester = intern(requester)
+        self.platform_code = PLATFORMS.code(platform)
+        self.requester_key = sys.intern(f"{requester}@{platform}")
+        self.created = time.time() if created is None else created
+        self.attempts = attempts
+        self.flags = (RATED if is_rated else 0) | (DISLIKED if is_disliked else 0) | \
+            (LARGE if is_large else 0) | (FUCKED if is_fucked else 0)
+        self.downloads = downloads
+        self.likes = likes
+        self.objects = objects
+        self.song_id = song_id
+        self.fucked_note = fucked_note
+        self.extra = extra  # Unknown keys from newer files, kept so they survive a save
+    
+    @property
+    def difficulty(self):
+        return DIFFICULTIES.value(self.difficulty_code)
+    
+    @property
+    def difficultyFace(self):
+        return DIFFICULTIES.value(self.face_code)
+    
+    @property
+    def length(self):
+        return LENGTHS.value(self.length_code)
+    
+    @property
+    def platform(self):
+        return PLATFORMS.value(self.platform_code)
+    
+    @property
+    def timestamp(self):
+        return datetime.fromtimestamp(self.created).isoformat()
+    
+    @property
+    def is_rated(self):
+        return bool(self.flags & RATED)
+    
+    @property
+    def is_disliked(self):
+        return bool(self.flags & DISLIKED)
+    
+    @property
+    def is_large(self):
+        return bool(self.flags & LARGE)
+    
+    @property
+    def is_fucked(self):
+        return bool(self.flags & FUCKED)
+    
+    # Read access by the old dict keys, for templates, filters and the UI
+    def __getitem__(self, key):
+        if key in FIELD_SET:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+    
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def __contains__(self, key):
+        return key in FIELD_SET or bool(self.extra and key in self.extra)
+    
+    def keys(self):
+        return list(FIELDS) + list(self.extra or ())
+    
+    def to_dict(self):
+        """The saved/served JSON form"""
+        data = {key: getattr(self, key) for key in FIELDS}
+        if self.extra:
+            data.update(self.extra)
+        return data
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Build from the JSON form; missing optional keys get their defaults"""
+        # Loading a saved queue builds thousands of these, so the slots are filled directly instead of via __init__
+        level = object.__new__(cls)
+        get = data.get
+        requester = data["requester"]
+        platform = data["platform"]
+        difficulty = get("difficulty", "normal")
+        difficulty_face = get("difficultyFace", difficulty)
+        length = get("length", "medium")
+        
+        level.level_id = data["level_id"]
+        level.level_name = get("level_name", "Unknown")
+        level.author = intern(get("author", "Unknown"))
+        level.song = intern(get("song", "Unknown"))
+        code = DIFFICULTIES.codes.get(difficulty)
+        level.difficulty_code = DIFFICULTIES.code(difficulty) if code is None else code
+        code = DIFFICULTIES.codes.get(difficulty_face)
+        level.face_code = DIFFICULTIES.code(difficulty_face) if code is None else code
+        code = LENGTHS.codes.get(length)
+        level.length_code = LENGTHS.code(length) if code is None else code
+        code = PLATFORMS.codes.get(platform)
+        level.platform_code = PLATFORMS.code(platform) if code is None else code
+        level.requester = intern(requester)
+        level.requester_key = sys.intern(f"{requester}@{platform}")
+        try:
+            level.created = datetime.fromisoformat(data["timestamp"]).timestamp()
+        except (KeyError, TypeError, ValueError):
+            level.created = time.time()
+        level.attempts = get("attempts", 0)
+        level.flags = (RATED if get("is_rated") else 0) | (DISLIKED if get("is_disliked") else 0) | \
+            (LARGE if get("is_large") else 0) | (FUCKED if get("is_fucked") else 0)
+        level.downloads = get("downloads", 0)
+        level.likes = get("likes", 0)
+        level.objects = get("objects")
+        level.song_id = get("song_id")
+        level.fucked_note = get("fucked_note")
+        # Unknown keys from newer files, kept so they survive a save
+        level.extra = None if data.keys() <= FIELD_SET else {key: value for key, value in data.items() if key not in FIELD_SET}
+        return level
+    
+    def __repr__(self):
+        return f"QueuedLevel({self.level_id!r}, {self.level_name!r}, requester={self.requester_key!r})"
\ No newline at end of file
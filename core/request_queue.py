@@ -0,0 +1,425 @@
+import os
+from log_service import log
+from core.storage import DATA_DIR, load_json, save_json
+from core.filters import LevelFilter
+from core.gd_client import GDIntegration
+from core.played import PlayedHistory
+from core.queued_level import QueuedLevel
+
+class QueueObserver:
+    """Interface for objects that want to hear about queue changes"""
+    def on_queue_changed(self, revision):
+        """Called after every change with the new queue revision"""
+        pass
+
+def level_requester_key(level):
+    return level.requester_key
+
+class QueueCore:
+    """Request queue with all request checks; pure Python, reports changes to observers"""
+    def __init__(self, settings, automod=None, gd=None):
+        self.settings = settings
+        self.observers = []
+        self.queue = []
+        self.revision = 0  # Bumped on every queue change so readers can cache
+        self.accepting = True
+        self.gd = gd if gd is not None else GDIntegration()
+        self.automod = automod
+        self.requester_index = {}  # "requester@platform" -> that requester's levels in queue order
+        self.level_ids = {}  # level_id -> how many queued levels have it (only a hand-edited file has more than one)
+        self.level_filter = None  # Compiled from settings on first use and by update_filters()
+        
+        self.queue_path = os.path.join(DATA_DIR, "queue.json")
+        self.played_path = os.path.join(DATA_DIR, "played.json")
+        self.blacklist_requesters_path = os.path.join(DATA_DIR, "blacklist_requesters.json")
+        self.blacklist_creators_path = os.path.join(DATA_DIR, "blacklist_creators.json")
+        self.blacklist_ids_path = os.path.join(DATA_DIR, "blacklist_ids.json")
+        
+        self.played = PlayedHistory(self.played_path)
+        self.blacklist_requesters = self.load_json(self.blacklist_requesters_path, [])
+        self.blacklist_creators = self.load_json(self.blacklist_creators_path, [])
+        self.blacklist_ids = self.load_json(self.blacklist_ids_path, [])
+    
+    def load_json(self, path, default):
+        """Load JSON file or return default"""
+        return load_json(path, default)
+    
+    def save_json(self, path, data):
+        """Save data to JSON file"""
+        save_json(path, data)
+    
+    def read_queue_file(self):
+        """Read saved queue from disk as QueuedLevels (safe off the GUI thread)"""
+        queue = []
+        for data in self.load_json(self.queue_path, []):
+            try:
+                queue.append(QueuedLevel.from_dict(data))
+            except (KeyError, TypeError, AttributeError) as e:
+                log("WARNING", f"Skipping invalid queue entry: {e}")
+        return queue
+    
+    def load_queue(self, loaded=None):
+        """Load queue from file, or apply a queue already read in the background"""
+        if self.settings.get("load_queue_on_start", True):
+            if loaded is None:
+                loaded = self.read_queue_file()
+            
+            # Keep anything requested while the file was still loading
+            loaded_ids = {level.level_id for level in loaded}
+            self.set_queue(loaded + [level for level in self.queue if level.level_id not in loaded_ids])
+            self.notify_queue_changed()
+            log("INFO", f"Loaded {len(self.queue)} levels from queue")
+    
+    def save_queue(self):
+        """Save queue to file"""
+        if self.settings.get("save_queue_on_change", True):
+            self.save_json(self.queue_path, [level.to_dict() for level in self.queue])
+    
+    def load_played(self):
+        """Load played history"""
+        self.played.load()
+    
+    def save_played(self):
+        """Save played history"""
+        self.played.save()
+    
+    def reload_from_disk(self, filenames=None):
+        """Replace in-memory state with the data files on disk, e.g. after a restore; filenames limits it to those files"""
+        def restored(path):
+            return filenames is None or os.path.basename(path) in filenames
+        
+        if restored(self.blacklist_requesters_path):
+            self.blacklist_requesters = self.load_json(self.blacklist_requesters_path, [])
+        if restored(self.blacklist_creators_path):
+            self.blacklist_creators = self.load_json(self.blacklist_creators_path, [])
+        if restored(self.blacklist_ids_path):
+            self.blacklist_ids = self.load_json(self.blacklist_ids_path, [])
+        if restored(self.played_path):
+            self.load_played()
+        
+        if restored(self.queue_path):
+            self.set_queue(self.read_queue_file())
+            self.notify_queue_changed()
+            log("INFO", f"Reloaded {len(self.queue)} levels from queue")
+    
+    def set_queue(self, queue):
+        """Replace the whole queue and rebuild the requester and level ID indexes"""
+        self.queue = queue
+        self.requester_index = {}
+        self.level_ids = {}
+        for level in queue:
+            self.index_add(level)
+    
+    def index_add(self, level):
+        """Add a level appended to the queue to the indexes"""
+        self.requester_index.setdefault(level_requester_key(level), []).append(level)
+        self.level_ids[level.level_id] = self.level_ids.get(level.level_id, 0) + 1
+    
+    def index_remove(self, removed):
+        """Drop removed levels from the indexes"""
+        for level in removed:
+            key = level_requester_key(level)
+            levels = [entry for entry in self.requester_index.get(key, []) if entry is not level]
+            if levels:
+                self.requester_index[key] = levels
+            else:
+                self.requester_index.pop(key, None)
+            
+            count = self.level_ids.get(level.level_id, 0) - 1
+            if count > 0:
+                self.level_ids[level.level_id] = count
+            else:
+                self.level_ids.pop(level.level_id, None)
+    
+    def remove_where(self, predicate):
+        """Remove every level matching predicate, keeping the index in step; returns the removed levels"""
+        removed = [level for level in self.queue if predicate(level)]
+        if removed:
+            self.queue = [level for level in self.queue if not predicate(level)]
+            self.index_remove(removed)
+        return removed
+    
+    def get_submission_count(self, requester, platform):
+        """Number of levels a requester has in the queue"""
+        return len(self.requester_index.get(f"{requester}@{platform}", ()))
+    
+    def is_queued(self, level_id):
+        """Check if a level ID is in the queue"""
+        return level_id in self.level_ids
+    
+    def get_requester_levels(self, requester, platform):
+        """A requester's levels in queue order"""
+        return list(self.requester_index.get(f"{requester}@{platform}", ()))
+    
+    def add_observer(self, observer):
+        """Register a QueueObserver"""
+        if observer not in self.observers:
+            self.observers.append(observer)
+    
+    def remove_observer(self, observer):
+        """Unregister a QueueObserver"""
+        if observer in self.observers:
+            self.observers.remove(observer)
+    
+    def notify_queue_changed(self):
+        """Bump queue revision and notify observers"""
+        from metrics import get_metrics
+        
+        self.revision += 1
+        get_metrics().set_gauge("hwgdbot_queue_depth", len(self.queue))
+        for observer in list(self.observers):
+            observer.on_queue_changed(self.revision)
+    
+    def get_revision(self):
+        """Get current queue revision"""
+        return self.revision
+    
+    def is_accepting(self):
+        """Check if accepting new requests"""
+        return self.accepting
+    
+    def set_accepting(self, accepting):
+        """Set accepting state"""
+        self.accepting = accepting
+    
+    def get_queue(self):
+        """Get current queue"""
+        return self.queue
+    
+    def get_automod(self):
+        """Get the shared automod service, creating one if none was given"""
+        if self.automod is None:
+            from core.automod import AutomodService
+            self.automod = AutomodService(self.settings)
+        return self.automod
+    
+    def add_level(self, level_id, requester, platform):
+        """Add level to queue with all checks, recording the outcome and stage timings"""
+        from event_log import RequestTrace, get_event_log
+        from metrics import get_metrics
+        
+        trace = RequestTrace(level_id, requester, platform)
+        result = self.process_request(level_id, requester, platform, trace)
+        event = trace.finish(result)
+        get_event_log().record(event)
+        get_metrics().observe_request(event)
+        return result
+    
+    def process_request(self, level_id, requester, platform, trace):
+        """Run all checks and add the level; rejections carry a reason and a stable code"""
+        with trace.stage("precheck"):
+            # Check if level ID is already in queue
+            if self.is_queued(level_id):
+                return {"success": False, "code": "in_queue", "reason": "Level already in queue"}
+            
+            # Check if requester is blacklisted
+            requester_key = f"{requester}@{platform}"
+            if requester_key in self.blacklist_requesters:
+                return {"success": False, "code": "requester_blacklisted", "reason": "Requester is blacklisted"}
+            
+            # Check if level ID is blacklisted
+            if level_id in self.blacklist_ids:
+                return {"success": False, "code": "id_blacklisted", "reason": "Level ID is blacklisted"}
+            
+            # Check max submissions per user
+            max_ids = self.settings.get("max_ids_per_user", 0)
+            if max_ids > 0:
+                if self.get_submission_count(requester, platform) >= max_ids:
+                    return {"success": False, "code": "max_per_user", "reason": f"Max {max_ids} submissions per user reached"}
+        
+        # Check per-user cooldown (will be implemented in automod)
+        with trace.stage("cooldown"):
+            automod = self.get_automod()
+            cooldown_result = automod.check_user_cooldown(requester, platform)
+            if not cooldown_result["allowed"]:
+                return {"success": False, "code": "cooldown", "reason": cooldown_result.get("reason", "Cooldown active")}
+        
+        # Fetch level data from GDBrowser
+        with trace.stage("fetch"):
+            level_data = self.gd.fetch_level(level_id, trace)
+            if not level_data:
+                return {"success": False, "code": "fetch_failed", "reason": "Failed to fetch level data"}
+        
+        with trace.stage("postcheck"):
+            # Check if creator is blacklisted
+            if level_data["author"] in self.blacklist_creators:
+                return {"success": False, "code": "creator_blacklisted", "reason": "Creator is blacklisted"}
+            
+            # Check same level same user
+            if self.settings.get("block_same_level_same_user", True):
+                if any(level.level_id == level_id for level in self.requester_index.get(f"{requester}@{platform}", ())):
+                    return {"success": False, "code": "same_user", "reason": "You already requested this level"}
+            
+            # Check if played within the configured window (by default, this stream)
+            if self.settings.get("ignore_played", True):
+                if self.played.was_played(level_id, self.settings.get("played_window_streams", 1),
+                                          self.settings.get("played_window_days", 0)):
+                    return {"success": False, "code": "played", "reason": "Level was already played recently"}
+        
+        # Check fucked-out-list
+        is_fucked = False
+        fucked_note = None
+        if self.settings.get("reject_fucked_list", True):
+            with trace.stage("fucked_list"):
+                fucked_result = automod.check_fucked_list(level_id)
+                if fucked_result["is_fucked"]:
+                    is_fucked = True
+                    fucked_note = fucked_result.get("note", "Unknown reason")
+        
+        # Check filters
+        with trace.stage("filters"):
+            filter_result = self.check_filters(level_data)
+            if not filter_result["allowed"]:
+                return {"success": False, "code": filter_result.get("code", "filtered"), "reason": filter_result.get("reason", "Filtered out")}
+        
+        # Build level object
+        level = QueuedLevel(
+            level_id=level_id,
+            level_name=level_data["level_name"],
+            author=level_data["author"],
+            song=level_data["song"],
+            difficulty=level_data["difficulty"],
+            difficulty_face=level_data["difficultyFace"],
+            length=level_data["length"],
+            requester=requester,
+            platform=platform,
+            is_rated=level_data["is_rated"],
+            is_disliked=level_data["is_disliked"],
+            is_large=level_data["is_large"],
+            downloads=level_data.get("downloads", 0),
+            likes=level_data.get("likes", 0),
+            objects=level_data.get("objects"),
+            song_id=level_data.get("song_id"),
+            is_fucked=is_fucked,
+            fucked_note=fucked_note
+        )
+        
+        # Add to queue
+        self.queue.append(level)
+        self.index_add(level)
+        
+        # Save and notify
+        with trace.stage("save"):
+            self.save_queue()
+        with trace.stage("notify"):
+            self.notify_queue_changed()
+        
+        log("INFO", f"Added level {level_id} to queue")
+        
+        return {"success": True, "code": "ok"}
+    
+    def get_level_filter(self):
+        """The compiled filter for the current settings"""
+        if self.level_filter is None:
+            self.level_filter = LevelFilter(self.settings)
+        return self.level_filter
+    
+    def update_filters(self):
+        """Recompile filters after filter settings change"""
+        self.level_filter = LevelFilter(self.settings)
+    
+    def check_filters(self, level_data):
+        """Check if level passes filters"""
+        return self.get_level_filter().check(level_data)
+    
+    def preview_refilter(self):
+        """Queued levels the current filters and blacklists would remove, as [{level, code, reason}]"""
+        level_filter = self.get_level_filter()
+        blocked_requesters = set(self.blacklist_requesters)
+        blocked_ids = set(self.blacklist_ids)
+        blocked_creators = set(self.blacklist_creators)
+        
+        removals = []
+        for level in self.queue:
+            if level_requester_key(level) in blocked_requesters:
+                result = {"code": "requester_blacklisted", "reason": "Requester is blacklisted"}
+            elif level['level_id'] in blocked_ids:
+                result = {"code": "id_blacklisted", "reason": "Level ID is blacklisted"}
+            elif level['author'] in blocked_creators:
+                result = {"code": "creator_blacklisted", "reason": "Creator is blacklisted"}
+            else:
+                result = level_filter.check(level)
+                if result["allowed"]:
+                    continue
+            removals.append({"level": level, "code": result["code"], "reason": result["reason"]})
+        return removals
+    
+    def apply_refilter(self, removals=None):
+        """Remove levels failing the current filters or blacklists as one saved change, returning them"""
+        if removals is None:
+            removals = self.preview_refilter()
+        
+        # Match by identity so a stale preview never removes a level queued again since
+        doomed = {id(entry["level"]) for entry in removals}
+        removed = self.remove_where(lambda level: id(level) in doomed)
+        if removed:
+            self.save_queue()
+            self.notify_queue_changed()
+            log("INFO", f"Re-filter removed {len(removed)} levels from queue")
+        return removed
+    
+    def remove_level(self, level_id):
+        """Remove level from queue"""
+        self.remove_where(lambda level: level.level_id == level_id)
+        self.save_queue()
+        self.notify_queue_changed()
+    
+    def mark_as_played(self, level_id):
+        """Mark level as played and remove from queue"""
+        self.played.mark(level_id)
+        self.remove_level(level_id)
+    
+    def delete_last_from_requester(self, requester, platform):
+        """Delete last level from specific requester"""
+        # Find last level from this requester
+        levels = self.requester_index.get(f"{requester}@{platform}")
+        if not levels:
+            return False
+        
+        last = levels[-1]
+        self.remove_where(lambda level: level is last)
+        self.save_queue()
+        self.notify_queue_changed()
+        return True
+    
+    def ban_requester(self, requester, platform):
+        """Ban a requester"""
+        requester_key = f"{requester}@{platform}"
+        if requester_key not in self.blacklist_requesters:
+            self.blacklist_requesters.append(requester_key)
+            self.save_json(self.blacklist_requesters_path, self.blacklist_requesters)
+            
+            # Remove all levels from this requester
+            self.remove_where(lambda level: level['requester'] == requester and level['platform'] == platform)
+            self.save_queue()
+            self.notify_queue_changed()
+    
+    def ban_creator(self, creator):
+        """Ban a creator"""
+        if creator not in self.blacklist_creators:
+            self.blacklist_creators.append(creator)
+            self.save_json(self.blacklist_creators_path, self.blacklist_creators)
+            
+            # Remove all levels from this creator
+            self.remove_where(lambda level: level['author'] == creator)
+            self.save_queue()
+            self.notify_queue_changed()
+    
+    def ban_level_id(self, level_id):
+        """Ban a level ID"""
+        if level_id not in self.blacklist_ids:
+            self.blacklist_ids.append(level_id)
+            self.save_json(self.blacklist_ids_path, self.blacklist_ids)
+            
+            # Remove this level
+            self.remove_level(level_id)
+    
+    def clear_queue(self):
+        """Clear entire queue"""
+        self.set_queue([])
+        self.save_queue()
+        self.notify_queue_changed()
+    
+    def reset_played(self):
+        """Forget all played levels"""
+        self.played.clear()
\ No newline at end of file
@@ -0,0 +1,155 @@
+import os
+import time
+import threading
+from log_service import log
+from core import codec
+
+DATA_DIR = "data"
+BACKUP_SUFFIX = ".bak"
+TEMP_SUFFIX = ".tmp"
+RESTORE_SUFFIX = ".restore"  # Backup files staged next to the live ones before a restore swaps them in
+ROLLBACK_SUFFIX = ".pre-restore"  # Live files moved aside while a restore is swapped in
+SYNC_INTERVAL = 2.0  # Seconds between fsyncs of the same file when sync=False
+
+sync_lock = threading.Lock()
+last_sync = {}  # path -> monotonic time of its last fsync
+
+def should_sync(path, sync):
+    """Always fsync when asked to, otherwise at most once per SYNC_INTERVAL per file"""
+    if sync:
+        return True
+    now = time.monotonic()
+    with sync_lock:
+        if now - last_sync.get(path, 0) < SYNC_INTERVAL:
+            return False
+        last_sync[path] = now
+        return True
+
+def sync_dir(path):
+    """Flush a rename to disk; directories can't be opened for fsync on Windows"""
+    if os.name == "nt":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def write_atomic(path, data, sync=True, keep_backup=False):
+    """Replace path with data (bytes, str, or a function writing to the binary file) via temp file + fsync + rename"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    
+    temp_path = path + TEMP_SUFFIX
+    durable = should_sync(path, sync)
+    with open(temp_path, "wb") as f:
+        if callable(data):
+            data(f)
+        else:
+            f.write(data)
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
+    
+    # The previous version stays around as the fallback if the new one is ever lost
+    if keep_backup and os.path.exists(path):
+        os.replace(path, path + BACKUP_SUFFIX)
+    os.replace(temp_path, path)
+    if durable:
+        sync_dir(path)
+
+def read_json_file(path):
+    with open(path, "rb") as f:
+        return codec.load(f)
+
+def load_json(path, default):
+    """Load JSON file, falling back to its last good version, or return default"""
+    try:
+        if os.path.exists(path):
+            return read_json_file(path)
+    except Exception as e:
+        log("ERROR", f"Failed to load {path}: {e}")
+    
+    backup_path = path + BACKUP_SUFFIX
+    try:
+        if os.path.exists(backup_path):
+            data = read_json_file(backup_path)
+            log("WARNING", f"Recovered {path} from its last good version")
+            return data
+    except Exception as e:
+        log("ERROR", f"Failed to load {backup_path}: {e}")
+    return default
+
+def save_json(path, data, sync=True, pretty=False):
+    """Save data to JSON file atomically, keeping the previous version as .bak; pretty for files people edit"""
+    try:
+        write_atomic(path, lambda f: codec.dump(data, f, pretty), sync=sync, keep_backup=True)
+        return True
+    except Exception as e:
+        log("ERROR", f"Failed to save {path}: {e}")
+        return False
+
+def recover_data_files(data_dir=DATA_DIR):
+    """Startup check: drop half-written temp files and abandoned restores, restore damaged JSON files from .bak"""
+    if not os.path.isdir(data_dir):
+        return []
+    
+    recovered = []
+    for filename in os.listdir(data_dir):
+        path = os.path.join(data_dir, filename)
+        
+        if filename.endswith(TEMP_SUFFIX):
+            # A write that never reached its rename, the target is still intact
+            try:
+                os.remove(path)
+            except OSError as e:
+                log("WARNING", f"Failed to remove {path}: {e}")
+            continue
+        
+        if filename.endswith(RESTORE_SUFFIX):
+            # Staged by a restore that never got committed, the live files were not touched
+            try:
+                os.remove(path)
+            except OSError as e:
+                log("WARNING", f"Failed to remove {path}: {e}")
+            continue
+        
+        if filename.endswith(ROLLBACK_SUFFIX):
+            # A restore stopped while swapping files in: put back a live file it had moved aside
+            target = path[:-len(ROLLBACK_SUFFIX)]
+            try:
+                if os.path.exists(target):
+                    os.remove(path)
+                else:
+                    os.replace(path, target)
+                    recovered.append(os.path.basename(target))
+                    log("WARNING", f"{target} was missing after an interrupted restore, put back its previous version")
+            except OSError as e:
+                log("WARNING", f"Failed to recover {path}: {e}")
+            continue
+        
+        if not filename.endswith(".json" + BACKUP_SUFFIX):
+            continue
+        
+        target = path[:-len(BACKUP_SUFFIX)]
+        try:
+            read_json_file(target)
+            continue
+        except FileNotFoundError:
+            reason = "missing"
+        except Exception as e:
+            reason = f"damaged ({e})"
+        
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            codec.loads(data)
+        except Exception as e:
+            log("ERROR", f"{target} is {reason} and {path} is unusable: {e}")
+            continue
+        
+        write_atomic(target, data)
+        recovered.append(os.path.basename(target))
+        log("WARNING", f"{target} was {reason}, restored its last good version")
+    
+    return recovered
\ No newline at end of file
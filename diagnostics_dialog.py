@@ -0,0 +1,90 @@
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                             QTableWidget, QTableWidgetItem, QHeaderView)
+from PyQt6.QtCore import Qt, QTimer
+from metrics import get_metrics, DIAGNOSTICS_PATH
+
+COLUMNS = ["Stage", "Count", "Mean (ms)", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Max (ms)", "Total (ms)"]
+SNAPSHOT_KEYS = ["count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms", "sum_ms"]
+
+class DiagnosticsDialog(QDialog):
+    """Live view of add_level stage latency histograms"""
+    def __init__(self, endpoint_url=None, parent=None):
+        super().__init__(parent)
+        self.endpoint_url = endpoint_url
+        self.init_ui()
+        
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+    
+    def init_ui(self):
+        """Initialize the dialog UI"""
+        self.setWindowTitle("Diagnostics")
+        self.resize(700, 400)
+        
+        layout = QVBoxLayout()
+        
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+        
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+        
+        if self.endpoint_url:
+            endpoint_label = QLabel(f"JSON: {self.endpoint_url}{DIAGNOSTICS_PATH}")
+        else:
+            endpoint_label = QLabel("Enable the diagnostics endpoint in Settings > Advanced to read these over HTTP")
+        endpoint_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        layout.addWidget(endpoint_label)
+        
+        # Buttons
+        btn_layout = QHBoxLayout()
+        
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self.reset)
+        btn_layout.addWidget(reset_btn)
+        
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(close_btn)
+        
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+    
+    def showEvent(self, event):
+        """Refresh once a second while visible"""
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start(1000)
+    
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.refresh_timer.stop()
+    
+    def refresh(self):
+        """Reload histograms into the table"""
+        snapshot = get_metrics().get_snapshot()
+        total = snapshot["total"]
+        self.summary_label.setText(
+            f"Requests: {total['count']}    p50: {total['p50_ms']:.1f} ms    "
+            f"p95: {total['p95_ms']:.1f} ms    p99: {total['p99_ms']:.1f} ms"
+        )
+        
+        stages = snapshot["stages"]
+        self.table.setRowCount(len(stages))
+        for row, (name, stats) in enumerate(stages.items()):
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            for column, key in enumerate(SNAPSHOT_KEYS, start=1):
+                value = stats[key]
+                text = str(value) if key == "count" else f"{value:.3f}"
+                item = QTableWidgetItem(text)
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(row, column, item)
+    
+    def reset(self):
+        """Start the histograms shown here over (/metrics is not affected)"""
+        get_metrics().reset()
+        self.refresh()
\ No newline at end of file
@@ -0,0 +1,199 @@
+import os
+import sys
+import json
+import gzip
+import glob
+import math
+import time
+import argparse
+from collections import deque, Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from threading import Lock
+from log_service import LogService
+from core import codec
+
+DATA_DIR = "data"
+EVENT_LOG_FILE = os.path.join(DATA_DIR, "events.jsonl")
+RECENT_EVENTS = 500
+
+_event_log = None
+_event_log_lock = Lock()
+
+class RequestTrace:
+    """Timing and outcome of one level request as it moves through the checks"""
+    def __init__(self, level_id, requester, platform):
+        self.level_id = level_id
+        self.requester = requester
+        self.platform = platform
+        self.timestamp = datetime.now().isoformat(timespec="milliseconds")
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.cache = None  # "hit" or "miss" once level data was looked up
+    
+    @contextmanager
+    def stage(self, name):
+        """Time a block of work under a stage name"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - started)
+    
+    def add_stage(self, name, seconds):
+        """Add seconds to a stage (stages hit more than once accumulate)"""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds * 1000
+    
+    def finish(self, result):
+        """Build the event dict for an add_level result"""
+        return {
+            "ts": self.timestamp,
+            "platform": self.platform,
+            "requester": self.requester,
+            "level_id": self.level_id,
+            "outcome": "accepted" if result.get("success") else "rejected",
+            "code": result.get("code", "ok" if result.get("success") else "unknown"),
+            "reason": result.get("reason"),
+            "cache": self.cache,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "stages": {name: round(ms, 3) for name, ms in self.stages.items()}
+        }
+
+class EventLog(LogService):
+    """JSON-lines event stream sharing the log writer's batching and rotation"""
+    def __init__(self, path=EVENT_LOG_FILE, **kwargs):
+        super().__init__(path, **kwargs)
+        self.recent_events = deque(maxlen=RECENT_EVENTS)
+    
+    def record(self, event):
+        """Queue one event (safe from any thread)"""
+        self.recent_events.append(event)
+        
+        line = codec.dumps(event).decode("utf-8") + "\n"
+        if not self.running:
+            self.write_lines([line])
+            return
+        self.pending.put(line)
+    
+    def get_recent_events(self, count=None):
+        """Get recent events, newest last"""
+        events = list(self.recent_events)
+        return events[-count:] if count else events
+
+def get_event_log():
+    """Get the shared event log, creating it on first use"""
+    global _event_log
+    with _event_log_lock:
+        if _event_log is None:
+            import atexit
+            _event_log = EventLog()
+            atexit.register(_event_log.close)
+        return _event_log
+
+def read_events(path=EVENT_LOG_FILE):
+    """Yield events from the log and its rotated archives, oldest first"""
+    base, ext = os.path.splitext(path)
+    archives = glob.glob(f"{base}.*{ext}.gz")
+    # events.5.jsonl.gz is the oldest
+    archives.sort(key=lambda name: int(name[len(base) + 1:].split(".", 1)[0]), reverse=True)
+    
+    for name in archives + [path]:
+        if not os.path.exists(name):
+            continue
+        opener = gzip.open if name.endswith(".gz") else open
+        with opener(name, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield codec.loads(line)
+                except ValueError:
+                    continue  # Partial line from a crash
+
+def filter_events(events, outcome=None, code=None, platform=None, requester=None, since=None):
+    """Yield events matching every given field"""
+    for event in events:
+        if outcome and event.get("outcome") != outcome:
+            continue
+        if code and event.get("code") != code:
+            continue
+        if platform and event.get("platform") != platform:
+            continue
+        if requester and event.get("requester") != requester:
+            continue
+        if since and event.get("ts", "") < since:
+            continue
+        yield event
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return 0.0
+    index = max(0, math.ceil(fraction * len(values)) - 1)
+    return values[index]
+
+def summarize(events):
+    """Aggregate outcomes, reason codes, cache use and per-stage latency"""
+    outcomes = Counter()
+    codes = Counter()
+    cache = Counter()
+    stages = defaultdict(list)
+    totals = []
+    
+    for event in events:
+        outcomes[event.get("outcome")] += 1
+        codes[event.get("code")] += 1
+        if event.get("cache"):
+            cache[event["cache"]] += 1
+        totals.append(event.get("total_ms", 0.0))
+        for name, ms in event.get("stages", {}).items():
+            stages[name].append(ms)
+    
+    def describe(values):
+        values = sorted(values)
+        return {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 0.50), 3),
+            "p95_ms": round(percentile(values, 0.95), 3),
+            "p99_ms": round(percentile(values, 0.99), 3),
+            "max_ms": round(values[-1], 3) if values else 0.0,
+            "sum_ms": round(sum(values), 3)
+        }
+    
+    looked_up = cache["hit"] + cache["miss"]
+    return {
+        "events": len(totals),
+        "outcomes": dict(outcomes),
+        "codes": dict(codes.most_common()),
+        "cache_hit_ratio": round(cache["hit"] / looked_up, 3) if looked_up else None,
+        "total": describe(totals),
+        "stages": {name: describe(values) for name, values in
+                   sorted(stages.items(), key=lambda item: -sum(item[1]))}
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the request event log")
+    parser.add_argument("command", choices=["summary", "query"])
+    parser.add_argument("--file", default=EVENT_LOG_FILE)
+    parser.add_argument("--outcome", choices=["accepted", "rejected"])
+    parser.add_argument("--code")
+    parser.add_argument("--platform")
+    parser.add_argument("--requester")
+    parser.add_argument("--since", help="ISO timestamp, e.g. 2024-05-01 or 2024-05-01T20:00")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args(argv)
+    
+    events = filter_events(read_events(args.file), args.outcome, args.code, args.platform,
+                           args.requester, args.since)
+    
+    if args.command == "summary":
+        print(json.dumps(summarize(events), indent=2))
+    else:
+        matched = deque(events, maxlen=args.limit)
+        for event in matched:
+            print(json.dumps(event, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
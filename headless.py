@@ -0,0 +1,360 @@
+import sys
+import hmac
+import secrets
+import time
+import signal
+import argparse
+from concurrent.futures import Future, TimeoutError as CallTimeout
+from PyQt6.QtCore import QCoreApplication, QObject, QTimer, pyqtSignal
+from queue_manager import QueueManager
+from core.automod import AutomodService
+from core.gd_client import GDIntegration, FETCH_TIMEOUT
+from core import codec
+from overlay_server import acquire_server, release_server
+from log_service import log
+
+API_PREFIX = "/api"
+# Seconds an API call may wait for the event loop; /api/add can sit through a GD fetch's connect and read timeouts
+# behind other queued calls, and must not report failure for an add that then goes through
+CALL_TIMEOUT = 3 * FETCH_TIMEOUT
+
+class HeadlessBot(QObject):
+    """Chat ingestion, queue and overlay server on a QCoreApplication, controlled over HTTP/JSON"""
+    call_requested = pyqtSignal(object, object)  # func, Future
+    
+    def __init__(self, settings, youtube_url=None, token=None):
+        super().__init__()
+        self.settings = settings
+        self.youtube_url = youtube_url or settings.get("youtube_livestream_url", "")
+        self.token = token or settings.get("control_api_token", "") or self.create_token()
+        self.started_at = time.time()
+        
+        self.twitch_service = None
+        self.youtube_service = None
+        self.obs_overlay = None
+        self.server = None
+        self.backup_timer = None
+        self.backup_job = None
+        
+        # API handlers run on server threads; queue work is handed to the event loop
+        self.call_requested.connect(self.run_call)
+        
+        self.automod_service = AutomodService(settings)
+        self.queue_manager = QueueManager(settings, self.automod_service, GDIntegration())
+        self.queue_manager.queue_changed.connect(self.update_obs_overlay)
+        self.queue_manager.load_queue()
+        
+        self.routes = [
+            ("GET", "/status", self.api_status),
+            ("GET", "/queue", self.api_queue),
+            ("POST", "/accepting", self.api_accepting),
+            ("POST", "/add", self.api_add),
+            ("POST", "/remove", self.api_remove),
+            ("POST", "/played", self.api_played),
+            ("POST", "/next", self.api_next),
+            ("POST", "/clear", self.api_clear),
+            ("POST", "/ban", self.api_ban),
+            ("POST", "/refilter", self.api_refilter),
+            ("POST", "/reload", self.api_reload)
+        ]
+    
+    def start(self):
+        """Start chat services, the overlay and the control API"""
+        port = self.settings.get("obs_overlay_port", 6767)
+        self.server = acquire_server(port)
+        if not self.server:
+            return False
+        
+        for method, path, handler in self.routes:
+            self.server.add_route(API_PREFIX + path, lambda request, body, handler=handler: self.handle_api(request, body, handler),
+                                  method, pass_request=True, cors=False)
+        
+        if self.settings.get("diagnostics_endpoint_enabled", False):
+            from metrics import get_metrics
+            get_metrics().register_routes(self.server)
+        
+        self.start_overlay()
+        self.start_chat()
+        self.start_backup_timer()
+        
+        log("INFO", f"Headless mode running, control API at {self.server.get_url()}{API_PREFIX}")
+        return True
+    
+    def start_overlay(self):
+        if self.obs_overlay:
+            self.obs_overlay.close()
+            self.obs_overlay = None
+        
+        if self.settings.get("obs_overlay_enabled"):
+            from obs_overlay import OBSOverlay
+            self.obs_overlay = OBSOverlay(self.settings, allow_window=False)
+            self.update_obs_overlay()
+    
+    def update_obs_overlay(self):
+        if self.obs_overlay:
+            self.obs_overlay.update_queue(self.queue_manager.get_queue(), self.queue_manager.get_revision())
+    
+    def start_chat(self):
+        """Start whichever chat services are configured"""
+        if self.settings.get("twitch_token") and self.settings.get("twitch_username"):
+            from twitch_service import TwitchService
+            self.twitch_service = TwitchService(self.settings)
+            self.twitch_service.level_requested.connect(self.handle_level_request)
+            self.twitch_service.delete_requested.connect(self.handle_delete_request)
+            self.twitch_service.start()
+            log("INFO", "Twitch service started")
+        
+        if self.settings.get("youtube_enabled", False) and self.youtube_url:
+            from youtube_service import YouTubeService
+            self.youtube_service = YouTubeService(self.settings, self.youtube_url)
+            self.youtube_service.level_requested.connect(self.handle_level_request)
+            self.youtube_service.delete_requested.connect(self.handle_delete_request)
+            self.youtube_service.start()
+            log("INFO", "YouTube service started")
+    
+    def stop_chat(self):
+        if self.twitch_service:
+            self.twitch_service.stop()
+            self.twitch_service = None
+        if self.youtube_service:
+            self.youtube_service.stop()
+            self.youtube_service = None
+    
+    def start_backup_timer(self):
+        if self.backup_timer:
+            self.backup_timer.stop()
+            self.backup_timer = None
+        
+        if self.settings.get("backup_enabled", False):
+            self.backup_timer = QTimer(self)
+            self.backup_timer.timeout.connect(self.auto_backup)
+            self.backup_timer.start(self.settings.get("backup_interval", 10) * 60 * 1000)
+    
+    def auto_backup(self):
+        """Run a backup on a background thread unless the last one is still running"""
+        from backup_service import BackupJob
+        
+        if self.backup_job and self.backup_job.isRunning():
+            return
+        self.backup_job = BackupJob(parent=self)
+        self.backup_job.start()
+    
+    def stop(self):
+        """Stop everything and save the queue"""
+        self.stop_chat()
+        if self.backup_timer:
+            self.backup_timer.stop()
+        if self.backup_job:
+            self.backup_job.cancel()
+            self.backup_job.wait()
+        if self.obs_overlay:
+            self.obs_overlay.close()
+            self.obs_overlay = None
+        if self.server:
+            for method, path, _ in self.routes:
+                self.server.remove_route(API_PREFIX + path, method)
+            from metrics import get_metrics
+            get_metrics().unregister_routes(self.server)
+            release_server(self.server)
+            self.server = None
+        
+        self.queue_manager.save_queue()
+        log("INFO", "Headless mode stopped")
+    
+    def handle_level_request(self, level_id, requester, platform):
+        """Handle level request from chat"""
+        if not self.queue_manager.is_accepting():
+            log("INFO", f"Rejected request from {requester} (not accepting)")
+            return
+        
+        result = self.queue_manager.add_level(level_id, requester, platform)
+        if result["success"]:
+            log("INFO", f"Added level {level_id} from {requester} ({platform})")
+        else:
+            log("WARNING", f"Rejected level {level_id} from {requester}: {result.get('reason', 'Unknown')}")
+    
+    def handle_delete_request(self, requester, platform):
+        """Handle delete request from chat"""
+        if self.queue_manager.delete_last_from_requester(requester, platform):
+            log("INFO", f"Deleted last level from {requester} ({platform})")
+    
+    def run_call(self, func, future):
+        """Run an API call on the event loop thread"""
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func())
+        except Exception as e:
+            future.set_exception(e)
+    
+    def call_on_loop(self, func):
+        """Run func on the event loop and wait for its result (called from server threads)"""
+        future = Future()
+        self.call_requested.emit(func, future)
+        return future.result(timeout=CALL_TIMEOUT)
+    
+    def create_token(self):
+        """Generate the control API token on first run and keep it in settings.json"""
+        from config import save_settings
+        
+        token = secrets.token_urlsafe(32)
+        self.settings["control_api_token"] = token
+        save_settings(self.settings)
+        log("INFO", "Generated a control API token, see control_api_token in settings.json")
+        return token
+    
+    def is_authorized(self, request):
+        header = request.headers.get("Authorization", "")
+        return hmac.compare_digest(header, f"Bearer {self.token}")
+    
+    def handle_api(self, request, body, handler):
+        """Authorize, parse the JSON body and run a handler on the event loop"""
+        # Browsers send Origin on cross-site requests and can't POST JSON cross-site without a preflight,
+        # so any web page open in the streamer's browser is refused
+        if request.headers.get("Origin") is not None:
+            return json_response(403, {"error": "Cross-origin requests are not allowed"})
+        if request.command == "POST" and request.headers.get_content_type() != "application/json":
+            return json_response(415, {"error": "Content-Type must be application/json"})
+        if not self.is_authorized(request):
+            return json_response(401, {"error": "Unauthorized"})
+        
+        try:
+            data = codec.loads(body) if body else {}
+            if not isinstance(data, dict):
+                raise ValueError("Body must be a JSON object")
+        except ValueError as e:
+            return json_response(400, {"error": f"Invalid JSON: {e}"})
+        
+        try:
+            status, result = self.call_on_loop(lambda: handler(data))
+        except KeyError as e:
+            return json_response(400, {"error": f"Missing field {e}"})
+        except CallTimeout:
+            # The call is still queued or running and may yet succeed, so it must not look like a failure to retry
+            log("WARNING", f"Control API call to {request.path} is still running after {CALL_TIMEOUT}s")
+            return json_response(504, {"error": "Still running, check /api/queue before retrying"})
+        except Exception as e:
+            log("ERROR", f"Control API call failed: {e}")
+            return json_response(500, {"error": str(e)})
+        return json_response(status, result)
+    
+    def api_status(self, data):
+        return 200, {
+            "accepting": self.queue_manager.is_accepting(),
+            "queue_length": len(self.queue_manager.get_queue()),
+            "revision": self.queue_manager.get_revision(),
+            "twitch_connected": bool(self.twitch_service and self.twitch_service.is_connected()),
+            "youtube_connected": bool(self.youtube_service and self.youtube_service.is_connected()),
+            "overlay_enabled": self.obs_overlay is not None,
+            "uptime": int(time.time() - self.started_at)
+        }
+    
+    def api_queue(self, data):
+        return 200, {"revision": self.queue_manager.get_revision(), "queue": [level.to_dict() for level in self.queue_manager.get_queue()]}
+    
+    def api_accepting(self, data):
+        self.queue_manager.set_accepting(bool(data["accepting"]))
+        return 200, {"accepting": self.queue_manager.is_accepting()}
+    
+    def api_add(self, data):
+        result = self.queue_manager.add_level(str(data["level_id"]), data.get("requester", "api"), data.get("platform", "api"))
+        return (200 if result["success"] else 409), result
+    
+    def api_remove(self, data):
+        self.queue_manager.remove_level(str(data["level_id"]))
+        return 200, {"success": True}
+    
+    def api_played(self, data):
+        self.queue_manager.mark_as_played(str(data["level_id"]))
+        return 200, {"success": True}
+    
+    def api_next(self, data):
+        """Mark the current level played and return the next one"""
+        queue = self.queue_manager.get_queue()
+        if not queue:
+            return 404, {"success": False, "reason": "Queue is empty"}
+        self.queue_manager.mark_as_played(queue[0]["level_id"])
+        queue = self.queue_manager.get_queue()
+        return 200, {"success": True, "current": queue[0].to_dict() if queue else None}
+    
+    def api_clear(self, data):
+        self.queue_manager.clear_queue()
+        return 200, {"success": True}
+    
+    def api_ban(self, data):
+        if "level_id" in data:
+            self.queue_manager.ban_level_id(str(data["level_id"]))
+        elif "creator" in data:
+            self.queue_manager.ban_creator(data["creator"])
+        else:
+            self.queue_manager.ban_requester(data["requester"], data["platform"])
+        return 200, {"success": True}
+    
+    def api_refilter(self, data):
+        """Preview (default) or apply removal of queued levels failing the current filters and blacklists"""
+        removals = self.queue_manager.preview_refilter()
+        if data.get("apply", False):
+            self.queue_manager.apply_refilter(removals)
+        return 200, {
+            "applied": bool(data.get("apply", False)),
+            "removals": [{"level_id": entry["level"]["level_id"], "level_name": entry["level"]["level_name"],
+                          "requester": entry["level"]["requester"], "code": entry["code"], "reason": entry["reason"]}
+                         for entry in removals]
+        }
+    
+    def api_reload(self, data):
+        """Reload settings.json and restart chat and overlay"""
+        from config import load_settings
+        
+        self.settings.clear()
+        self.settings.update(load_settings())
+        self.automod_service.update_settings(self.settings)
+        self.queue_manager.update_filters()
+        self.stop_chat()
+        self.start_chat()
+        self.start_overlay()
+        self.start_backup_timer()
+        return 200, {"success": True}
+
+def json_response(status, data):
+    return status, "application/json", codec.dumps(data)
+
+def run(argv=None):
+    """Entry point for python headless.py / python main.py --headless"""
+    from config import VERSION, ensure_data_folder, load_settings
+    from log_service import get_log_service
+    
+    parser = argparse.ArgumentParser(description="Run HwGDBot without a GUI")
+    parser.add_argument("--headless", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--youtube-url", help="YouTube livestream URL (or youtube_livestream_url in settings)")
+    parser.add_argument("--token", help="Control API bearer token (or control_api_token in settings)")
+    args = parser.parse_args(argv)
+    
+    log("INFO", f"HwGDBot v{VERSION} starting headless")
+    ensure_data_folder()
+    settings = load_settings()
+    get_log_service().set_level(settings.get("log_level", "INFO"))
+    
+    app = QCoreApplication(sys.argv[:1])
+    app.setApplicationName("HwGDBot")
+    app.setApplicationVersion(VERSION)
+    
+    bot = HeadlessBot(settings, args.youtube_url, args.token)
+    if not bot.start():
+        print("Failed to start control API, see log.txt")
+        return 1
+    
+    # Qt's loop doesn't return to Python on its own, so wake it to let signal handlers run
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+    signal.signal(signal.SIGTERM, lambda *_: app.quit())
+    wake_timer = QTimer()
+    wake_timer.timeout.connect(lambda: None)
+    wake_timer.start(500)
+    
+    print(f"HwGDBot running headless, control API at {bot.server.get_url()}{API_PREFIX}")
+    code = app.exec()
+    bot.stop()
+    return code
+
+if __name__ == "__main__":
+    sys.exit(run())
\ No newline at end of file
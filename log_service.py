@@ -0,0 +1,181 @@
+import os
+import gzip
+import shutil
+import atexit
+from collections import deque
+from datetime import datetime
+from queue import SimpleQueue, Empty
+from threading import Thread, Lock, RLock, Event
+
+LEVELS = {
+    "DEBUG": 10,
+    "INFO": 20,
+    "WARNING": 30,
+    "ERROR": 40,
+    "CRITICAL": 50
+}
+
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+DEFAULT_RING_SIZE = 1000
+FLUSH_INTERVAL = 1.0  # Seconds between batched writes
+MAX_BATCH = 500
+
+_service = None
+_service_lock = Lock()
+
+class LogService:
+    """Queues log lines in memory and writes them to disk in batches on a background thread"""
+    def __init__(self, path, level="INFO", max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT,
+                 ring_size=DEFAULT_RING_SIZE):
+        self.path = path
+        self.level = LEVELS.get(level, LEVELS["INFO"])
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        
+        # Recent lines kept for the UI and diagnostics, oldest dropped first
+        self.recent = deque(maxlen=ring_size)
+        self.recent_lock = Lock()
+        
+        self.pending = SimpleQueue()
+        self.wake = Event()
+        self.write_lock = RLock()
+        self.dropped = 0
+        self.written = 0
+        self.running = True
+        
+        self.thread = Thread(target=self.run, name="log-writer", daemon=True)
+        self.thread.start()
+    
+    def set_level(self, level):
+        """Set minimum level written; lower levels are dropped before queueing"""
+        self.level = LEVELS.get(str(level).upper(), self.level)
+    
+    def get_level(self):
+        """Get minimum level name"""
+        for name, value in LEVELS.items():
+            if value == self.level:
+                return name
+        return "INFO"
+    
+    def log(self, level, message):
+        """Queue a log line (safe from any thread)"""
+        if LEVELS.get(level, LEVELS["INFO"]) < self.level:
+            return
+        
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        line = f"[{timestamp}] [{level}] {message}\n"
+        
+        with self.recent_lock:
+            self.recent.append((level, line))
+        
+        if not self.running:
+            # Writer is gone (shutdown), fall back to writing directly
+            self.write_lines([line])
+            return
+        
+        self.pending.put(line)
+        if level in ("ERROR", "CRITICAL"):
+            self.wake.set()
+    
+    def get_recent(self, count=None, level=None):
+        """Get recent lines, newest last, optionally filtered by minimum level"""
+        with self.recent_lock:
+            lines = list(self.recent)
+        if level:
+            minimum = LEVELS.get(level, 0)
+            lines = [entry for entry in lines if LEVELS.get(entry[0], 0) >= minimum]
+        lines = [line for _, line in lines]
+        return lines[-count:] if count else lines
+    
+    def run(self):
+        while self.running:
+            self.wake.wait(FLUSH_INTERVAL)
+            self.wake.clear()
+            self.drain()
+    
+    def drain(self):
+        """Write everything queued so far in one batch per MAX_BATCH lines"""
+        # Held across batches so a flush from another thread can't reorder lines
+        with self.write_lock:
+            while True:
+                batch = []
+                try:
+                    while len(batch) < MAX_BATCH:
+                        batch.append(self.pending.get_nowait())
+                except Empty:
+                    pass
+                
+                if batch:
+                    self.write_lines(batch)
+                if len(batch) < MAX_BATCH:
+                    return
+    
+    def write_lines(self, lines):
+        with self.write_lock:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(lines))
+                self.written += len(lines)
+                
+                if self.max_bytes and os.path.getsize(self.path) >= self.max_bytes:
+                    self.rotate()
+            except Exception as e:
+                self.dropped += len(lines)
+                print(f"Failed to write log: {e}")
+    
+    def rotate(self):
+        """Compress the current log to log.1.txt.gz, shifting older archives up"""
+        base, ext = os.path.splitext(self.path)
+        
+        def archive(index):
+            return f"{base}.{index}{ext}.gz"
+        
+        oldest = archive(self.backup_count)
+        if os.path.exists(oldest):
+            os.remove(oldest)
+        for index in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(archive(index)):
+                os.replace(archive(index), archive(index + 1))
+        
+        with open(self.path, "rb") as src:
+            with gzip.open(archive(1), "wb") as dst:
+                shutil.copyfileobj(src, dst)
+        
+        # Truncate rather than delete so tail -f style viewers keep working
+        open(self.path, "w").close()
+    
+    def flush(self):
+        """Write all queued lines now, on the calling thread"""
+        self.drain()
+    
+    def close(self):
+        """Stop the writer thread and flush remaining lines"""
+        if not self.running:
+            return
+        self.running = False
+        self.wake.set()
+        self.thread.join(timeout=2)
+        self.drain()
+    
+    def get_stats(self):
+        """Get writer counters"""
+        return {
+            "level": self.get_level(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "buffered": len(self.recent)
+        }
+
+def get_log_service(path="log.txt"):
+    """Get the shared log service, creating it on first use"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = LogService(path)
+            atexit.register(_service.close)
+        return _service
+
+def log(level, message):
+    """Log through the shared service; for modules that must not import main (and with it Qt)"""
+    get_log_service().log(level, message)
\ No newline at end of file
@@ -1,28 +1,19 @@
 import sys
 import os
-import json
 import traceback
 from datetime import datetime
 from PyQt6.QtWidgets import QApplication, QSplashScreen, QMessageBox, QDialog, QVBoxLayout, QLabel, QPushButton, QCheckBox
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QPixmap
-from main_window import MainWindow
-from notification_service import NotificationService
-from update_checker import UpdateChecker
+from startup import StartupOrchestrator
+from log_service import get_log_service
+from config import VERSION, DATA_DIR, ensure_data_folder, load_settings, save_settings
 
-VERSION = "1.0.0"
-DATA_DIR = "data"
 LOG_FILE = "log.txt"
 
 def log(level, message):
-    """Log message to log.txt with timestamp"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_line = f"[{timestamp}] [{level}] {message}\n"
-    try:
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(log_line)
-    except Exception as e:
-        print(f"Failed to write log: {e}")
+    """Log message to log.txt with timestamp (buffered, written by a background thread)"""
+    get_log_service(LOG_FILE).log(level, message)
 
 def exception_handler(exc_type, exc_value, exc_traceback):
     """Global exception handler for crash recovery"""
@@ -46,6 +37,9 @@ def exception_handler(exc_type, exc_value, exc_traceback):
     except Exception as e:
         log("ERROR", f"Failed to create crash backup: {e}")
     
+    # Make sure the crash is on disk before the dialog blocks (or the process dies)
+    get_log_service(LOG_FILE).flush()
+    
     # Show error dialog
     msg = QMessageBox()
     msg.setIcon(QMessageBox.Icon.Critical)
@@ -135,97 +129,12 @@ class DonationDialog(QDialog):
         import webbrowser
         webbrowser.open("https://malikhw.github.io/donate")
 
-def ensure_data_folder():
-    """Create data folder if it doesn't exist"""
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
-        log("INFO", "Created data folder")
-
-def load_settings():
-    """Load settings or create default"""
-    settings_path = os.path.join(DATA_DIR, "settings.json")
-    default_settings = {
-        "first_run": True,
-        "show_donation_popup": True,
-        "twitch_token": "",
-        "twitch_username": "",
-        "youtube_enabled": False,
-        "post_command": "!post",
-        "delete_command": "!del",
-        "max_ids_per_user": 0,
-        "per_user_cooldown": True,
-        "block_same_level_same_user": True,
-        "reject_fucked_list": True,
-        "ignore_played": True,
-        "length_filters": {
-            "tiny": True,
-            "short": True,
-            "medium": True,
-            "long": True,
-            "xl": True
-        },
-        "difficulty_filters": {
-            "auto": True,
-            "easy": True,
-            "normal": True,
-            "hard": True,
-            "harder": True,
-            "insane": True,
-            "demon-easy": True,
-            "demon-medium": True,
-            "demon-hard": True,
-            "demon-insane": True,
-            "demon-extreme": True
-        },
-        "block_disliked": False,
-        "rated_filter": "Any",
-        "block_large": False,
-        "save_queue_on_change": True,
-        "load_queue_on_start": True,
-        "obs_overlay_enabled": False,
-        "obs_overlay_window_enabled": False,
-        "obs_overlay_template": "{level} by {author} (ID: {id})",
-        "obs_overlay_font": "",
-        "obs_overlay_width": 800,
-        "obs_overlay_height": 100,
-        "obs_overlay_transparency": 100,
-        "sounds_enabled": False,
-        "sound_new_level": "",
-        "sound_error": "",
-        "backup_enabled": False,
-        "backup_interval": 10,
-        "streamer_name": ""
-    }
-    
-    try:
-        if os.path.exists(settings_path):
-            with open(settings_path, "r", encoding="utf-8") as f:
-                loaded = json.load(f)
-                # Merge with defaults to ensure all keys exist
-                for key in default_settings:
-                    if key not in loaded:
-                        loaded[key] = default_settings[key]
-                return loaded
-        else:
-            with open(settings_path, "w", encoding="utf-8") as f:
-                json.dump(default_settings, f, indent=2)
-            log("INFO", "Created default settings.json")
-            return default_settings
-    except Exception as e:
-        log("ERROR", f"Failed to load settings: {e}")
-        return default_settings
-
-def save_settings(settings):
-    """Save settings to file"""
-    settings_path = os.path.join(DATA_DIR, "settings.json")
-    try:
-        with open(settings_path, "w", encoding="utf-8") as f:
-            json.dump(settings, f, indent=2)
-        log("INFO", "Settings saved")
-    except Exception as e:
-        log("ERROR", f"Failed to save settings: {e}")
-
 def main():
+    # Run without widgets, controlled over the HTTP API
+    if "--headless" in sys.argv[1:]:
+        from headless import run
+        sys.exit(run(sys.argv[1:]))
+    
     # Set up global exception handler
     sys.excepthook = exception_handler
     
@@ -237,29 +146,43 @@ def main():
     
     # Load settings
     settings = load_settings()
+    get_log_service(LOG_FILE).set_level(settings.get("log_level", "INFO"))
     
     # Create application
     app = QApplication(sys.argv)
     app.setApplicationName("HwGDBot")
     app.setApplicationVersion(VERSION)
     
-    # Show splash screen
+    startup = StartupOrchestrator()
+    
+    # Show splash screen until the main window is built
+    splash = None
     if os.path.exists("icon.png"):
         splash_pix = QPixmap("icon.png")
         splash = QSplashScreen(splash_pix)
         splash.show()
         app.processEvents()
-        
-        # Keep splash for 1.5 seconds
-        QTimer.singleShot(1500, splash.close)
-        QTimer.singleShot(1500, lambda: show_main_app(app, settings))
-    else:
-        show_main_app(app, settings)
+    
+    QTimer.singleShot(0, lambda: show_main_app(app, settings, startup, splash))
     
     sys.exit(app.exec())
 
-def show_main_app(app, settings):
-    """Show main application after splash"""
+def show_main_app(app, settings, startup, splash=None):
+    """Build and show main application while background startup tasks run"""
+    startup.mark("event_loop")
+    
+    # Imported after the splash is up so its widgets and services don't delay the first paint
+    from main_window import MainWindow
+    from update_checker import UpdateChecker
+    startup.mark("main_window_imported")
+    
+    # Build main window (network and disk loading continue in the background)
+    main_window = MainWindow(settings, startup)
+    startup.mark("main_window_built")
+    
+    if splash:
+        splash.close()
+    
     # First run dialog
     if settings.get("first_run", True):
         first_run = FirstRunDialog()
@@ -277,17 +200,17 @@ def show_main_app(app, settings):
             save_settings(settings)
         log("INFO", "Donation dialog shown")
     
-    # Create and show main window
-    main_window = MainWindow(settings)
+    # Show main window
     main_window.show()
+    startup.mark("main_window_shown")
     
     # Animate settings button on first run (after donation dialog)
     if settings.get("first_run") is False and settings.get("show_donation_popup", True):
         QTimer.singleShot(500, main_window.animate_settings_button)
     
-    # Check for updates
+    # Check for updates in the background
     update_checker = UpdateChecker(VERSION)
-    update_checker.check_for_updates()
+    startup.add_task("update_check", update_checker.get_latest_version, update_checker.handle_latest_version)
     
     log("INFO", "Main window shown")
 
@@ -1,4 +1,5 @@
 import os
+import copy
 import json
 import webbrowser
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
@@ -6,20 +7,21 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QTextEdit, QMessageBox, QMenu, QSystemTrayIcon, QApplication)
 from PyQt6.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve
 from PyQt6.QtGui import QIcon, QPixmap, QAction
-from settings_window import SettingsWindow
 from queue_manager import QueueManager
 from twitch_service import TwitchService
 from youtube_service import YouTubeService
-from automod_service import AutomodService
-from obs_overlay import OBSOverlay
+from core.automod import AutomodService
 from notification_service import NotificationService
-from youtube_dialog import YouTubeDialog
-from backup_service import BackupService
+from core.gd_client import GDIntegration
+from core.filters import FILTER_SETTINGS
+
+REFILTER_PREVIEW_LINES = 10
 
 class MainWindow(QMainWindow):
-    def __init__(self, settings):
+    def __init__(self, settings, startup=None):
         super().__init__()
         self.settings = settings
+        self.startup = startup
         self.queue_manager = None
         self.twitch_service = None
         self.youtube_service = None
@@ -27,8 +29,14 @@ class MainWindow(QMainWindow):
         self.obs_overlay = None
         self.notification_service = None
         self.system_tray = None
-        self.backup_service = None
+        self.backup_job = None
         self.backup_timer = None
+        self.settings_window = None
+        self.diagnostics_dialog = None
+        self.diagnostics_server = None
+        self.youtube_pending = False
+        self.shown_levels = []  # Levels behind the queue list rows, in row order
+        self.loading_tasks = set()  # Startup tasks that must finish before chat requests are taken
         
         self.init_ui()
         self.init_services()
@@ -118,6 +126,11 @@ class MainWindow(QMainWindow):
         self.settings_btn.clicked.connect(self.open_settings)
         right_layout.addWidget(self.settings_btn)
         
+        # Diagnostics button
+        diagnostics_btn = QPushButton("Diagnostics")
+        diagnostics_btn.clicked.connect(self.open_diagnostics)
+        right_layout.addWidget(diagnostics_btn)
+        
         # Donate button
         donate_btn = QPushButton("Donate")
         donate_btn.setStyleSheet("background-color: #ff4444; color: white; font-weight: bold;")
@@ -138,50 +151,96 @@ class MainWindow(QMainWindow):
         """Initialize all services"""
         from main import log
         
+        startup = self.startup
+        
+        # Automod service (with a startup orchestrator, the download runs in the background)
+        self.automod_service = AutomodService(self.settings, download=startup is None)
+        
         # Queue manager
-        self.queue_manager = QueueManager(self.settings)
+        gd = GDIntegration(cache={} if startup else None)
+        self.queue_manager = QueueManager(self.settings, self.automod_service, gd)
         self.queue_manager.queue_changed.connect(self.update_queue_display)
-        self.queue_manager.load_queue()
         
-        # Automod service
-        self.automod_service = AutomodService(self.settings)
+        if startup:
+            startup.add_task("fucked_list", self.automod_service.download_fucked_list, self.automod_service.set_fucked_list)
+            startup.add_task("gd_cache", gd.load_cache, gd.merge_cache)
+            self.loading_tasks.add("gd_cache")
+            if self.settings.get("load_queue_on_start", True):
+                startup.add_task("queue", self.queue_manager.read_queue_file, self.queue_manager.load_queue)
+                self.loading_tasks.add("queue")
+            # Connected after the orchestrator's own slot, so this runs once the result is merged
+            startup.task_finished.connect(self.on_startup_task_finished)
+        else:
+            self.queue_manager.load_queue()
         
-        # Twitch service
-        if self.settings.get("twitch_token") and self.settings.get("twitch_username"):
-            self.twitch_service = TwitchService(self.settings)
-            self.twitch_service.level_requested.connect(self.handle_level_request)
-            self.twitch_service.delete_requested.connect(self.handle_delete_request)
-            self.twitch_service.connection_changed.connect(self.update_connection_status)
-            self.twitch_service.start()
-            log("INFO", "Twitch service started")
+        # YouTube service (asks for the URL once the main window is shown)
+        self.youtube_pending = self.settings.get("youtube_enabled", False)
         
-        # YouTube service
-        if self.settings.get("youtube_enabled"):
-            dialog = YouTubeDialog()
-            if dialog.exec():
-                url = dialog.get_url()
-                if url:
-                    self.youtube_service = YouTubeService(self.settings, url)
-                    self.youtube_service.level_requested.connect(self.handle_level_request)
-                    self.youtube_service.delete_requested.connect(self.handle_delete_request)
-                    self.youtube_service.connection_changed.connect(self.update_connection_status)
-                    self.youtube_service.start()
-                    log("INFO", "YouTube service started")
+        # Chat waits for the cache and queue files: a request saved before they're read would overwrite them
+        if not self.loading_tasks:
+            self.start_chat_services()
         
         # OBS overlay
+        self.queue_manager.queue_changed.connect(self.update_obs_overlay)
         if self.settings.get("obs_overlay_enabled"):
+            from obs_overlay import OBSOverlay
             self.obs_overlay = OBSOverlay(self.settings)
-            self.queue_manager.queue_changed.connect(self.update_obs_overlay)
+            self.update_obs_overlay()
             log("INFO", "OBS overlay started")
         
         # Notification service
         self.notification_service = NotificationService(self.settings)
         
-        # Backup service
-        self.backup_service = BackupService()
+        # Diagnostics endpoint
+        if self.settings.get("diagnostics_endpoint_enabled", False):
+            self.start_diagnostics_endpoint()
+        
+        # Backup service (created when the first backup runs)
         if self.settings.get("backup_enabled", False):
             self.start_backup_timer()
     
+    def on_startup_task_finished(self, name, result, error, duration):
+        """Start chat once the saved cache and queue are loaded (or failed to load)"""
+        if name in self.loading_tasks:
+            self.loading_tasks.discard(name)
+            if not self.loading_tasks:
+                self.start_chat_services()
+    
+    def start_chat_services(self):
+        """Start Twitch now and YouTube if the window is already shown"""
+        self.start_twitch_service()
+        if self.youtube_pending and self.isVisible():
+            self.youtube_pending = False
+            QTimer.singleShot(0, self.start_youtube_service)
+    
+    def start_twitch_service(self):
+        """Start the Twitch service if it is configured"""
+        from main import log
+        
+        if self.settings.get("twitch_token") and self.settings.get("twitch_username"):
+            self.twitch_service = TwitchService(self.settings)
+            self.twitch_service.level_requested.connect(self.handle_level_request)
+            self.twitch_service.delete_requested.connect(self.handle_delete_request)
+            self.twitch_service.connection_changed.connect(self.update_connection_status)
+            self.twitch_service.start()
+            log("INFO", "Twitch service started")
+    
+    def start_youtube_service(self):
+        """Ask for the livestream URL and start the YouTube service"""
+        from main import log
+        from youtube_dialog import YouTubeDialog
+        
+        dialog = YouTubeDialog()
+        if dialog.exec():
+            url = dialog.get_url()
+            if url:
+                self.youtube_service = YouTubeService(self.settings, url)
+                self.youtube_service.level_requested.connect(self.handle_level_request)
+                self.youtube_service.delete_requested.connect(self.handle_delete_request)
+                self.youtube_service.connection_changed.connect(self.update_connection_status)
+                self.youtube_service.start()
+                log("INFO", "YouTube service started")
+    
     def setup_system_tray(self):
         """Setup system tray icon"""
         if not QSystemTrayIcon.isSystemTrayAvailable():
@@ -221,6 +280,13 @@ class MainWindow(QMainWindow):
                 self.show()
                 self.activateWindow()
     
+    def showEvent(self, event):
+        """Start deferred services the first time the window is shown"""
+        super().showEvent(event)
+        if self.youtube_pending and not self.loading_tasks:
+            self.youtube_pending = False
+            QTimer.singleShot(0, self.start_youtube_service)
+    
     def closeEvent(self, event):
         """Handle window close event"""
         if self.system_tray and self.system_tray.isVisible():
@@ -230,6 +296,36 @@ class MainWindow(QMainWindow):
             self.quit_application()
             event.accept()
     
+    def start_diagnostics_endpoint(self):
+        """Serve /diagnostics and /metrics on the overlay port"""
+        from overlay_server import acquire_server
+        from metrics import get_metrics
+        
+        self.stop_diagnostics_endpoint()
+        self.diagnostics_server = acquire_server(self.settings.get("obs_overlay_port", 6767))
+        if self.diagnostics_server:
+            get_metrics().register_routes(self.diagnostics_server)
+    
+    def stop_diagnostics_endpoint(self):
+        """Stop serving /diagnostics and /metrics"""
+        from overlay_server import release_server
+        from metrics import get_metrics
+        
+        if self.diagnostics_server:
+            get_metrics().unregister_routes(self.diagnostics_server)
+            release_server(self.diagnostics_server)
+            self.diagnostics_server = None
+    
+    def open_diagnostics(self):
+        """Open diagnostics panel"""
+        from diagnostics_dialog import DiagnosticsDialog
+        
+        endpoint_url = self.diagnostics_server.get_url() if self.diagnostics_server else None
+        if self.diagnostics_dialog is None or self.diagnostics_dialog.endpoint_url != endpoint_url:
+            self.diagnostics_dialog = DiagnosticsDialog(endpoint_url, self)
+        self.diagnostics_dialog.show()
+        self.diagnostics_dialog.raise_()
+    
     def start_backup_timer(self):
         """Start automatic backup timer"""
         if self.backup_timer:
@@ -244,9 +340,14 @@ class MainWindow(QMainWindow):
         log("INFO", f"Backup timer started ({self.settings.get('backup_interval', 10)} minutes)")
     
     def auto_backup(self):
-        """Perform automatic backup"""
-        if self.backup_service:
-            self.backup_service.create_backup()
+        """Perform automatic backup on a background thread"""
+        from backup_service import BackupJob
+        
+        # Skip this tick if the last backup is still running
+        if self.backup_job and self.backup_job.isRunning():
+            return
+        self.backup_job = BackupJob(parent=self)
+        self.backup_job.start()
     
     def quit_application(self):
         """Clean shutdown"""
@@ -259,6 +360,10 @@ class MainWindow(QMainWindow):
             self.youtube_service.stop()
         if self.obs_overlay:
             self.obs_overlay.close()
+        self.stop_diagnostics_endpoint()
+        if self.backup_job:
+            self.backup_job.cancel()
+            self.backup_job.wait()
         
         # Save queue
         if self.queue_manager:
@@ -291,66 +396,96 @@ class MainWindow(QMainWindow):
         self.statusBar().showMessage(f"{self.get_connection_status()} - {status}")
     
     def update_queue_display(self):
-        """Update the queue list display"""
-        self.queue_list.clear()
-        
-        for level in self.queue_manager.get_queue():
-            item = QListWidgetItem()
-            
-            # Get difficulty icon
-            difficulty = level.get("difficulty", "auto")
-            if "demon" in difficulty:
-                icon_name = "demon.png"
-            elif difficulty == "unrated":
-                icon_name = "unrated.png"
+        """Update the queue list, only touching the rows that changed"""
+        queue = self.queue_manager.get_queue()
+        shown = self.shown_levels
+        
+        # Drop rows whose level left the queue; a reloaded copy of the same entry (after a restore) keeps its row
+        current = {level.level_id: level for level in queue}
+        for row in range(len(shown) - 1, -1, -1):
+            level = current.get(shown[row].level_id)
+            if level is None or (level is not shown[row] and level.to_dict() != shown[row].to_dict()):
+                self.queue_list.takeItem(row)
+                del shown[row]
+            elif level is not shown[row]:
+                self.queue_list.item(row).setData(Qt.ItemDataRole.UserRole, level)
+                shown[row] = level
+        
+        # Insert new levels and move reordered ones into place
+        for row, level in enumerate(queue):
+            if row < len(shown) and shown[row] is level:
+                continue
+            existing = next((index for index in range(row + 1, len(shown)) if shown[index] is level), None)
+            if existing is None:
+                item = self.create_queue_item(level)
             else:
-                icon_name = f"{difficulty}.png"
-            
-            icon_path = os.path.join("icons", icon_name)
-            if os.path.exists(icon_path):
-                item.setIcon(QIcon(icon_path))
-            
-            # Build display text
-            display_text = f"{level['level_name']} - {level['author']} ({level['requester']} - {level['level_id']})"
-            
-            # Add star for rated
-            if level.get("is_rated"):
-                display_text = "⭐ " + display_text
-            
-            # Add (+) for large
-            if level.get("is_large"):
-                display_text += " (+)"
-            
-            # Add WARNING for fucked levels
-            if level.get("is_fucked"):
-                display_text += " ⚠️ WARNING"
-            
-            item.setText(display_text)
-            
-            # Tooltip with full info
-            tooltip = f"ID: {level['level_id']}\n"
-            tooltip += f"Name: {level['level_name']}\n"
-            tooltip += f"Author: {level['author']}\n"
-            tooltip += f"Song: {level.get('song', 'N/A')}\n"
-            tooltip += f"Difficulty: {level['difficulty']}\n"
-            tooltip += f"Length: {level['length']}\n"
-            tooltip += f"Rated: {'Yes' if level.get('is_rated') else 'No'}\n"
-            tooltip += f"Large: {'Yes' if level.get('is_large') else 'No'}\n"
-            tooltip += f"Requester: {level['requester']} ({level['platform']})\n"
-            tooltip += f"Attempts: {level.get('attempts', 0)}"
-            
-            if level.get("is_fucked"):
-                tooltip += f"\n\n⚠️ WARNING: This level is flagged - don't play on stream!"
-                if level.get("fucked_note"):
-                    tooltip += f"\nReason: {level['fucked_note']}"
-            
-            item.setToolTip(tooltip)
-            item.setData(Qt.ItemDataRole.UserRole, level)
-            
-            self.queue_list.addItem(item)
+                item = self.queue_list.takeItem(existing)
+                del shown[existing]
+            self.queue_list.insertItem(row, item)
+            shown.insert(row, level)
+        
+        while len(shown) > len(queue):
+            self.queue_list.takeItem(len(shown) - 1)
+            shown.pop()
         
         self.update_button_states()
     
+    def create_queue_item(self, level):
+        """Build the list row for a queued level"""
+        item = QListWidgetItem()
+        
+        # Get difficulty icon
+        difficulty = level.get("difficulty", "auto")
+        if "demon" in difficulty:
+            icon_name = "demon.png"
+        elif difficulty == "unrated":
+            icon_name = "unrated.png"
+        else:
+            icon_name = f"{difficulty}.png"
+        
+        icon_path = os.path.join("icons", icon_name)
+        if os.path.exists(icon_path):
+            item.setIcon(QIcon(icon_path))
+        
+        # Build display text
+        display_text = f"{level['level_name']} - {level['author']} ({level['requester']} - {level['level_id']})"
+        
+        # Add star for rated
+        if level.get("is_rated"):
+            display_text = "⭐ " + display_text
+        
+        # Add (+) for large
+        if level.get("is_large"):
+            display_text += " (+)"
+        
+        # Add WARNING for fucked levels
+        if level.get("is_fucked"):
+            display_text += " ⚠️ WARNING"
+        
+        item.setText(display_text)
+        
+        # Tooltip with full info
+        tooltip = f"ID: {level['level_id']}\n"
+        tooltip += f"Name: {level['level_name']}\n"
+        tooltip += f"Author: {level['author']}\n"
+        tooltip += f"Song: {level.get('song', 'N/A')}\n"
+        tooltip += f"Difficulty: {level['difficulty']}\n"
+        tooltip += f"Length: {level['length']}\n"
+        tooltip += f"Rated: {'Yes' if level.get('is_rated') else 'No'}\n"
+        tooltip += f"Large: {'Yes' if level.get('is_large') else 'No'}\n"
+        tooltip += f"Requester: {level['requester']} ({level['platform']})\n"
+        tooltip += f"Attempts: {level.get('attempts', 0)}"
+        
+        if level.get("is_fucked"):
+            tooltip += f"\n\n⚠️ WARNING: This level is flagged - don't play on stream!"
+            if level.get("fucked_note"):
+                tooltip += f"\nReason: {level['fucked_note']}"
+        
+        item.setToolTip(tooltip)
+        item.setData(Qt.ItemDataRole.UserRole, level)
+        
+        return item
+    
     def on_queue_selection_changed(self, current, previous):
         """Handle queue selection change"""
         if current:
@@ -476,56 +611,129 @@ class MainWindow(QMainWindow):
     
     def open_settings(self):
         """Open settings window"""
-        settings_window = SettingsWindow(self.settings, self)
-        if settings_window.exec():
-            # Settings were changed, reload services
-            self.reload_services()
+        if self.settings_window is None:
+            from settings_window import SettingsWindow
+            self.settings_window = SettingsWindow(self.settings, self)
+            self.settings_window.data_restored.connect(self.apply_restore)
+        
+        previous = copy.deepcopy(self.settings)
+        if self.settings_window.exec():
+            # Settings were changed, reload only the affected services
+            changed = {key for key in set(previous) | set(self.settings)
+                       if previous.get(key) != self.settings.get(key)}
+            self.reload_services(changed)
     
-    def reload_services(self):
-        """Reload services after settings change"""
+    def reload_services(self, changed=None):
+        """Reload services after settings change; changed=None reloads everything"""
         from main import log, save_settings
         
+        def affected(*keys):
+            return changed is None or any(key in changed for key in keys)
+        
         # Save settings
         save_settings(self.settings)
         
-        # Restart Twitch service
-        if self.twitch_service:
-            self.twitch_service.stop()
-            self.twitch_service = None
+        # Restart Twitch service only if the connection changed
+        if affected("twitch_token", "twitch_username"):
+            if self.twitch_service:
+                self.twitch_service.stop()
+                self.twitch_service = None
+            
+            # Still loading: start_chat_services picks up the new settings
+            if not self.loading_tasks:
+                self.start_twitch_service()
+        elif affected("post_command", "delete_command") and self.twitch_service:
+            self.twitch_service.update_settings(self.settings)
         
-        if self.settings.get("twitch_token") and self.settings.get("twitch_username"):
-            self.twitch_service = TwitchService(self.settings)
-            self.twitch_service.level_requested.connect(self.handle_level_request)
-            self.twitch_service.delete_requested.connect(self.handle_delete_request)
-            self.twitch_service.connection_changed.connect(self.update_connection_status)
-            self.twitch_service.start()
-            log("INFO", "Twitch service restarted")
+        if affected("post_command", "delete_command") and self.youtube_service:
+            self.youtube_service.update_settings(self.settings)
         
         # Update automod
         self.automod_service.update_settings(self.settings)
         
+        # Recompile request filters and offer to apply them to the queue
+        if affected(*FILTER_SETTINGS):
+            self.queue_manager.update_filters()
+            self.refilter_queue()
+        
         # Update OBS overlay
-        if self.settings.get("obs_overlay_enabled"):
-            if not self.obs_overlay:
-                self.obs_overlay = OBSOverlay(self.settings)
-                self.queue_manager.queue_changed.connect(self.update_obs_overlay)
-            else:
-                self.obs_overlay.update_settings(self.settings)
-        elif self.obs_overlay:
-            self.obs_overlay.close()
-            self.obs_overlay = None
+        if changed is None or any(key.startswith("obs_") for key in changed):
+            if self.settings.get("obs_overlay_enabled"):
+                if not self.obs_overlay:
+                    from obs_overlay import OBSOverlay
+                    self.obs_overlay = OBSOverlay(self.settings)
+                    self.update_obs_overlay()
+                else:
+                    self.obs_overlay.update_settings(self.settings)
+            elif self.obs_overlay:
+                self.obs_overlay.close()
+                self.obs_overlay = None
         
         # Update notification service
         self.notification_service.update_settings(self.settings)
         
+        # Update diagnostics endpoint
+        if affected("diagnostics_endpoint_enabled", "obs_overlay_port"):
+            if self.settings.get("diagnostics_endpoint_enabled", False):
+                self.start_diagnostics_endpoint()
+            else:
+                self.stop_diagnostics_endpoint()
+        
+        # Update log level
+        if affected("log_level"):
+            from log_service import get_log_service
+            get_log_service().set_level(self.settings.get("log_level", "INFO"))
+        
         # Update backup timer
-        if self.settings.get("backup_enabled", False):
-            self.start_backup_timer()
-        elif self.backup_timer:
-            self.backup_timer.stop()
-            self.backup_timer = None
+        if affected("backup_enabled", "backup_interval"):
+            if self.settings.get("backup_enabled", False):
+                self.start_backup_timer()
+            elif self.backup_timer:
+                self.backup_timer.stop()
+                self.backup_timer = None
+        
+        log("INFO", f"Services reloaded ({'all' if changed is None else ', '.join(sorted(changed)) or 'no changes'})")
+    
+    def apply_restore(self, filenames):
+        """Reload restored data in place, keeping chat connections up"""
+        from main import log, load_settings
+        
+        if "settings.json" in filenames:
+            previous = copy.deepcopy(self.settings)
+            self.settings.clear()
+            self.settings.update(load_settings())
+            changed = {key for key in set(previous) | set(self.settings)
+                       if previous.get(key) != self.settings.get(key)}
+            if changed:
+                self.reload_services(changed)
+        
+        self.queue_manager.reload_from_disk(filenames)
+        if "cache.json" in filenames:
+            self.queue_manager.gd.reload_cache()
+        
+        self.statusBar().showMessage("Backup restored", 3000)
+        log("INFO", f"Restored data reloaded in place ({', '.join(sorted(filenames))})")
+    
+    def refilter_queue(self):
+        """Ask before removing queued levels that fail the current filters or blacklists"""
+        removals = self.queue_manager.preview_refilter()
+        if not removals:
+            return
+        
+        lines = [f"{entry['level']['level_name']} by {entry['level']['author']} - {entry['reason']}" for entry in removals[:REFILTER_PREVIEW_LINES]]
+        if len(removals) > REFILTER_PREVIEW_LINES:
+            lines.append(f"...and {len(removals) - REFILTER_PREVIEW_LINES} more")
+        
+        confirm = QMessageBox.question(
+            self,
+            "Re-filter Queue",
+            f"{len(removals)} queued levels don't pass the current filters:\n\n" + "\n".join(lines) + "\n\nRemove them?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
         
-        log("INFO", "Services reloaded")
+        if confirm == QMessageBox.StandardButton.Yes:
+            removed = self.queue_manager.apply_refilter(removals)
+            self.statusBar().showMessage(f"Removed {len(removed)} levels from queue", 3000)
     
     def open_donate(self):
         """Open donation page"""
@@ -569,9 +777,7 @@ class MainWindow(QMainWindow):
     def update_obs_overlay(self):
         """Update OBS overlay with current queue"""
         if self.obs_overlay:
-            queue = self.queue_manager.get_queue()
-            text = self.obs_overlay.format_text(queue)
-            self.obs_overlay.update_text(text)
+            self.obs_overlay.update_queue(self.queue_manager.get_queue(), self.queue_manager.get_revision())
     
     def get_connection_status(self):
         """Get current connection status text"""
@@ -0,0 +1,238 @@
+from bisect import bisect_left
+from threading import Lock
+from core import codec
+
+# Upper bounds in milliseconds, roughly 2.5x apart from 50 us to 30 s
+DEFAULT_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+DIAGNOSTICS_PATH = "/diagnostics"
+METRICS_PATH = "/metrics"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# name: (type, help) for everything exported on /metrics
+METRIC_INFO = {
+    "hwgdbot_requests_total": ("counter", "Level requests handled, by platform and outcome"),
+    "hwgdbot_rejections_total": ("counter", "Rejected level requests, by reason code"),
+    "hwgdbot_gd_cache_total": ("counter", "Level data lookups, by cache result"),
+    "hwgdbot_gd_fetch_errors_total": ("counter", "Failed GDBrowser requests, by kind"),
+    "hwgdbot_chat_commands_total": ("counter", "Chat commands received, by platform and command"),
+    "hwgdbot_queue_depth": ("gauge", "Levels currently in the queue"),
+    "hwgdbot_chat_connected": ("gauge", "1 if the chat service is connected, by platform"),
+    "hwgdbot_gd_request_seconds": ("histogram", "GDBrowser API request latency"),
+    "hwgdbot_request_seconds": ("histogram", "Total add_level latency"),
+    "hwgdbot_request_stage_seconds": ("histogram", "add_level latency per stage")
+}
+
+_metrics = None
+_metrics_lock = Lock()
+
+class Histogram:
+    """Fixed-bucket latency histogram; observing is O(log buckets) and never allocates"""
+    def __init__(self, buckets=DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.lock = Lock()
+        # Exported as Prometheus counters, so these are never reset
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.reset_window()
+    
+    def reset_window(self):
+        """Start a new window for percentiles and the snapshot, leaving the exported totals alone"""
+        with self.lock:
+            # Totals at the start of the window, subtracted from the live ones
+            self.window_counts = list(self.counts)
+            self.window_count = self.count
+            self.window_sum = self.sum
+            self.max = 0.0  # Largest value since the window started
+    
+    def get_window(self):
+        """Get bucket counts, count, sum and max since the window started"""
+        with self.lock:
+            counts = [count - start for count, start in zip(self.counts, self.window_counts)]
+            return counts, self.count - self.window_count, self.sum - self.window_sum, self.max
+    
+    def observe(self, value):
+        """Record one value in milliseconds"""
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+    
+    def percentile(self, fraction):
+        """Estimate a percentile in the current window by interpolating inside its bucket"""
+        counts, count, _, maximum = self.get_window()
+        
+        if not count:
+            return 0.0
+        
+        rank = fraction * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if not bucket_count or seen + bucket_count < rank:
+                seen += bucket_count
+                continue
+            lower = self.buckets[index - 1] if index > 0 else 0.0
+            upper = self.buckets[index] if index < len(self.buckets) else maximum
+            upper = min(upper, maximum)
+            return lower + (upper - lower) * (rank - seen) / bucket_count
+        return maximum
+    
+    def snapshot(self):
+        """Get count, mean and p50/p95/p99 in milliseconds for the current window"""
+        _, count, total, maximum = self.get_window()
+        return {
+            "count": count,
+            "mean_ms": round(total / count, 3) if count else 0.0,
+            "p50_ms": round(self.percentile(0.50), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "max_ms": round(maximum, 3),
+            "sum_ms": round(total, 3)
+        }
+    
+    def get_cumulative(self):
+        """Get [(upper bound ms, cumulative count)], count and sum since startup for exposition"""
+        with self.lock:
+            counts = list(self.counts)
+            count = self.count
+            total = self.sum
+        
+        cumulative = []
+        running = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return cumulative, count, total
+
+class Metrics:
+    """Per-stage latency histograms for the add_level pipeline, plus counters and gauges"""
+    def __init__(self):
+        self.lock = Lock()
+        self.stages = {}
+        self.total = Histogram()
+        self.gd_request = Histogram()
+        self.values = {}  # (name, labels) -> value, labels a sorted tuple of pairs
+    
+    def inc(self, name, labels=None, amount=1):
+        """Increment a counter (safe from any thread)"""
+        key = (name, tuple(sorted(labels.items())) if labels else ())
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+    
+    def set_gauge(self, name, value, labels=None):
+        """Set a gauge (safe from any thread)"""
+        key = (name, tuple(sorted(labels.items())) if labels else ())
+        with self.lock:
+            self.values[key] = value
+    
+    def get_stage(self, name):
+        """Get the histogram for a stage, creating it on first use"""
+        histogram = self.stages.get(name)
+        if histogram is None:
+            with self.lock:
+                histogram = self.stages.setdefault(name, Histogram())
+        return histogram
+    
+    def observe_request(self, event):
+        """Record the stage timings of one finished request event"""
+        for name, ms in event.get("stages", {}).items():
+            self.get_stage(name).observe(ms)
+        self.total.observe(event.get("total_ms", 0.0))
+        
+        self.inc("hwgdbot_requests_total", {"platform": event.get("platform"), "outcome": event.get("outcome")})
+        if event.get("outcome") == "rejected":
+            self.inc("hwgdbot_rejections_total", {"code": event.get("code")})
+        if event.get("cache"):
+            self.inc("hwgdbot_gd_cache_total", {"result": event["cache"]})
+    
+    def get_snapshot(self):
+        """Get all histograms, slowest stage (by total time) first"""
+        stages = {name: histogram.snapshot() for name, histogram in list(self.stages.items())}
+        return {
+            "total": self.total.snapshot(),
+            "stages": dict(sorted(stages.items(), key=lambda item: -item[1]["sum_ms"]))
+        }
+    
+    def reset(self):
+        """Start a new diagnostics window; /metrics keeps counting from startup, as Prometheus expects"""
+        for histogram in list(self.stages.values()):
+            histogram.reset_window()
+        self.total.reset_window()
+    
+    def render_prometheus(self):
+        """Render everything in the Prometheus text exposition format"""
+        with self.lock:
+            values = sorted(self.values.items())
+        
+        series = {}
+        for (name, labels), value in values:
+            series.setdefault(name, []).append(f"{name}{format_labels(labels)} {format_value(value)}")
+        
+        histograms = [("hwgdbot_gd_request_seconds", (), self.gd_request),
+                      ("hwgdbot_request_seconds", (), self.total)]
+        histograms += [("hwgdbot_request_stage_seconds", (("stage", name),), histogram)
+                       for name, histogram in sorted(self.stages.items())]
+        for name, labels, histogram in histograms:
+            cumulative, count, total = histogram.get_cumulative()
+            lines = series.setdefault(name, [])
+            for bound, bucket_count in cumulative:
+                le = "+Inf" if bound == float("inf") else format_value(bound / 1000)
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', le),))} {bucket_count}")
+            lines.append(f"{name}_sum{format_labels(labels)} {format_value(total / 1000)}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+        
+        out = []
+        for name, (kind, help_text) in METRIC_INFO.items():
+            if name not in series:
+                continue
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(series[name])
+        return "\n".join(out) + "\n"
+    
+    def serve_metrics(self):
+        """Overlay server route for Prometheus scrapes"""
+        return 200, PROMETHEUS_CONTENT_TYPE, self.render_prometheus()
+    
+    def serve_diagnostics(self):
+        """Overlay server route returning the snapshot as JSON"""
+        return 200, "application/json", codec.dumps(self.get_snapshot(), pretty=True)
+    
+    def register_routes(self, server):
+        """Expose diagnostics and Prometheus metrics on an overlay server"""
+        server.add_route(DIAGNOSTICS_PATH, self.serve_diagnostics)
+        server.add_route(METRICS_PATH, self.serve_metrics)
+    
+    def unregister_routes(self, server):
+        server.remove_route(DIAGNOSTICS_PATH)
+        server.remove_route(METRICS_PATH)
+
+def format_labels(labels):
+    """Format label pairs as {a="1",b="2"}"""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape_label(value)}"' for key, value in labels) + "}"
+
+def escape_label(value):
+    """Escape a label value for the exposition format"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_value(value):
+    """Format a sample value without a trailing .0 on whole numbers"""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+def get_metrics():
+    """Get the shared metrics registry"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+        return _metrics
\ No newline at end of file
@@ -1,8 +1,6 @@
 import os
 import platform
 from datetime import datetime, timedelta
-from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
-from PyQt6.QtCore import QUrl
 
 class NotificationService:
     def __init__(self, settings):
@@ -38,6 +36,10 @@ class NotificationService:
             return
         
         try:
+            # QtMultimedia is slow to load, so it is only imported once sounds are actually played
+            from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
+            from PyQt6.QtCore import QUrl
+            
             # Create player if needed
             if sound_type not in self.players:
                 self.players[sound_type] = QMediaPlayer()
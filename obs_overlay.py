@@ -1,40 +1,99 @@
 import os
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from threading import Thread
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QFont
+import secrets
+from overlay_server import acquire_server, release_server, CachedResponse
+from overlay_template import compile_template, CompiledTemplate, TemplateError
+from core import codec
+from log_service import log
+
+DEFAULT_PORT = 6767
+DEFAULT_TEMPLATE = "{level} by {author} (ID: {id})"
+EMPTY_TEXT = "No levels in queue"
+# Queue revisions restart at 0 every run, so ETags carry a per-process tag to never match an old cached copy
+ETAG_SESSION = secrets.token_hex(4)
+
+class OverlayEndpoint:
+    """A named browser source with its own page, data route and template"""
+    def __init__(self, name, path, template, style):
+        self.name = name
+        self.path = path
+        self.data_path = path.rstrip("/") + "/data"
+        self.template = template
+        self.style = style  # "classic" or "animated"
+        self.html_cache = None
+        self.data_cache = None
+        self.data_revision = None
 
 class OBSOverlay:
-    def __init__(self, settings):
+    """Overlay subsystem: one HTTP server for every browser source plus the desktop window"""
+    def __init__(self, settings, allow_window=True):
         self.settings = settings
+        self.allow_window = allow_window  # False when running without widgets (headless)
         self.window = None
         self.server = None
+        self.port = None
+        self.endpoints = []
+        self.snapshot = ([], 0)  # (queue, revision), swapped as one for server threads
         self.current_text = ""
         
         # Start HTTP server
+        self.build_endpoints()
         self.start_server()
         
         # Create window if enabled
-        if settings.get("obs_overlay_window_enabled", False):
+        if self.allow_window and settings.get("obs_overlay_window_enabled", False):
             self.create_window()
     
     def update_settings(self, settings):
         """Update settings"""
         self.settings = settings
         
+        # Re-register endpoints, moving to a new port if it changed
+        self.unregister_routes()
+        self.build_endpoints()
+        if self.port != settings.get("obs_overlay_port", DEFAULT_PORT):
+            self.stop_server()
+            self.start_server()
+        else:
+            self.register_routes()
+        
+        self.update_queue(*self.snapshot)
+        
         # Update window if exists
         if self.window:
             self.window.close()
             self.window = None
         
-        if settings.get("obs_overlay_window_enabled", False):
+        if self.allow_window and settings.get("obs_overlay_window_enabled", False):
             self.create_window()
             if self.current_text:
                 self.update_text(self.current_text)
     
+    def build_endpoints(self):
+        """Build endpoint list from settings"""
+        self.template = self.get_compiled(self.settings.get("obs_overlay_template", DEFAULT_TEMPLATE))
+        
+        self.endpoints = [
+            OverlayEndpoint("default", "/", self.template, "classic"),
+            OverlayEndpoint("web", "/web", self.template, "animated")
+        ]
+        
+        for name, endpoint_template in self.settings.get("obs_overlay_endpoints", {}).items():
+            self.endpoints.append(OverlayEndpoint(name, f"/overlay/{name}", self.get_compiled(endpoint_template), "animated"))
+    
+    def get_compiled(self, source):
+        """Compile a template, showing it verbatim if it is invalid"""
+        try:
+            return compile_template(source)
+        except TemplateError as e:
+            log("WARNING", f"Invalid overlay template {source!r}: {e}")
+            return CompiledTemplate(source, [("text", source)])
+    
     def create_window(self):
         """Create overlay window"""
+        from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
+        from PyQt6.QtCore import Qt
+        from PyQt6.QtGui import QFont
+        
         self.window = QWidget()
         self.window.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.WindowStaysOnTopHint)
         
@@ -73,37 +132,83 @@ class OBSOverlay:
         self.window.show()
     
     def start_server(self):
-        """Start HTTP server for OBS Browser Source"""
-        class OverlayHandler(BaseHTTPRequestHandler):
-            overlay_instance = None
-            
-            def do_GET(self):
-                self.send_response(200)
-                self.send_header("Content-type", "text/html")
-                self.end_headers()
-                
-                html = self.overlay_instance.generate_html()
-                self.wfile.write(html.encode())
-            
-            def log_message(self, format, *args):
-                pass  # Suppress log messages
-        
-        OverlayHandler.overlay_instance = self
+        """Start the shared overlay server and register every endpoint"""
+        self.port = self.settings.get("obs_overlay_port", DEFAULT_PORT)
+        self.server = acquire_server(self.port)
+        if self.server:
+            self.register_routes()
+    
+    def stop_server(self):
+        """Unregister endpoints and release the server"""
+        if self.server:
+            self.unregister_routes()
+            release_server(self.server)
+            self.server = None
+    
+    def register_routes(self):
+        """Register page and data routes for every endpoint"""
+        if not self.server:
+            return
         
-        try:
-            self.server = HTTPServer(("0.0.0.0", 6767), OverlayHandler)
-            thread = Thread(target=self.server.serve_forever, daemon=True)
-            thread.start()
-            
-            from main import log
-            log("INFO", "OBS overlay server started on port 6767")
-        except Exception as e:
-            from main import log
-            log("ERROR", f"Failed to start OBS overlay server: {e}")
-    
-    def generate_html(self):
-        """Generate HTML for browser source"""
-        template = self.settings.get("obs_overlay_template", "{level} by {author} (ID: {id})")
+        for endpoint in self.endpoints:
+            self.server.add_route(endpoint.path, lambda endpoint=endpoint: self.serve_html(endpoint))
+            self.server.add_route(endpoint.data_path, lambda endpoint=endpoint: self.serve_data(endpoint))
+    
+    def unregister_routes(self):
+        """Remove all endpoint routes from the server"""
+        if not self.server:
+            return
+        
+        for endpoint in self.endpoints:
+            self.server.remove_route(endpoint.path)
+            self.server.remove_route(endpoint.data_path)
+    
+    def get_urls(self):
+        """Get browser source URLs by endpoint name"""
+        if not self.server:
+            return {}
+        
+        base_url = self.server.get_url()
+        return {endpoint.name: base_url + endpoint.path for endpoint in self.endpoints}
+    
+    def serve_html(self, endpoint):
+        """Serve an endpoint page, rendered once per settings change"""
+        cached = endpoint.html_cache
+        if cached is None:
+            if endpoint.style == "classic":
+                html = self.generate_html(endpoint)
+            else:
+                html = self.generate_web_html(endpoint)
+            cached = CachedResponse("text/html; charset=utf-8", html)
+            endpoint.html_cache = cached
+        return cached
+    
+    def serve_data(self, endpoint):
+        """Serve endpoint text and queue data, serialized once per queue revision"""
+        queue, revision = self.snapshot
+        cached = endpoint.data_cache
+        if cached is None or endpoint.data_revision != revision:
+            data = self.get_queue_data(queue, endpoint.template)
+            cached = CachedResponse("application/json", codec.dumps(data), etag=f'"q{ETAG_SESSION}-{revision}"')
+            endpoint.data_cache = cached
+            endpoint.data_revision = revision
+        return cached
+    
+    def get_queue_data(self, queue, template):
+        """Get queue data with text rendered for a template"""
+        if not queue:
+            return {"empty": True, "text": EMPTY_TEXT, "total": 0}
+        
+        return {
+            "empty": False,
+            "text": self.format_text(queue, template),
+            "current": queue[0].to_dict(),
+            "next": queue[1].to_dict() if len(queue) > 1 else None,
+            "total": len(queue)
+        }
+    
+    def generate_html(self, endpoint):
+        """Generate HTML for the classic browser source"""
         font_path = self.settings.get("obs_overlay_font", "")
         width = self.settings.get("obs_overlay_width", 800)
         height = self.settings.get("obs_overlay_height", 100)
@@ -151,18 +256,18 @@ class OBSOverlay:
             </style>
         </head>
         <body>
-            <div id="overlay">{self.current_text}</div>
+            <div id="overlay"></div>
             <script>
-                setInterval(() => {{
-                    fetch('/').then(r => r.text()).then(html => {{
-                        const parser = new DOMParser();
-                        const doc = parser.parseFromString(html, 'text/html');
-                        const newText = doc.getElementById('overlay').innerHTML;
-                        if (newText !== document.getElementById('overlay').innerHTML) {{
-                            document.getElementById('overlay').innerHTML = newText;
+                function updateOverlay() {{
+                    fetch('{endpoint.data_path}').then(r => r.json()).then(data => {{
+                        const el = document.getElementById('overlay');
+                        if (data.text !== el.textContent) {{
+                            el.textContent = data.text;
                         }}
                     }});
-                }}, 1000);
+                }}
+                updateOverlay();
+                setInterval(updateOverlay, 1000);
             </script>
         </body>
         </html>
@@ -170,43 +275,161 @@ class OBSOverlay:
         
         return html
     
-    def update_overlay(self):
-        """Update overlay with current queue"""
-        from queue_manager import QueueManager
+    def generate_web_html(self, endpoint):
+        """Generate HTML for the animated browser source"""
+        font_size = self.settings.get('obs_font_size', 32)
+        font_color = self.settings.get('obs_font_color', '#FFFFFF')
+        font_family = self.settings.get('obs_font_family', 'Arial, sans-serif')
+        text_shadow = self.settings.get('obs_text_shadow', True)
+        text_align = self.settings.get('obs_text_align', 'center')
+        animation = self.settings.get('obs_animation', 'fade')
         
-        # Get parent to access queue manager
-        # This will be connected via signal, so we'll receive queue directly
-        pass
+        html = f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>HwGDBot OBS Overlay</title>
+    <style>
+        * {{
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }}
+
+        body {{
+            background: transparent;
+            font-family: {font_family};
+            overflow: hidden;
+        }}
+
+        #overlay {{
+            width: 100vw;
+            height: 100vh;
+            display: flex;
+            align-items: center;
+            justify-content: {text_align};
+            padding: 20px;
+        }}
+
+        #text {{
+            font-size: {font_size}px;
+            color: {font_color};
+            font-weight: bold;
+            text-align: {text_align};
+            max-width: 90%;
+            word-wrap: break-word;
+            {'text-shadow: 2px 2px 4px rgba(0,0,0,0.8), -1px -1px 2px rgba(0,0,0,0.8);' if text_shadow else ''}
+            opacity: 0;
+            transition: opacity 0.5s ease-in-out;
+        }}
+
+        #text.visible {{
+            opacity: 1;
+        }}
+
+        #text.fade {{
+            animation: fadeIn 0.5s ease-in-out forwards;
+        }}
+
+        #text.slide {{
+            animation: slideIn 0.5s ease-out forwards;
+        }}
+
+        #text.bounce {{
+            animation: bounceIn 0.6s ease-out forwards;
+        }}
+
+        @keyframes fadeIn {{
+            from {{ opacity: 0; }}
+            to {{ opacity: 1; }}
+        }}
+
+        @keyframes slideIn {{
+            from {{
+                opacity: 0;
+                transform: translateX(-50px);
+            }}
+            to {{
+                opacity: 1;
+                transform: translateX(0);
+            }}
+        }}
+
+        @keyframes bounceIn {{
+            0% {{
+                opacity: 0;
+                transform: scale(0.3);
+            }}
+            50% {{
+                transform: scale(1.05);
+            }}
+            70% {{
+                transform: scale(0.9);
+            }}
+            100% {{
+                opacity: 1;
+                transform: scale(1);
+            }}
+        }}
+    </style>
+</head>
+<body>
+    <div id="overlay">
+        <div id="text">Loading...</div>
+    </div>
+
+    <script>
+        const animation = '{animation}';
+        let lastText = null;
+
+        function updateOverlay() {{
+            fetch('{endpoint.data_path}')
+                .then(res => res.json())
+                .then(data => {{
+                    const textEl = document.getElementById('text');
+
+                    if (lastText !== null && data.text !== lastText) {{
+                        // Animate change
+                        textEl.classList.remove('visible', animation);
+                        setTimeout(() => {{
+                            textEl.textContent = data.text;
+                            textEl.classList.add('visible', animation);
+                        }}, 100);
+                    }} else {{
+                        textEl.textContent = data.text;
+                        textEl.classList.add('visible');
+                    }}
+
+                    lastText = data.text;
+                }})
+                .catch(err => {{
+                    console.error('Failed to fetch data:', err);
+                }});
+        }}
+
+        // Update every 2 seconds
+        updateOverlay();
+        setInterval(updateOverlay, 2000);
+    </script>
+</body>
+</html>'''
+        return html
+    
+    def update_queue(self, queue, revision):
+        """Update overlay with current queue"""
+        self.snapshot = (list(queue), revision)
+        self.update_text(self.format_text(queue))
     
-    def format_text(self, queue):
+    def format_text(self, queue, template=None):
         """Format text from queue"""
         if not queue:
-            return "No levels in queue"
+            return EMPTY_TEXT
         
-        template = self.settings.get("obs_overlay_template", "{level} by {author} (ID: {id})")
+        if template is None:
+            template = self.template
         
-        current = queue[0] if len(queue) > 0 else None
-        next_level = queue[1] if len(queue) > 1 else None
-        
-        text = template
-        
-        if current:
-            text = text.replace("{level}", current.get("level_name", "Unknown"))
-            text = text.replace("{author}", current.get("author", "Unknown"))
-            text = text.replace("{id}", str(current.get("level_id", "0")))
-        else:
-            text = text.replace("{level}", "N/A")
-            text = text.replace("{author}", "N/A")
-            text = text.replace("{id}", "N/A")
-        
-        if next_level:
-            text = text.replace("{next-level}", next_level.get("level_name", "Unknown"))
-            text = text.replace("{next-author}", next_level.get("author", "Unknown"))
-        else:
-            text = text.replace("{next-level}", "N/A")
-            text = text.replace("{next-author}", "N/A")
-        
-        return text
+        return template.render(queue, self.settings.get("obs_overlay_minutes_per_level", 5))
     
     def update_text(self, text):
         """Update displayed text"""
@@ -220,5 +443,4 @@ class OBSOverlay:
         if self.window:
             self.window.close()
         
-        if self.server:
-            self.server.shutdown()
\ No newline at end of file
+        self.stop_server()
\ No newline at end of file
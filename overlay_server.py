@@ -0,0 +1,262 @@
+import gzip
+import hashlib
+import socket
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread, Lock
+from log_service import log
+
+DEFAULT_HOST = "0.0.0.0"
+MIN_GZIP_SIZE = 512
+MAX_BODY_SIZE = 64 * 1024
+
+_servers = {}
+_servers_lock = Lock()
+
+class CachedResponse:
+    """Pre-encoded response body with an ETag and a lazily gzipped copy"""
+    def __init__(self, content_type, body, etag=None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        
+        self.content_type = content_type
+        self.body = body
+        self.etag = etag or f'"{hashlib.sha1(body).hexdigest()}"'
+        self.gzipped = None
+    
+    def get_gzipped(self):
+        """Get the gzip-compressed body, compressing on first use"""
+        if self.gzipped is None:
+            self.gzipped = gzip.compress(self.body, compresslevel=6)
+        return self.gzipped
+
+class OverlayHTTPServer(ThreadingHTTPServer):
+    """Threaded HTTP server that counts connections"""
+    daemon_threads = True
+    allow_reuse_address = True
+    
+    def __init__(self, address, handler_class, overlay_server):
+        self.overlay_server = overlay_server
+        super().__init__(address, handler_class)
+    
+    def process_request_thread(self, request, client_address):
+        """Handle one connection on its own thread while tracking counts"""
+        self.overlay_server.connection_opened()
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self.overlay_server.connection_closed()
+
+class OverlayRequestHandler(BaseHTTPRequestHandler):
+    # Drop clients that stop sending instead of holding a thread forever
+    timeout = 30
+    
+    def log_message(self, format, *args):
+        pass  # Suppress server logs
+    
+    def do_GET(self):
+        self.server.overlay_server.handle(self)
+    
+    def do_POST(self):
+        self.server.overlay_server.handle(self, "POST")
+
+class OverlayServer:
+    """One HTTP server shared by every overlay browser source on a port"""
+    def __init__(self, port, host=DEFAULT_HOST):
+        self.host = host
+        self.port = port
+        self.server = None
+        self.thread = None
+        self.routes = {}
+        self.users = 0
+        
+        self.stats_lock = Lock()
+        self.active_connections = 0
+        self.peak_connections = 0
+        self.total_connections = 0
+        self.total_requests = 0
+        self.not_modified = 0
+    
+    def start(self):
+        """Start serving on a background thread"""
+        if self.server:
+            return True
+        
+        try:
+            self.server = OverlayHTTPServer((self.host, self.port), OverlayRequestHandler, self)
+            self.thread = Thread(target=self.server.serve_forever, daemon=True)
+            self.thread.start()
+            log("INFO", f"Overlay server started on port {self.port}")
+            return True
+        except Exception as e:
+            self.server = None
+            log("ERROR", f"Failed to start overlay server on port {self.port}: {e}")
+            return False
+    
+    def stop(self):
+        """Stop serving and close the socket"""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            self.thread = None
+    
+    def is_running(self):
+        """Check if server is running"""
+        return self.server is not None
+    
+    def add_route(self, path, callback, method="GET", pass_request=False, cors=True):
+        """Register a handler returning a CachedResponse or (status, content_type, body); pass_request calls callback(request, body)"""
+        # cors=False leaves out Access-Control-Allow-Origin so other web pages can't read the responses
+        self.routes[(method, path)] = (callback, pass_request, cors)
+    
+    def remove_route(self, path, method="GET"):
+        """Unregister a handler"""
+        self.routes.pop((method, path), None)
+    
+    def handle(self, request, method="GET"):
+        """Dispatch a request to its route"""
+        with self.stats_lock:
+            self.total_requests += 1
+        
+        path = request.path.split("?", 1)[0]
+        route = self.routes.get((method, path))
+        
+        if route is None:
+            known = any(route_path == path for _, route_path in list(self.routes))
+            request.send_response(405 if known else 404)
+            request.end_headers()
+            return
+        
+        callback, pass_request, cors = route
+        
+        body = b""
+        if method == "POST":
+            try:
+                length = int(request.headers.get("Content-Length", 0))
+            except ValueError:
+                length = -1
+            if length < 0 or length > MAX_BODY_SIZE:
+                request.send_response(413)
+                request.end_headers()
+                return
+            body = request.rfile.read(length)
+        
+        try:
+            response = callback(request, body) if pass_request else callback()
+        except Exception as e:
+            log("ERROR", f"Overlay route {path} failed: {e}")
+            request.send_response(500)
+            request.end_headers()
+            return
+        
+        try:
+            if isinstance(response, CachedResponse):
+                self.send_cached(request, response, cors)
+            else:
+                status, content_type, body = response
+                if isinstance(body, str):
+                    body = body.encode("utf-8")
+                
+                request.send_response(status)
+                request.send_header("Content-type", content_type)
+                request.send_header("Content-Length", str(len(body)))
+                if cors:
+                    request.send_header("Access-Control-Allow-Origin", "*")
+                request.end_headers()
+                request.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Browser source went away mid-response
+    
+    def send_cached(self, request, response, cors=True):
+        """Send a cached response, answering revalidation with 304"""
+        if_none_match = request.headers.get("If-None-Match", "")
+        if response.etag in (tag.strip() for tag in if_none_match.split(",")):
+            with self.stats_lock:
+                self.not_modified += 1
+            request.send_response(304)
+            request.send_header("ETag", response.etag)
+            request.send_header("Cache-Control", "no-cache")
+            if cors:
+                request.send_header("Access-Control-Allow-Origin", "*")
+            request.end_headers()
+            return
+        
+        body = response.body
+        use_gzip = len(body) >= MIN_GZIP_SIZE and "gzip" in request.headers.get("Accept-Encoding", "")
+        if use_gzip:
+            body = response.get_gzipped()
+        
+        request.send_response(200)
+        request.send_header("Content-type", response.content_type)
+        request.send_header("Content-Length", str(len(body)))
+        request.send_header("ETag", response.etag)
+        request.send_header("Cache-Control", "no-cache")
+        request.send_header("Vary", "Accept-Encoding")
+        if cors:
+            request.send_header("Access-Control-Allow-Origin", "*")
+        if use_gzip:
+            request.send_header("Content-Encoding", "gzip")
+        request.end_headers()
+        request.wfile.write(body)
+    
+    def connection_opened(self):
+        with self.stats_lock:
+            self.active_connections += 1
+            self.total_connections += 1
+            self.peak_connections = max(self.peak_connections, self.active_connections)
+    
+    def connection_closed(self):
+        with self.stats_lock:
+            self.active_connections -= 1
+    
+    def get_stats(self):
+        """Get connection count metrics"""
+        with self.stats_lock:
+            return {
+                "port": self.port,
+                "active_connections": self.active_connections,
+                "peak_connections": self.peak_connections,
+                "total_connections": self.total_connections,
+                "total_requests": self.total_requests,
+                "not_modified": self.not_modified
+            }
+    
+    def get_url(self):
+        """Get URL reachable from other machines on the LAN"""
+        return f"http://{get_local_ip()}:{self.port}"
+
+def acquire_server(port):
+    """Get the shared overlay server for a port, starting it if needed"""
+    with _servers_lock:
+        server = _servers.get(port)
+        if server is None:
+            server = OverlayServer(port)
+            if not server.start():
+                return None
+            _servers[port] = server
+        server.users += 1
+        return server
+
+def release_server(server):
+    """Drop one user of a shared server, stopping it when unused"""
+    with _servers_lock:
+        server.users -= 1
+        if server.users <= 0:
+            _servers.pop(server.port, None)
+            server.stop()
+
+def get_servers():
+    """Get all running overlay servers"""
+    with _servers_lock:
+        return list(_servers.values())
+
+def get_local_ip():
+    """Get local IP address"""
+    try:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.connect(("8.8.8.8", 80))
+        ip = s.getsockname()[0]
+        s.close()
+        return ip
+    except:
+        return "localhost"
\ No newline at end of file
@@ -0,0 +1,179 @@
+import re
+from functools import lru_cache
+
+MISSING = "N/A"
+
+# Per-level fields and the queue entry key they read
+LEVEL_FIELDS = {
+    "level": "level_name",
+    "author": "author",
+    "id": "level_id",
+    "requester": "requester",
+    "platform": "platform",
+    "song": "song",
+    "difficulty": "difficulty",
+    "length": "length"
+}
+
+# Whole-queue fields
+QUEUE_FIELDS = ("count", "eta")
+
+TOKEN_RE = re.compile(r"\{\{|\}\}|\{([?!/]?)([^{}]*)\}")
+POSITION_RE = re.compile(r"^(?:(next)-|(\d+):)?([a-z-]+)$")
+
+class TemplateError(ValueError):
+    """Raised when an overlay template cannot be compiled"""
+    pass
+
+class CompiledTemplate:
+    """Template parsed once into a token list and rendered in a single pass"""
+    def __init__(self, source, tokens):
+        self.source = source
+        self.tokens = tokens
+    
+    def render(self, queue, minutes_per_level=5):
+        """Render template for a queue"""
+        parts = []
+        render_tokens(self.tokens, queue, minutes_per_level, parts)
+        return "".join(parts)
+
+def render_tokens(tokens, queue, minutes_per_level, parts):
+    for token in tokens:
+        kind = token[0]
+        if kind == "text":
+            parts.append(token[1])
+        elif kind == "field":
+            value = resolve(token[1], token[2], queue, minutes_per_level)
+            parts.append(MISSING if value is None else value)
+        else:
+            # ("if", negate, position, name, children)
+            value = resolve(token[2], token[3], queue, minutes_per_level)
+            if (value not in (None, "", "0")) != token[1]:
+                render_tokens(token[4], queue, minutes_per_level, parts)
+
+def resolve(position, name, queue, minutes_per_level):
+    """Resolve a field to a string, or None when the level is missing"""
+    if name == "count":
+        return str(len(queue))
+    
+    if name == "eta":
+        # Time until the level at this position comes up; position 0 means the whole queue
+        levels_ahead = len(queue) if position == 0 else position - 1
+        if position > len(queue):
+            return None
+        return format_minutes(levels_ahead * minutes_per_level)
+    
+    if position > len(queue):
+        return None
+    
+    level = queue[position - 1]
+    if name == "exists":
+        return "1"
+    value = level.get(LEVEL_FIELDS[name])
+    return None if value is None else str(value)
+
+def format_minutes(minutes):
+    """Format minutes as '45m' or '1h 30m'"""
+    hours, minutes = divmod(int(minutes), 60)
+    if hours:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m"
+
+def parse_field(name, allow_exists=False):
+    """Parse 'level', 'next-author', '3:id' into (position, field)"""
+    name = name.strip()
+    
+    if allow_exists and name in ("current", "next"):
+        return (1 if name == "current" else 2), "exists"
+    if allow_exists and name.isdigit() and int(name) > 0:
+        return int(name), "exists"
+    
+    match = POSITION_RE.match(name)
+    if not match:
+        raise TemplateError(f"Invalid variable {{{name}}}")
+    
+    is_next, index, field = match.groups()
+    
+    if field in QUEUE_FIELDS:
+        if is_next:
+            raise TemplateError(f"{{{field}}} cannot be used with next-")
+        if field == "count" and index:
+            raise TemplateError("{count} cannot be used with a position")
+        return (int(index) if index else 0), field
+    
+    if field not in LEVEL_FIELDS:
+        raise TemplateError(f"Unknown variable {{{name}}}")
+    
+    if is_next:
+        position = 2
+    elif index:
+        position = int(index)
+        if position < 1:
+            raise TemplateError(f"Invalid position in {{{name}}}")
+    else:
+        position = 1
+    
+    return position, field
+
+@lru_cache(maxsize=64)
+def compile_template(source):
+    """Compile template text, raising TemplateError if it is invalid"""
+    root = []
+    stack = [("", root)]
+    pos = 0
+    
+    for match in TOKEN_RE.finditer(source):
+        if match.start() > pos:
+            stack[-1][1].append(("text", source[pos:match.start()]))
+        pos = match.end()
+        
+        text = match.group(0)
+        if text == "{{":
+            stack[-1][1].append(("text", "{"))
+            continue
+        if text == "}}":
+            stack[-1][1].append(("text", "}"))
+            continue
+        
+        marker, name = match.group(1), match.group(2).strip()
+        
+        if marker in ("?", "!"):
+            position, field = parse_field(name, allow_exists=True)
+            children = []
+            stack[-1][1].append(("if", marker == "!", position, field, children))
+            stack.append((name, children))
+        elif marker == "/":
+            if len(stack) == 1 or stack[-1][0] != name:
+                raise TemplateError(f"Unexpected {{/{name}}}")
+            stack.pop()
+        else:
+            position, field = parse_field(name)
+            stack[-1][1].append(("field", position, field))
+    
+    if pos < len(source):
+        stack[-1][1].append(("text", source[pos:]))
+    
+    if len(stack) > 1:
+        raise TemplateError(f"Missing {{/{stack[-1][0]}}}")
+    
+    return CompiledTemplate(source, merge_text(root))
+
+def merge_text(tokens):
+    """Join adjacent text tokens so rendering appends fewer parts"""
+    merged = []
+    for token in tokens:
+        if token[0] == "if":
+            token = ("if", token[1], token[2], token[3], merge_text(token[4]))
+        if token[0] == "text" and merged and merged[-1][0] == "text":
+            merged[-1] = ("text", merged[-1][1] + token[1])
+        else:
+            merged.append(token)
+    return merged
+
+def validate_template(source):
+    """Return an error message for an invalid template, or None"""
+    try:
+        compile_template(source)
+        return None
+    except TemplateError as e:
+        return str(e)
\ No newline at end of file
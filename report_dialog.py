@@ -1,4 +1,3 @@
-import requests
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QLabel, QTextEdit, 
                              QPushButton, QCheckBox, QMessageBox)
 from PyQt6.QtCore import Qt
@@ -57,6 +56,7 @@ class ReportDialog(QDialog):
     def submit_report(self):
         """Submit the report"""
         from main import log
+        import requests
         
         reason = self.reason_input.toPlainText().strip()
         
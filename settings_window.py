@@ -1,15 +1,22 @@
 import os
+import re
 import webbrowser
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTabWidget, 
                              QWidget, QLabel, QLineEdit, QPushButton, QCheckBox,
                              QSpinBox, QComboBox, QFileDialog, QTextEdit, QGroupBox,
-                             QMessageBox)
-from PyQt6.QtCore import Qt
+                             QMessageBox, QProgressDialog)
+from PyQt6.QtCore import Qt, pyqtSignal
+from core.filters import RANGE_FILTERS, parse_song_ids
+
+OBS_TAB = 4
 
 class SettingsWindow(QDialog):
+    data_restored = pyqtSignal(list)  # restored data file names
+    
     def __init__(self, settings, parent=None):
         super().__init__(parent)
         self.settings = settings
+        self.backup_job = None
         self.init_ui()
     
     def init_ui(self):
@@ -23,15 +30,29 @@ class SettingsWindow(QDialog):
         # Tab widget
         self.tabs = QTabWidget()
         
-        # Add tabs
-        self.tabs.addTab(self.create_connection_tab(), "Connection")
-        self.tabs.addTab(self.create_commands_tab(), "Commands")
-        self.tabs.addTab(self.create_automod_tab(), "Automod")
-        self.tabs.addTab(self.create_filters_tab(), "Filters")
-        self.tabs.addTab(self.create_obs_tab(), "OBS Overlay")
-        self.tabs.addTab(self.create_sounds_tab(), "Sounds")
-        self.tabs.addTab(self.create_backup_tab(), "Backup")
-        self.tabs.addTab(self.create_advanced_tab(), "Advanced")
+        # (title, builder, saver) - tabs are built the first time they're shown
+        self.tab_specs = [
+            ("Connection", self.create_connection_tab, self.save_connection_tab),
+            ("Commands", self.create_commands_tab, self.save_commands_tab),
+            ("Automod", self.create_automod_tab, self.save_automod_tab),
+            ("Filters", self.create_filters_tab, self.save_filters_tab),
+            ("OBS Overlay", self.create_obs_tab, self.save_obs_tab),
+            ("Sounds", self.create_sounds_tab, self.save_sounds_tab),
+            ("Backup", self.create_backup_tab, self.save_backup_tab),
+            ("Advanced", self.create_advanced_tab, self.save_advanced_tab)
+        ]
+        self.tab_pages = []
+        self.built_tabs = {}  # index -> built tab widget
+        
+        for title, _, _ in self.tab_specs:
+            page = QWidget()
+            page_layout = QVBoxLayout()
+            page_layout.setContentsMargins(0, 0, 0, 0)
+            page.setLayout(page_layout)
+            self.tab_pages.append(page)
+            self.tabs.addTab(page, title)
+        
+        self.tabs.currentChanged.connect(self.ensure_tab_built)
         
         layout.addWidget(self.tabs)
         
@@ -50,6 +71,36 @@ class SettingsWindow(QDialog):
         
         self.setLayout(layout)
     
+    def ensure_tab_built(self, index):
+        """Build a tab's widgets the first time it is shown"""
+        if index < 0 or index in self.built_tabs:
+            return
+        
+        widget = self.tab_specs[index][1]()
+        self.tab_pages[index].layout().addWidget(widget)
+        self.built_tabs[index] = widget
+    
+    def is_tab_built(self, index):
+        """Check if a tab's widgets exist"""
+        return index in self.built_tabs
+    
+    def reset_tabs(self):
+        """Drop built tabs so they are rebuilt from settings on next view"""
+        for widget in self.built_tabs.values():
+            widget.setParent(None)
+            widget.deleteLater()
+        self.built_tabs = {}
+    
+    def showEvent(self, event):
+        """Build the visible tab when the dialog opens"""
+        self.ensure_tab_built(self.tabs.currentIndex())
+        super().showEvent(event)
+    
+    def reject(self):
+        """Discard unsaved edits so the reused dialog reflects settings next time"""
+        self.reset_tabs()
+        super().reject()
+    
     def create_connection_tab(self):
         """Create connection settings tab"""
         widget = QWidget()
@@ -172,6 +223,21 @@ class SettingsWindow(QDialog):
         self.ignore_played_cb.setChecked(self.settings.get("ignore_played", True))
         layout.addWidget(self.ignore_played_cb)
         
+        played_layout = QHBoxLayout()
+        played_layout.addWidget(QLabel("Played within the last"))
+        self.played_streams_spin = QSpinBox()
+        self.played_streams_spin.setRange(0, 100)
+        self.played_streams_spin.setValue(self.settings.get("played_window_streams", 1))
+        played_layout.addWidget(self.played_streams_spin)
+        played_layout.addWidget(QLabel("streams or"))
+        self.played_days_spin = QSpinBox()
+        self.played_days_spin.setRange(0, 365)
+        self.played_days_spin.setValue(self.settings.get("played_window_days", 0))
+        played_layout.addWidget(self.played_days_spin)
+        played_layout.addWidget(QLabel("days (both 0 = ever)"))
+        played_layout.addStretch()
+        layout.addLayout(played_layout)
+        
         layout.addStretch()
         widget.setLayout(layout)
         return widget
@@ -286,6 +352,34 @@ class SettingsWindow(QDialog):
         other_group.setLayout(other_layout)
         layout.addWidget(other_group)
         
+        # Range and song filters
+        range_group = QGroupBox("Ranges and Songs (0 or empty = no limit)")
+        range_layout = QVBoxLayout()
+        
+        self.range_spins = {}
+        for _, name, label in RANGE_FILTERS:
+            row = QHBoxLayout()
+            row.addWidget(QLabel(f"{label}:"))
+            for bound in ("min", "max"):
+                spin = QSpinBox()
+                spin.setRange(0, 2000000000)
+                spin.setValue(self.settings.get(f"{bound}_{name}", 0))
+                row.addWidget(QLabel(bound.capitalize()))
+                row.addWidget(spin)
+                self.range_spins[f"{bound}_{name}"] = spin
+            range_layout.addLayout(row)
+        
+        range_layout.addWidget(QLabel("Allowed song IDs (comma separated):"))
+        self.song_allowlist_input = QLineEdit(", ".join(sorted(parse_song_ids(self.settings.get("song_allowlist")))))
+        range_layout.addWidget(self.song_allowlist_input)
+        
+        range_layout.addWidget(QLabel("Blocked song IDs (comma separated):"))
+        self.song_denylist_input = QLineEdit(", ".join(sorted(parse_song_ids(self.settings.get("song_denylist")))))
+        range_layout.addWidget(self.song_denylist_input)
+        
+        range_group.setLayout(range_layout)
+        layout.addWidget(range_group)
+        
         layout.addStretch()
         widget.setLayout(layout)
         return widget
@@ -303,12 +397,29 @@ class SettingsWindow(QDialog):
         self.obs_window_cb.setChecked(self.settings.get("obs_overlay_window_enabled", False))
         layout.addWidget(self.obs_window_cb)
         
-        server_label = QLabel("HTML server always runs on port 6767 when overlay is enabled")
+        # Server port
+        port_layout = QHBoxLayout()
+        
+        port_label = QLabel("Server port:")
+        port_layout.addWidget(port_label)
+        
+        self.obs_port_spin = QSpinBox()
+        self.obs_port_spin.setMinimum(1024)
+        self.obs_port_spin.setMaximum(65535)
+        self.obs_port_spin.setValue(self.settings.get("obs_overlay_port", 6767))
+        port_layout.addWidget(self.obs_port_spin)
+        
+        layout.addLayout(port_layout)
+        
+        server_label = QLabel("Browser sources: / (classic), /web (animated), /overlay/<name> (extra sources below)")
         server_label.setWordWrap(True)
         layout.addWidget(server_label)
         
         # Template
-        template_label = QLabel("Template (variables: {level}, {author}, {id}, {next-level}, {next-author}):")
+        template_label = QLabel("Template (variables: {level}, {author}, {id}, {requester}, {difficulty}, {length}, {song}, {count}, {eta}; "
+                                "prefix with next- or N: for other levels, e.g. {next-level}, {3:author}; "
+                                "conditionals: {?next}...{/next}, {!next}...{/next}):")
+        template_label.setWordWrap(True)
         layout.addWidget(template_label)
         
         self.obs_template_input = QTextEdit()
@@ -316,6 +427,31 @@ class SettingsWindow(QDialog):
         self.obs_template_input.setText(self.settings.get("obs_overlay_template", "{level} by {author} (ID: {id})"))
         layout.addWidget(self.obs_template_input)
         
+        # ETA estimate
+        eta_layout = QHBoxLayout()
+        
+        eta_label = QLabel("Minutes per level (for {eta}):")
+        eta_layout.addWidget(eta_label)
+        
+        self.obs_minutes_spin = QSpinBox()
+        self.obs_minutes_spin.setMinimum(1)
+        self.obs_minutes_spin.setMaximum(60)
+        self.obs_minutes_spin.setValue(self.settings.get("obs_overlay_minutes_per_level", 5))
+        eta_layout.addWidget(self.obs_minutes_spin)
+        
+        layout.addLayout(eta_layout)
+        
+        # Extra named browser sources
+        endpoints_label = QLabel("Extra browser sources (one per line, name = template):")
+        layout.addWidget(endpoints_label)
+        
+        self.obs_endpoints_input = QTextEdit()
+        self.obs_endpoints_input.setMaximumHeight(80)
+        self.obs_endpoints_input.setPlaceholderText("next = Next: {next-level} by {next-author}")
+        endpoints = self.settings.get("obs_overlay_endpoints", {})
+        self.obs_endpoints_input.setText("\n".join(f"{name} = {template}" for name, template in endpoints.items()))
+        layout.addWidget(self.obs_endpoints_input)
+        
         # Font
         font_label = QLabel("Custom Font (.ttf):")
         layout.addWidget(font_label)
@@ -463,6 +599,18 @@ class SettingsWindow(QDialog):
         self.load_queue_cb.setChecked(self.settings.get("load_queue_on_start", True))
         layout.addWidget(self.load_queue_cb)
         
+        log_level_label = QLabel("Log Level:")
+        layout.addWidget(log_level_label)
+        
+        self.log_level_combo = QComboBox()
+        self.log_level_combo.addItems(["DEBUG", "INFO", "WARNING", "ERROR"])
+        self.log_level_combo.setCurrentText(self.settings.get("log_level", "INFO"))
+        layout.addWidget(self.log_level_combo)
+        
+        self.diagnostics_endpoint_cb = QCheckBox("Serve /diagnostics and Prometheus /metrics on the overlay port")
+        self.diagnostics_endpoint_cb.setChecked(self.settings.get("diagnostics_endpoint_enabled", False))
+        layout.addWidget(self.diagnostics_endpoint_cb)
+        
         # Clear cache button
         clear_cache_btn = QPushButton("Clear Cache")
         clear_cache_btn.clicked.connect(self.clear_cache)
@@ -492,25 +640,77 @@ class SettingsWindow(QDialog):
             elif sound_type == "error":
                 self.sound_error_input.setText(filename)
     
+    def parse_overlay_endpoints(self, text):
+        """Parse 'name = template' lines into a dict of named browser sources"""
+        endpoints = {}
+        for line in text.splitlines():
+            if "=" not in line:
+                continue
+            name, template = line.split("=", 1)
+            name = re.sub(r'[^a-zA-Z0-9_-]', '', name.strip().lower())
+            if name:
+                endpoints[name] = template.strip()
+        return endpoints
+    
     def backup_now(self):
         """Create manual backup"""
-        from backup_service import BackupService
-        backup = BackupService()
-        if backup.create_backup():
+        from backup_service import BackupJob
+        self.run_backup_job(BackupJob("backup", parent=self), "Creating backup...", self.backup_finished)
+    
+    def backup_finished(self, success, cancelled):
+        if success:
             QMessageBox.information(self, "Success", "Backup created successfully!")
-        else:
+        elif not cancelled:
             QMessageBox.warning(self, "Error", "Failed to create backup")
     
     def restore_backup(self):
         """Restore from backup"""
         filename, _ = QFileDialog.getOpenFileName(self, "Select Backup", "", "Backup Files (*.hgb-bkp)")
         if filename:
-            from backup_service import BackupService
-            backup = BackupService()
-            if backup.restore_backup(filename):
-                QMessageBox.information(self, "Success", "Backup restored successfully! Please restart the app.")
-            else:
-                QMessageBox.warning(self, "Error", "Failed to restore backup")
+            from backup_service import BackupJob
+            self.run_backup_job(BackupJob("restore", filename, parent=self), "Restoring backup...", self.restore_finished)
+    
+    def restore_finished(self, success, cancelled):
+        if success:
+            # Swap the verified files in and let the main window reload them in place
+            filenames = self.backup_job.commit_restore()
+            if filenames is None:
+                QMessageBox.warning(self, "Error", "Failed to restore backup, your data was left unchanged (see log.txt)")
+                return
+            self.data_restored.emit(filenames)
+            
+            # Show the restored settings instead of the ones loaded before
+            index = self.tabs.currentIndex()
+            self.reset_tabs()
+            self.ensure_tab_built(index)
+            QMessageBox.information(self, "Success", "Backup restored successfully!")
+        elif not cancelled:
+            QMessageBox.warning(self, "Error", "Failed to restore backup, it may be damaged (see log.txt)")
+    
+    def run_backup_job(self, job, label, on_completed):
+        """Run a backup job in the background behind a cancellable progress dialog"""
+        if self.backup_job and self.backup_job.isRunning():
+            return
+        
+        progress = QProgressDialog(label, "Cancel", 0, 0, self)
+        progress.setWindowTitle("Backup")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(300)
+        
+        def update_progress(done, total, message):
+            progress.setMaximum(total)
+            progress.setValue(done)
+            progress.setLabelText(message)
+        
+        def finish(success, cancelled):
+            progress.close()
+            on_completed(success, cancelled)
+        
+        job.progress.connect(update_progress)
+        job.completed.connect(finish)
+        progress.canceled.connect(job.cancel)
+        self.backup_job = job
+        job.start()
     
     def open_backup_folder(self):
         """Open backup folder"""
@@ -520,7 +720,7 @@ class SettingsWindow(QDialog):
     
     def clear_cache(self):
         """Clear GDBrowser cache"""
-        from gd_integration import GDIntegration
+        from core.gd_client import GDIntegration
         gd = GDIntegration()
         gd.clear_cache()
         QMessageBox.information(self, "Success", "Cache cleared!")
@@ -535,31 +735,66 @@ class SettingsWindow(QDialog):
         )
         
         if confirm == QMessageBox.StandardButton.Yes:
-            from queue_manager import QueueManager
-            qm = QueueManager(self.settings)
+            # Reset the running queue's history so it doesn't write the old one back
+            qm = getattr(self.parent(), "queue_manager", None)
+            if qm is None:
+                from queue_manager import QueueManager
+                qm = QueueManager(self.settings)
             qm.reset_played()
             QMessageBox.information(self, "Success", "Played levels list reset!")
     
+    def validate_templates(self):
+        """Check overlay templates compile, warning about the first bad one"""
+        from overlay_template import validate_template
+        
+        templates = {"Template": self.obs_template_input.toPlainText()}
+        for name, template in self.parse_overlay_endpoints(self.obs_endpoints_input.toPlainText()).items():
+            templates[f"Browser source '{name}'"] = template
+        
+        for label, template in templates.items():
+            error = validate_template(template)
+            if error:
+                self.tabs.setCurrentIndex(OBS_TAB)
+                QMessageBox.warning(self, "Invalid Template", f"{label}: {error}")
+                return False
+        
+        return True
+    
     def save_settings(self):
-        """Save all settings"""
-        # Connection
+        """Save settings from every tab that was opened"""
+        if self.is_tab_built(OBS_TAB) and not self.validate_templates():
+            return
+        
+        for index, (_, _, save_tab) in enumerate(self.tab_specs):
+            if self.is_tab_built(index):
+                save_tab()
+        
+        self.accept()
+    
+    def save_connection_tab(self):
+        """Save connection settings"""
         self.settings["twitch_token"] = self.twitch_token_input.text().strip()
         self.settings["twitch_username"] = self.twitch_username_input.text().strip()
         self.settings["youtube_enabled"] = self.youtube_enabled_cb.isChecked()
         self.settings["streamer_name"] = self.streamer_name_input.text().strip()
-        
-        # Commands
+    
+    def save_commands_tab(self):
+        """Save commands settings"""
         self.settings["post_command"] = self.post_command_input.text().strip()
         self.settings["delete_command"] = self.delete_command_input.text().strip()
         self.settings["max_ids_per_user"] = self.max_ids_spin.value()
-        
-        # Automod
+    
+    def save_automod_tab(self):
+        """Save automod settings"""
         self.settings["per_user_cooldown"] = self.per_user_cooldown_cb.isChecked()
         self.settings["block_same_level_same_user"] = self.block_same_level_cb.isChecked()
         self.settings["reject_fucked_list"] = self.reject_fucked_cb.isChecked()
         self.settings["ignore_played"] = self.ignore_played_cb.isChecked()
-        
-        # Filters
+        self.settings["played_window_streams"] = self.played_streams_spin.value()
+        self.settings["played_window_days"] = self.played_days_spin.value()
+    
+    def save_filters_tab(self):
+        """Save filters settings"""
         self.settings["length_filters"] = {
             "tiny": self.length_tiny_cb.isChecked(),
             "short": self.length_short_cb.isChecked(),
@@ -585,27 +820,39 @@ class SettingsWindow(QDialog):
         self.settings["block_disliked"] = self.block_disliked_cb.isChecked()
         self.settings["rated_filter"] = self.rated_combo.currentText()
         self.settings["block_large"] = self.block_large_cb.isChecked()
-        
-        # OBS
+        for key, spin in self.range_spins.items():
+            self.settings[key] = spin.value()
+        self.settings["song_allowlist"] = sorted(parse_song_ids(self.song_allowlist_input.text()))
+        self.settings["song_denylist"] = sorted(parse_song_ids(self.song_denylist_input.text()))
+    
+    def save_obs_tab(self):
+        """Save OBS overlay settings"""
         self.settings["obs_overlay_enabled"] = self.obs_enabled_cb.isChecked()
         self.settings["obs_overlay_window_enabled"] = self.obs_window_cb.isChecked()
         self.settings["obs_overlay_template"] = self.obs_template_input.toPlainText()
+        self.settings["obs_overlay_port"] = self.obs_port_spin.value()
+        self.settings["obs_overlay_endpoints"] = self.parse_overlay_endpoints(self.obs_endpoints_input.toPlainText())
+        self.settings["obs_overlay_minutes_per_level"] = self.obs_minutes_spin.value()
         self.settings["obs_overlay_font"] = self.obs_font_input.text().strip()
         self.settings["obs_overlay_width"] = self.obs_width_spin.value()
         self.settings["obs_overlay_height"] = self.obs_height_spin.value()
         self.settings["obs_overlay_transparency"] = self.obs_transparency_spin.value()
-        
-        # Sounds
+    
+    def save_sounds_tab(self):
+        """Save sounds settings"""
         self.settings["sounds_enabled"] = self.sounds_enabled_cb.isChecked()
         self.settings["sound_new_level"] = self.sound_new_level_input.text().strip()
         self.settings["sound_error"] = self.sound_error_input.text().strip()
-        
-        # Backup
+    
+    def save_backup_tab(self):
+        """Save backup settings"""
         self.settings["backup_enabled"] = self.backup_enabled_cb.isChecked()
         self.settings["backup_interval"] = self.backup_interval_spin.value()
-        
-        # Advanced
+    
+    def save_advanced_tab(self):
+        """Save advanced settings"""
         self.settings["save_queue_on_change"] = self.save_queue_cb.isChecked()
         self.settings["load_queue_on_start"] = self.load_queue_cb.isChecked()
-        
-        self.accept()
\ No newline at end of file
+        self.settings["log_level"] = self.log_level_combo.currentText()
+        self.settings["diagnostics_endpoint_enabled"] = self.diagnostics_endpoint_cb.isChecked()
+        
\ No newline at end of file
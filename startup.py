@@ -0,0 +1,74 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QObject, pyqtSignal
+
+class StartupOrchestrator(QObject):
+    """Runs network and disk initialization in the background while the UI builds"""
+    task_finished = pyqtSignal(str, object, object, float)  # name, result, error, duration
+    
+    def __init__(self, max_workers=4):
+        super().__init__()
+        self.started_at = time.perf_counter()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="startup")
+        self.callbacks = {}
+        self.pending = set()
+        self.timings = {}
+        self.finished = False  # The summary is logged once, tasks added later (e.g. update checks) don't repeat it
+        
+        # Emitted from worker threads, delivered on the GUI thread
+        self.task_finished.connect(self.on_task_finished)
+    
+    def add_task(self, name, func, callback=None):
+        """Run func in the background and pass its result to callback on the GUI thread"""
+        self.callbacks[name] = callback
+        self.pending.add(name)
+        self.executor.submit(self.run_task, name, func)
+    
+    def run_task(self, name, func):
+        start = time.perf_counter()
+        result = None
+        error = None
+        try:
+            result = func()
+        except Exception as e:
+            error = e
+        self.task_finished.emit(name, result, error, time.perf_counter() - start)
+    
+    def on_task_finished(self, name, result, error, duration):
+        from main import log
+        
+        self.pending.discard(name)
+        self.timings[name] = duration
+        
+        if error is not None:
+            log("ERROR", f"Startup task {name} failed after {duration * 1000:.0f} ms: {error}")
+        else:
+            log("INFO", f"Startup task {name} finished in {duration * 1000:.0f} ms")
+            callback = self.callbacks.get(name)
+            if callback:
+                try:
+                    callback(result)
+                except Exception as e:
+                    log("ERROR", f"Startup task {name} callback failed: {e}")
+        
+        if not self.pending:
+            self.finish()
+    
+    def mark(self, phase):
+        """Record a foreground phase as time since startup began"""
+        from main import log
+        
+        elapsed = time.perf_counter() - self.started_at
+        self.timings[phase] = elapsed
+        log("INFO", f"Startup phase {phase} reached at {elapsed * 1000:.0f} ms")
+    
+    def finish(self):
+        """Log the timing summary the first time the background tasks have drained"""
+        from main import log
+        
+        if self.finished:
+            return
+        self.finished = True
+        total = time.perf_counter() - self.started_at
+        summary = ", ".join(f"{name} {duration * 1000:.0f} ms" for name, duration in self.timings.items())
+        log("INFO", f"Startup finished in {total * 1000:.0f} ms ({summary})")
\ No newline at end of file
@@ -0,0 +1,117 @@
+import os
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from backup_service import BackupService
+from core.played import PlayedHistory
+from core.storage import recover_data_files
+
+FILES = {
+    "settings.json": '{\n  "streamer_name": "someone",\n  "max_queue_size": 100\n}',
+    "queue.json": '[{"level_id":"128","level_name":"1st level","requester":"viewer","platform":"twitch"}]'
+}
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    # DATA_DIR is relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(BackupService, "get_backup_dir", lambda self: str(tmp_path / "backups"))
+    os.makedirs("data")
+    return BackupService()
+
+def write_files(files):
+    for filename, text in files.items():
+        with open(os.path.join("data", filename), "w", encoding="utf-8") as f:
+            f.write(text)
+
+def read_files():
+    files = {}
+    for filename in sorted(os.listdir("data")):
+        with open(os.path.join("data", filename), "r", encoding="utf-8") as f:
+            files[filename] = f.read()
+    return files
+
+def test_backup_and_restore(service):
+    write_files(FILES)
+    assert service.create_backup()
+    backups = service.load_index()
+    assert len(backups) == 1 and backups[0]["manifest"]
+    
+    # Change and lose data after the backup
+    write_files({"settings.json": '{"streamer_name": "someone else"}'})
+    os.remove(os.path.join("data", "queue.json"))
+    
+    restored = service.restore_backup(os.path.join(service.backup_dir, backups[0]["name"]))
+    assert sorted(restored) == sorted(FILES)
+    assert read_files() == FILES
+
+def test_incremental_backup_restores_each_version(service):
+    write_files(FILES)
+    assert service.create_backup()
+    changed = dict(FILES, **{"settings.json": '{\n  "streamer_name": "someone",\n  "max_queue_size": 50\n}'})
+    write_files(changed)
+    assert service.create_backup()
+    
+    # Nothing changed, so no new backup
+    assert service.create_backup()
+    backups = service.load_index()
+    assert len(backups) == 2
+    
+    service.restore_backup(os.path.join(service.backup_dir, backups[0]["name"]))
+    assert read_files() == FILES
+    service.restore_backup(os.path.join(service.backup_dir, backups[1]["name"]))
+    assert read_files() == changed
+
+def test_failed_restore_rolls_back_every_file(service, monkeypatch):
+    write_files(FILES)
+    assert service.create_backup()
+    backups = service.load_index()
+    changed = {"settings.json": '{"streamer_name": "someone else"}', "queue.json": "[]"}
+    write_files(changed)
+    
+    staged = service.stage_restore(os.path.join(service.backup_dir, backups[0]["name"]))
+    real_replace = os.replace
+    
+    def failing_replace(source, target):
+        # The second staged file can't be swapped in
+        if source == staged[1][0]:
+            raise OSError("disk full")
+        real_replace(source, target)
+    
+    monkeypatch.setattr(os, "replace", failing_replace)
+    assert service.commit_restore(staged) is None
+    assert read_files() == changed
+
+def test_startup_recovery_drops_an_uncommitted_restore(service):
+    write_files(FILES)
+    assert service.create_backup()
+    backups = service.load_index()
+    changed = {"settings.json": '{"streamer_name": "someone else"}', "queue.json": "[]"}
+    write_files(changed)
+    
+    # The bot stops between staging and committing the restore
+    assert service.stage_restore(os.path.join(service.backup_dir, backups[0]["name"]))
+    assert any(name.endswith(".restore") for name in os.listdir("data"))
+    
+    recover_data_files("data")
+    assert read_files() == changed
+
+def test_restore_keeps_plays_still_in_the_journal(service):
+    played = PlayedHistory(os.path.join("data", "played.json"))
+    played.mark("128")
+    played.mark("256")
+    assert service.create_backup()
+    backups = service.load_index()
+    
+    played.clear()
+    restored = service.restore_backup(os.path.join(service.backup_dir, backups[0]["name"]))
+    assert "played.jsonl" in restored
+    
+    # Reloading after a restore stays in the same stream session
+    session = played.session
+    played.load()
+    assert "128" in played and "256" in played
+    assert played.session == session
+    assert played.was_played("128", streams=1)
+    assert PlayedHistory(os.path.join("data", "played.json")).session == session + 1
\ No newline at end of file
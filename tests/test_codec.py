@@ -0,0 +1,29 @@
+import io
+import pytest
+from core import codec
+
+@pytest.fixture(params=sorted(codec.CODECS))
+def codec_name(request):
+    previous = codec.set_codec(request.param)
+    yield request.param
+    codec.set_codec(previous.name)
+
+@pytest.mark.parametrize("data", [
+    {"1": {"level_name": "Lévél", "likes": -3}, "2": {"objects": None}},
+    [{"level_id": "1"}, {"level_id": "2"}],
+    {},
+    [],
+    "text"
+])
+def test_dump_round_trip(codec_name, data):
+    f = io.BytesIO()
+    codec.dump(data, f)
+    assert codec.loads(f.getvalue()) == data
+    f = io.BytesIO()
+    codec.dump(data, f, pretty=True)
+    assert codec.loads(f.getvalue()) == data
+
+def test_compact_dump_writes_one_entry_per_line(codec_name):
+    f = io.BytesIO()
+    codec.dump({str(i): {"likes": i} for i in range(3)}, f)
+    assert f.getvalue().split(b"\n") == [b"{", b'"0":{"likes":0},', b'"1":{"likes":1},', b'"2":{"likes":2}', b"}"]
\ No newline at end of file
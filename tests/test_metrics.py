@@ -0,0 +1,20 @@
+from metrics import Metrics
+
+def exported(metrics, line_start):
+    return [line for line in metrics.render_prometheus().splitlines() if line.startswith(line_start)]
+
+def test_reset_clears_the_window_but_not_the_exported_series():
+    metrics = Metrics()
+    for ms in (1, 2, 40):
+        metrics.total.observe(ms)
+    before = exported(metrics, "hwgdbot_request_seconds")
+    
+    metrics.reset()
+    assert metrics.get_snapshot()["total"]["count"] == 0
+    assert exported(metrics, "hwgdbot_request_seconds") == before
+    
+    metrics.total.observe(3)
+    snapshot = metrics.get_snapshot()["total"]
+    assert snapshot["count"] == 1 and snapshot["max_ms"] == 3 and snapshot["sum_ms"] == 3
+    assert snapshot["p50_ms"] <= 3
+    assert "hwgdbot_request_seconds_count 4" in exported(metrics, "hwgdbot_request_seconds_count")
\ No newline at end of file
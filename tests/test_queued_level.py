@@ -0,0 +1,53 @@
+import time
+from datetime import datetime
+import pytest
+from core.queued_level import QueuedLevel
+
+SAVED = {
+    "level_id": "128", "level_name": "1st level", "author": "RobTop", "song": "Stereo Madness",
+    "difficulty": "easy", "difficultyFace": "normal", "length": "short", "requester": "viewer",
+    "platform": "twitch", "timestamp": "2024-01-01T12:30:00", "attempts": 3, "is_rated": True,
+    "is_disliked": False, "is_large": True, "downloads": 1000, "likes": 50, "objects": 4000,
+    "song_id": "1", "is_fucked": True, "fucked_note": "crash-trigger"
+}
+
+def slots(level):
+    return {name: getattr(level, name) for name in QueuedLevel.__slots__}
+
+def from_init(data, **kwargs):
+    """The same entry built through __init__, the way new requests are"""
+    return QueuedLevel(data["level_id"], data["level_name"], data["author"], data["song"], data["difficulty"],
+                       data["difficultyFace"], data["length"], data["requester"], data["platform"],
+                       created=datetime.fromisoformat(data["timestamp"]).timestamp(), attempts=data["attempts"],
+                       is_rated=data["is_rated"], is_disliked=data["is_disliked"], is_large=data["is_large"],
+                       downloads=data["downloads"], likes=data["likes"], objects=data["objects"],
+                       song_id=data["song_id"], is_fucked=data["is_fucked"], fucked_note=data["fucked_note"], **kwargs)
+
+@pytest.mark.parametrize("data", [
+    SAVED,
+    dict(SAVED, difficulty="demon-new", platform="kick"),
+    dict(SAVED, sort_key=7, note={"from": "a newer version"})
+])
+def test_from_dict_round_trips(data):
+    assert QueuedLevel.from_dict(data).to_dict() == data
+
+def test_from_dict_matches_init():
+    assert slots(QueuedLevel.from_dict(SAVED)) == slots(from_init(SAVED))
+
+def test_from_dict_keeps_extra_keys_like_init():
+    data = dict(SAVED, sort_key=7)
+    assert slots(QueuedLevel.from_dict(data)) == slots(from_init(SAVED, extra={"sort_key": 7}))
+
+def test_from_dict_fills_defaults_like_init():
+    minimal = {"level_id": "128", "requester": "viewer", "platform": "youtube"}
+    loaded = slots(QueuedLevel.from_dict(minimal))
+    built = slots(QueuedLevel("128", "Unknown", "Unknown", "Unknown", "normal", "normal", "medium", "viewer", "youtube"))
+    assert abs(loaded.pop("created") - built.pop("created")) < 5
+    assert loaded == built
+
+@pytest.mark.parametrize("timestamp", ["yesterday", None, 12, ""])
+def test_bad_timestamp_becomes_now(timestamp):
+    before = time.time()
+    level = QueuedLevel.from_dict(dict(SAVED, timestamp=timestamp))
+    assert before <= level.created <= time.time()
+    assert dict(slots(level), created=0) == dict(slots(from_init(SAVED)), created=0)
\ No newline at end of file
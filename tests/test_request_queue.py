@@ -0,0 +1,33 @@
+import os
+import pytest
+from core.request_queue import QueueCore
+from core.gd_client import GDIntegration
+from core.queued_level import QueuedLevel
+from event_log import RequestTrace
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    # DATA_DIR is relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    return QueueCore({"save_queue_on_change": False}, gd=GDIntegration(cache={}))
+
+def level(level_id, requester="viewer"):
+    return QueuedLevel(level_id, "Level", "creator", "song", "easy", "easy", "short", requester, "twitch")
+
+def test_level_id_index_follows_the_queue(queue):
+    # A hand-edited file can queue the same ID twice
+    queue.set_queue([level("1"), level("2", "other"), level("1", "other"), level("3")])
+    assert all(queue.is_queued(level_id) for level_id in ("1", "2", "3"))
+    
+    queue.delete_last_from_requester("other", "twitch")
+    assert queue.is_queued("1")
+    queue.remove_level("1")
+    assert not queue.is_queued("1")
+    
+    queue.ban_requester("other", "twitch")
+    assert not queue.is_queued("2") and queue.is_queued("3")
+    assert queue.process_request("3", "someone", "twitch", RequestTrace("3", "someone", "twitch"))["code"] == "in_queue"
+    
+    queue.clear_queue()
+    assert not queue.level_ids
\ No newline at end of file
@@ -1,6 +1,8 @@
 import socket
-import re
 from PyQt6.QtCore import QThread, pyqtSignal
+from metrics import get_metrics
+from core.chat import parse_twitch_line, parse_command
+from log_service import log
 
 class TwitchService(QThread):
     level_requested = pyqtSignal(str, str, str)  # level_id, requester, platform
@@ -25,8 +27,6 @@ class TwitchService(QThread):
     
     def run(self):
         """Main thread loop"""
-        from main import log
-        
         self.running = True
         
         try:
@@ -40,6 +40,7 @@ class TwitchService(QThread):
             self.sock.send(f"JOIN #{self.channel}\r\n".encode("utf-8"))
             
             self.connected = True
+            get_metrics().set_gauge("hwgdbot_chat_connected", 1, {"platform": "twitch"})
             self.connection_changed.emit("twitch", True)
             log("INFO", f"Connected to Twitch channel #{self.channel}")
             
@@ -69,6 +70,7 @@ class TwitchService(QThread):
         
         finally:
             self.connected = False
+            get_metrics().set_gauge("hwgdbot_chat_connected", 0, {"platform": "twitch"})
             self.connection_changed.emit("twitch", False)
             if self.sock:
                 self.sock.close()
@@ -76,34 +78,29 @@ class TwitchService(QThread):
     
     def handle_message(self, line):
         """Handle IRC message"""
-        from main import log
-        
         # Respond to PING
         if line.startswith("PING"):
             self.sock.send("PONG :tmi.twitch.tv\r\n".encode("utf-8"))
             return
         
         # Parse PRIVMSG
-        match = re.match(r":(\w+)!\w+@\w+\.tmi\.twitch\.tv PRIVMSG #\w+ :(.+)", line)
-        if match:
-            username = match.group(1)
-            message = match.group(2).strip()
-            
-            # Check for post command
-            if message.startswith(self.post_command):
-                parts = message.split()
-                if len(parts) >= 2:
-                    level_id = parts[1]
-                    # Extract numeric ID
-                    level_id = re.sub(r'\D', '', level_id)
-                    if level_id:
-                        log("INFO", f"Twitch: {username} requested level {level_id}")
-                        self.level_requested.emit(level_id, username, "twitch")
-            
-            # Check for delete command
-            elif message.startswith(self.delete_command):
-                log("INFO", f"Twitch: {username} requested delete")
-                self.delete_requested.emit(username, "twitch")
+        parsed = parse_twitch_line(line)
+        if not parsed:
+            return
+        username, message = parsed
+        
+        command = parse_command(message, self.post_command, self.delete_command)
+        if not command:
+            return
+        
+        action, level_id = command
+        get_metrics().inc("hwgdbot_chat_commands_total", {"platform": "twitch", "command": action})
+        if action == "post":
+            log("INFO", f"Twitch: {username} requested level {level_id}")
+            self.level_requested.emit(level_id, username, "twitch")
+        else:
+            log("INFO", f"Twitch: {username} requested delete")
+            self.delete_requested.emit(username, "twitch")
     
     def send_message(self, message):
         """Send message to channel"""
@@ -111,15 +108,19 @@ class TwitchService(QThread):
             try:
                 self.sock.send(f"PRIVMSG #{self.channel} :{message}\r\n".encode("utf-8"))
             except Exception as e:
-                from main import log
                 log("ERROR", f"Failed to send Twitch message: {e}")
     
     def ban_user(self, username):
         """Ban user from channel"""
         self.send_message(f"/ban {username}")
-        from main import log
         log("INFO", f"Banned {username} from Twitch channel")
     
+    def update_settings(self, settings):
+        """Pick up new chat commands without reconnecting"""
+        self.settings = settings
+        self.post_command = settings.get("post_command", "!post")
+        self.delete_command = settings.get("delete_command", "!del")
+    
     def is_connected(self):
         """Check if connected"""
         return self.connected
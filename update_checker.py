@@ -1,33 +1,100 @@
-import requests
+import os
 import webbrowser
+from datetime import datetime, timedelta
+from threading import Thread
+from PyQt6.QtCore import QObject, pyqtSignal
 from PyQt6.QtWidgets import QMessageBox
+from core import codec
 
 VERSION_URL = "https://raw.githubusercontent.com/MalikHw/HwGDBot-db/main/ver.txt"
 DOWNLOAD_URL = "https://malikhw.github.io/HwGDBot"
+DATA_DIR = "data"
+CHECK_CACHE_FILE = os.path.join(DATA_DIR, "update_check.json")
+CHECK_INTERVAL = timedelta(days=1)
 
-class UpdateChecker:
+class UpdateChecker(QObject):
+    update_available = pyqtSignal(str)  # latest_version
+    
     def __init__(self, current_version):
+        super().__init__()
         self.current_version = current_version
+        
+        # Emitted from the worker thread, shown on the GUI thread
+        self.update_available.connect(self.show_update_dialog)
     
     def check_for_updates(self):
-        """Check for updates from GitHub"""
+        """Check for updates from GitHub without blocking the GUI thread"""
+        thread = Thread(target=lambda: self.handle_latest_version(self.get_latest_version()), daemon=True)
+        thread.start()
+    
+    def get_latest_version(self):
+        """Get latest version, hitting GitHub at most once per CHECK_INTERVAL"""
+        from main import log
+        
+        cached = self.load_cached_check()
+        if cached:
+            log("INFO", f"Using cached update check from {cached['checked_at']}")
+            return cached["latest_version"]
+        
+        latest_version = self.fetch_latest_version()
+        if latest_version:
+            self.save_cached_check(latest_version)
+        return latest_version
+    
+    def load_cached_check(self):
+        """Load the last check result if it is recent enough, or None"""
+        try:
+            if os.path.exists(CHECK_CACHE_FILE):
+                with open(CHECK_CACHE_FILE, "rb") as f:
+                    cached = codec.load(f)
+                checked_at = datetime.fromisoformat(cached["checked_at"])
+                if cached.get("latest_version") and datetime.now() - checked_at < CHECK_INTERVAL:
+                    return cached
+        except Exception as e:
+            from main import log
+            log("WARNING", f"Failed to load update check cache: {e}")
+        return None
+    
+    def save_cached_check(self, latest_version):
+        """Save check result with a timestamp"""
+        from core.storage import write_atomic
+        
+        try:
+            write_atomic(CHECK_CACHE_FILE, codec.dumps({"checked_at": datetime.now().isoformat(), "latest_version": latest_version}),
+                         sync=False)
+        except Exception as e:
+            from main import log
+            log("WARNING", f"Failed to save update check cache: {e}")
+    
+    def fetch_latest_version(self):
+        """Fetch latest version string, or None (safe off the GUI thread)"""
         from main import log
+        import requests
         
         try:
             response = requests.get(VERSION_URL, timeout=10)
             
             if response.status_code == 200:
-                latest_version = response.text.strip()
-                
-                log("INFO", f"Current version: {self.current_version}, Latest version: {latest_version}")
-                
-                if self.is_newer_version(latest_version):
-                    self.show_update_dialog(latest_version)
-                else:
-                    log("INFO", "App is up to date")
+                return response.text.strip()
         
         except Exception as e:
             log("WARNING", f"Failed to check for updates: {e}")
+        
+        return None
+    
+    def handle_latest_version(self, latest_version):
+        """Emit update_available if latest version is newer (safe off the GUI thread)"""
+        from main import log
+        
+        if not latest_version:
+            return
+        
+        log("INFO", f"Current version: {self.current_version}, Latest version: {latest_version}")
+        
+        if self.is_newer_version(latest_version):
+            self.update_available.emit(latest_version)
+        else:
+            log("INFO", "App is up to date")
     
     def is_newer_version(self, latest_version):
         """Compare versions"""
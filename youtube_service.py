@@ -1,5 +1,8 @@
 import re
 from PyQt6.QtCore import QThread, pyqtSignal
+from metrics import get_metrics
+from core.chat import parse_command
+from log_service import log
 
 class YouTubeService(QThread):
     level_requested = pyqtSignal(str, str, str)  # level_id, requester, platform
@@ -19,8 +22,6 @@ class YouTubeService(QThread):
     
     def run(self):
         """Main thread loop"""
-        from main import log
-        
         try:
             import pytchat
             
@@ -35,6 +36,7 @@ class YouTubeService(QThread):
             # Connect to YouTube chat
             self.chat = pytchat.create(video_id=video_id)
             self.connected = True
+            get_metrics().set_gauge("hwgdbot_chat_connected", 1, {"platform": "youtube"})
             self.connection_changed.emit("youtube", True)
             log("INFO", f"Connected to YouTube livestream {video_id}")
             
@@ -58,6 +60,7 @@ class YouTubeService(QThread):
         
         finally:
             self.connected = False
+            get_metrics().set_gauge("hwgdbot_chat_connected", 0, {"platform": "youtube"})
             self.connection_changed.emit("youtube", False)
             if self.chat:
                 self.chat.terminate()
@@ -79,26 +82,25 @@ class YouTubeService(QThread):
     
     def handle_message(self, username, message):
         """Handle chat message"""
-        from main import log
-        
-        message = message.strip()
+        command = parse_command(message, self.post_command, self.delete_command)
+        if not command:
+            return
         
-        # Check for post command
-        if message.startswith(self.post_command):
-            parts = message.split()
-            if len(parts) >= 2:
-                level_id = parts[1]
-                # Extract numeric ID
-                level_id = re.sub(r'\D', '', level_id)
-                if level_id:
-                    log("INFO", f"YouTube: {username} requested level {level_id}")
-                    self.level_requested.emit(level_id, username, "youtube")
-        
-        # Check for delete command
-        elif message.startswith(self.delete_command):
+        action, level_id = command
+        get_metrics().inc("hwgdbot_chat_commands_total", {"platform": "youtube", "command": action})
+        if action == "post":
+            log("INFO", f"YouTube: {username} requested level {level_id}")
+            self.level_requested.emit(level_id, username, "youtube")
+        else:
             log("INFO", f"YouTube: {username} requested delete")
             self.delete_requested.emit(username, "youtube")
     
+    def update_settings(self, settings):
+        """Pick up new chat commands without reconnecting"""
+        self.settings = settings
+        self.post_command = settings.get("post_command", "!post")
+        self.delete_command = settings.get("delete_command", "!del")
+    
     def is_connected(self):
         """Check if connected"""
         return self.connected